@@ -13,34 +13,71 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import sys
 from argparse import ArgumentParser
 
-from ebi_eva_common_pyutils.logger import logging_config
-
-from eva_assembly_ingestion.config import load_config
-from eva_assembly_ingestion.assembly_ingestion_job import AssemblyIngestionJob
+from eva_assembly_ingestion.config import load_config, ALL_TASKS
 
 
 def main():
     argparse = ArgumentParser(description='Add a new target assembly for a given taxonomy')
-    argparse.add_argument('--taxonomy', required=True, type=int, help='Taxonomy id to be processed')
-    argparse.add_argument('--target_assembly', required=True, type=str, help='New target assembly accession')
+    argparse.add_argument('--taxonomy', required=False, type=int, help='Taxonomy id to be processed')
+    argparse.add_argument('--target_assembly', required=False, type=str, help='New target assembly accession')
+    argparse.add_argument('--jobs_file', required=False, type=str,
+                          help='Tab separated file with one taxonomy and target assembly per line, to process several '
+                               'taxonomies concurrently instead of a single one')
+    argparse.add_argument('--max_concurrent_jobs', required=False, type=int, default=2,
+                          help='Maximum number of jobs from the jobs file running at the same time (default 2)')
+    argparse.add_argument('--summary_report', required=False, type=str,
+                          help='Path to a json file where the summary of the jobs from the jobs file is written')
     argparse.add_argument('--source_of_assembly', required=False, type=str, default='Ensembl',
                           help='Source of new target assembly (default Ensembl)')
     argparse.add_argument('--tasks', required=False, type=str, nargs='+',
-                          default=AssemblyIngestionJob.all_tasks, choices=AssemblyIngestionJob.all_tasks,
+                          default=ALL_TASKS, choices=ALL_TASKS,
                           help='Task or set of tasks to perform (defaults to all)')
     argparse.add_argument('--release_version', required=True, type=int,
                           help='Release version this assembly will be processed for')
     argparse.add_argument('--resume', help='If a process has been run already this will resume it.',
                           action='store_true', default=False)
+    argparse.add_argument('--plan', action='store_true', default=False,
+                          help='Print the expected cost of remapping the source assemblies, longest first, with the '
+                               'expected critical path and total core hours, without running anything')
     args = argparse.parse_args()
+    if not args.jobs_file and not (args.taxonomy and args.target_assembly):
+        argparse.error('Provide either --jobs_file or both --taxonomy and --target_assembly')
 
-    load_config()
+    # The job and its dependencies are only imported once the arguments are parsed, so that --help and usage errors
+    # return immediately
+    from ebi_eva_common_pyutils.logger import logging_config
+    from eva_assembly_ingestion.assembly_ingestion_job import AssemblyIngestionJob
+    from eva_assembly_ingestion.ingestion_orchestrator import IngestionOrchestrator, read_ingestion_jobs
 
-    job = AssemblyIngestionJob(args.taxonomy, args.target_assembly, args.release_version)
+    load_config()
     logging_config.add_stdout_handler()
 
+    if args.plan:
+        jobs = read_ingestion_jobs(args.jobs_file) if args.jobs_file else [(args.taxonomy, args.target_assembly)]
+        for taxonomy, target_assembly in jobs:
+            job = AssemblyIngestionJob(taxonomy, target_assembly, args.release_version)
+            try:
+                job.plan_remapping()
+            finally:
+                job.close()
+        return
+
+    if args.jobs_file:
+        orchestrator = IngestionOrchestrator(
+            read_ingestion_jobs(args.jobs_file), args.release_version, source_of_assembly=args.source_of_assembly,
+            tasks=args.tasks, resume=args.resume, max_concurrent_jobs=args.max_concurrent_jobs
+        )
+        summaries = orchestrator.run()
+        if args.summary_report:
+            orchestrator.write_summary_report(summaries, args.summary_report)
+        if any(summary['status'] != 'Completed' for summary in summaries):
+            sys.exit(1)
+        return
+
+    job = AssemblyIngestionJob(args.taxonomy, args.target_assembly, args.release_version)
     job.run_all(
         tasks=args.tasks,
         source_of_assembly=args.source_of_assembly,
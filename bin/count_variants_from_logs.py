@@ -15,27 +15,54 @@
 # limitations under the License.
 from argparse import ArgumentParser
 
-from ebi_eva_common_pyutils.logger import logging_config
-
 from eva_assembly_ingestion.config import load_config
-from eva_assembly_ingestion.assembly_ingestion_job import AssemblyIngestionJob
+
+
+def parse_source_assembly_and_taxonomy(value):
+    source_assembly, taxonomy = value.rsplit(':', 1)
+    return source_assembly, int(taxonomy)
 
 
 def main():
     argparse = ArgumentParser(description='Gather counts from logs')
-    argparse.add_argument('--taxonomy', required=True, type=int, help='Taxonomy id')
-    argparse.add_argument('--source_assembly', required=True, type=str, help='Source assembly accession')
+    argparse.add_argument('--taxonomy', required=False, type=int, help='Taxonomy id')
+    argparse.add_argument('--source_assembly', required=False, type=str, help='Source assembly accession')
+    argparse.add_argument('--source_assemblies_and_taxonomies', required=False, nargs='+',
+                          type=parse_source_assembly_and_taxonomy, metavar='SOURCE_ASSEMBLY:TAXONOMY',
+                          help='Gather the counts of several source assemblies and taxonomies at once, instead of '
+                               '--source_assembly and --taxonomy')
     argparse.add_argument('--target_assembly', required=True, type=str, help='Target assembly accession')
     argparse.add_argument('--output_directory', required=True, type=str, help='Path to processing directory')
     argparse.add_argument('--release_version', required=True, type=int, help='Release version')
     args = argparse.parse_args()
+    if args.source_assemblies_and_taxonomies:
+        pairs = args.source_assemblies_and_taxonomies
+        metrics_name = f'{pairs[0][1]}_{args.target_assembly}_counts'
+    elif args.source_assembly and args.taxonomy:
+        pairs = [(args.source_assembly, args.taxonomy)]
+        metrics_name = f'{args.taxonomy}_{args.target_assembly}_counts_{args.source_assembly}'
+    else:
+        argparse.error('Provide either --source_assemblies_and_taxonomies or both --source_assembly and --taxonomy')
+
+    # The job and its dependencies are only imported once the arguments are parsed
+    from ebi_eva_common_pyutils.logger import logging_config
+    from eva_assembly_ingestion.assembly_ingestion_job import AssemblyIngestionJob
 
     load_config()
 
-    job = AssemblyIngestionJob(args.taxonomy, args.target_assembly, args.release_version)
+    taxonomies_per_source_assembly = {}
+    for source_assembly, taxonomy in pairs:
+        taxonomy_list = taxonomies_per_source_assembly.setdefault(source_assembly, [])
+        if taxonomy not in taxonomy_list:
+            taxonomy_list.append(taxonomy)
+    job = AssemblyIngestionJob(pairs[0][1], args.target_assembly, args.release_version)
     logging_config.add_stdout_handler()
 
-    job.count_variants_from_logs(args.output_directory, args.source_assembly, [args.taxonomy])
+    try:
+        job.count_all_variants_from_logs(args.output_directory, list(taxonomies_per_source_assembly.items()))
+    finally:
+        job.close()
+        job.write_metrics(metrics_name)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from argparse import ArgumentParser
+
+from eva_assembly_ingestion.log_metrics import parse_log_directory_metrics, write_log_metrics_json, \
+    write_log_metrics_csv, DEFAULT_LOG_METRICS_PROCESSES
+
+
+def main():
+    argparse = ArgumentParser(description='Extract the metrics of the Spring Batch steps from all the logs in a '
+                                          'directory')
+    argparse.add_argument('--log_directory', required=True, type=str,
+                          help='Directory containing the logs, usually the logs directory of a remapping run')
+    argparse.add_argument('--json_output', required=False, type=str, help='Path to the json file to write')
+    argparse.add_argument('--csv_output', required=False, type=str, help='Path to the csv file to write')
+    argparse.add_argument('--processes', required=False, type=int, default=DEFAULT_LOG_METRICS_PROCESSES,
+                          help=f'Number of processes parsing the logs (default {DEFAULT_LOG_METRICS_PROCESSES})')
+    args = argparse.parse_args()
+    if not args.json_output and not args.csv_output:
+        argparse.error('Provide --json_output and/or --csv_output')
+
+    step_metrics = parse_log_directory_metrics(args.log_directory, args.processes)
+    if args.json_output:
+        write_log_metrics_json(step_metrics, args.json_output)
+    if args.csv_output:
+        write_log_metrics_csv(step_metrics, args.csv_output)
+
+
+if __name__ == "__main__":
+    main()
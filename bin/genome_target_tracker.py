@@ -15,11 +15,10 @@
 # limitations under the License.
 from argparse import ArgumentParser
 
-import requests
 from ebi_eva_common_pyutils.logger import logging_config
-from ebi_eva_common_pyutils.taxonomy.taxonomy import get_scientific_name_from_ensembl
-from ebi_eva_internal_pyutils.metadata_utils import get_metadata_connection_handle, insert_new_assembly_and_taxonomy
-from ebi_eva_internal_pyutils.pg_utils import get_all_results_for_query
+
+from eva_assembly_ingestion.db_session import get_metadata_connection_handle, fetch_all
+from eva_assembly_ingestion.taxonomy_cache import TaxonomyNameCache
 
 logger = logging_config.get_logger(__name__)
 logging_config.add_stdout_handler()
@@ -32,7 +31,7 @@ def get_all_taxonomies_from_eva(private_config_xml_file):
     taxonomy_list = []
     with get_metadata_connection_handle("production_processing", private_config_xml_file) as pg_conn:
         query = 'SELECT DISTINCT taxonomy_id FROM evapro.taxonomy'
-        for taxonomy in get_all_results_for_query(pg_conn, query):
+        for taxonomy in fetch_all(pg_conn, query):
             taxonomy_list.append(taxonomy[0])
 
     return taxonomy_list
@@ -43,27 +42,36 @@ def get_tax_latest_asm_from_eva(private_config_xml_file):
     with get_metadata_connection_handle("production_processing", private_config_xml_file) as pg_conn:
         query = f"""SELECT DISTINCT taxonomy_id, source, assembly_id FROM {remapping_genome_target_table} 
         WHERE current=TRUE"""
-        for tax_id, source, assembly in get_all_results_for_query(pg_conn, query):
+        for tax_id, source, assembly in fetch_all(pg_conn, query):
             eva_tax_asm[tax_id] = {'assembly': assembly, 'source': source}
 
     return eva_tax_asm
 
 
 def add_assembly_to_accessioned_assemblies(private_config_xml_file, taxonomies_to_assemblies):
+    from eva_assembly_ingestion.metadata_writer import MetadataWriter
+    # The connection context commits all the assemblies in a single transaction
     with get_metadata_connection_handle("production_processing", private_config_xml_file) as pg_conn:
-        for taxonomy in taxonomies_to_assemblies:
-            assembly = taxonomies_to_assemblies[taxonomy]['assembly']
-            insert_new_assembly_and_taxonomy(pg_conn, assembly, taxonomy)
+        MetadataWriter(pg_conn).insert_new_assemblies_and_taxonomies(
+            [(taxonomies_to_assemblies[taxonomy]['assembly'], taxonomy) for taxonomy in taxonomies_to_assemblies]
+        )
 
 
-def get_tax_asm_from_sources(eva_tax_asm_source):
+def get_tax_asm_from_sources(eva_tax_asm_source, taxonomy_cache_file=None):
+    from ebi_eva_common_pyutils.taxonomy.taxonomy import get_scientific_name_from_ensembl
     source_tax_asm = {}
+    # Look up the names of all the taxonomies tracked against Ensembl at once
+    ensembl_name_cache = TaxonomyNameCache(taxonomy_cache_file, lookup=get_scientific_name_from_ensembl,
+                                           section='ensembl_scientific_name')
+    ensembl_names = ensembl_name_cache.get_many(
+        [tax_id for tax_id in eva_tax_asm_source if eva_tax_asm_source[tax_id]["source"] == 'Ensembl']
+    )
     for tax_id in eva_tax_asm_source:
         # Check for each taxonomy which source is present in table and try to get supported assembly from that source.
         # Currently only Ensembl is supported
         source_in_eva = eva_tax_asm_source[tax_id]["source"]
         if source_in_eva == 'Ensembl':
-            tax_asm_from_ensembl = get_tax_asm_from_ensembl(tax_id)
+            tax_asm_from_ensembl = get_tax_asm_from_ensembl(tax_id, ensembl_names.get(tax_id))
             if tax_asm_from_ensembl is not None:
                 source_tax_asm[tax_id] = tax_asm_from_ensembl
         else:
@@ -73,11 +81,8 @@ def get_tax_asm_from_sources(eva_tax_asm_source):
     return source_tax_asm
 
 
-def get_tax_asm_from_ensembl(tax_id):
-    try:
-        logger.info(f'Query Ensembl for species name using taxonomy {tax_id}')
-        sp_name = get_scientific_name_from_ensembl(tax_id)
-    except Exception:
+def get_tax_asm_from_ensembl(tax_id, sp_name):
+    if not sp_name:
         logger.warning(f'Could not get species name for taxonomy {tax_id} in Ensembl')
         return None
     # Get assembly from Ensembl
@@ -92,6 +97,7 @@ def get_tax_asm_from_ensembl(tax_id):
 
 
 def get_supported_asm_from_ensembl(scientific_name):
+    import requests
     url = ensembl_url + '/' + scientific_name.lower().replace(' ', '_')
     response = requests.get(url, params={'content-type': 'application/json'})
     data = response.json()
@@ -99,10 +105,10 @@ def get_supported_asm_from_ensembl(scientific_name):
     return assembly_accession
 
 
-def check_supported_target_assembly(private_config_xml_file):
+def check_supported_target_assembly(private_config_xml_file, taxonomy_cache_file=None):
     taxonomy_list = get_all_taxonomies_from_eva(private_config_xml_file)
     eva_tax_asm_source = get_tax_latest_asm_from_eva(private_config_xml_file)
-    source_tax_asm = get_tax_asm_from_sources(eva_tax_asm_source)
+    source_tax_asm = get_tax_asm_from_sources(eva_tax_asm_source, taxonomy_cache_file)
 
     taxonomy_with_mismatch_assembly = {}
     taxonomy_not_tracked_by_eva = []
@@ -151,9 +157,12 @@ def main():
     argparse.add_argument('--private_config_xml_file', required=True,
                           help='Path to the file containing the username/passwords to access '
                                'production and development databases')
+    argparse.add_argument('--taxonomy_cache_file', required=False,
+                          help='Path to the cache of taxonomy scientific names shared with the assembly ingestion jobs '
+                               '(default: ~/.cache/eva_assembly_ingestion/taxonomy_names.json)')
     args = argparse.parse_args()
 
-    check_supported_target_assembly(args.private_config_xml_file)
+    check_supported_target_assembly(args.private_config_xml_file, args.taxonomy_cache_file)
 
 
 if __name__ == "__main__":
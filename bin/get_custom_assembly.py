@@ -15,32 +15,77 @@
 # limitations under the License.
 import argparse
 
-from ebi_eva_common_pyutils.logger import logging_config
-
 from eva_assembly_ingestion.config import load_config
-from eva_assembly_ingestion.custom_assembly import CustomAssemblyFromDatabase
 
 
 def main():
     parser = argparse.ArgumentParser(description='Generate custom assembly report for a given assembly',
                                      add_help=False)
     parser.add_argument("-a", "--assembly-accession",
-                        help="Assembly for which the process has to be run, e.g. GCA_000002315.3",
-                        required=True)
-    parser.add_argument("-f", "--fasta-file", help="Path to the fasta file containing the assembly", required=True)
+                        help="Assembly for which the process has to be run, e.g. GCA_000002315.3")
+    parser.add_argument("-f", "--fasta-file", help="Path to the fasta file containing the assembly")
     parser.add_argument("-r", "--report-file",
-                        help="Path to the assembly report file containing the assembly", required=True)
+                        help="Path to the assembly report file containing the assembly")
+    parser.add_argument("-m", "--manifest",
+                        help="Tab separated file with one assembly accession, fasta file and report file per line, "
+                             "to process several assemblies at once instead of a single one")
+    parser.add_argument("--required-contigs-file",
+                        help="Json file of the required contigs per assembly accession. With --write-required-contigs "
+                             "it is written for all the --assembly-accessions, otherwise the required contigs of "
+                             "--assembly-accession are read from it instead of the database")
+    parser.add_argument("--write-required-contigs", default=False, action='store_true',
+                        help="Only retrieve the required contigs of all the --assembly-accessions with a single query "
+                             "and write them to --required-contigs-file")
+    parser.add_argument("--assembly-accessions", nargs='+',
+                        help="Assemblies for which the required contigs are written with --write-required-contigs")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Number of processes used to generate the assemblies in a manifest and validate them")
     parser.add_argument("--no-rename", help="Disable renaming of contigs", default=False, action='store_true')
+    parser.add_argument("--incremental", default=False, action='store_true',
+                        help="Build the custom assembly next to the original genome files, following symlinks, and "
+                             "reuse it if it was built from the same inputs. Links to the custom assembly are created "
+                             "next to the provided files")
+    parser.add_argument("--bgzip-output", default=False, action='store_true',
+                        help="Write the custom fasta BGZF compressed with its .fai and .gzi indexes. This is the "
+                             "default when the fasta file is compressed")
+    parser.add_argument("--validate", default=False, action='store_true',
+                        help="Check the sequence lengths of the custom fasta against the custom assembly report and "
+                             "write the length, MD5 and sha512t24u of every sequence next to the custom fasta")
     parser.add_argument('--help', action='help', help='Show this help message and exit')
 
     args = parser.parse_args()
+    if args.write_required_contigs:
+        if not (args.assembly_accessions and args.required_contigs_file):
+            parser.error('Provide --assembly-accessions and --required-contigs-file with --write-required-contigs')
+    elif not args.manifest and not (args.assembly_accession and args.fasta_file and args.report_file):
+        parser.error('Provide either --manifest or all of --assembly-accession, --fasta-file and --report-file')
+
+    # The custom assembly module and its dependencies are only imported once the arguments are parsed
+    from ebi_eva_common_pyutils.logger import logging_config
+    from eva_assembly_ingestion.custom_assembly import CustomAssemblyFromDatabase, \
+        CustomAssemblyFromRequiredContigs, generate_custom_assemblies, read_custom_assembly_manifest, \
+        read_required_contigs, write_required_contigs
 
     load_config()
     logging_config.add_stdout_handler()
 
-    assembly = CustomAssemblyFromDatabase(args.assembly_accession, args.fasta_file, args.report_file, args.no_rename)
-    assembly.generate_assembly_report()
-    assembly.generate_fasta()
+    if args.write_required_contigs:
+        write_required_contigs(args.assembly_accessions, args.required_contigs_file)
+    elif args.manifest:
+        generate_custom_assemblies(read_custom_assembly_manifest(args.manifest), args.no_rename, args.processes,
+                                   args.incremental, args.bgzip_output, args.validate)
+    elif args.required_contigs_file:
+        assembly = CustomAssemblyFromRequiredContigs(
+            args.assembly_accession, args.fasta_file, args.report_file,
+            read_required_contigs(args.required_contigs_file, args.assembly_accession), args.no_rename,
+            incremental=args.incremental, bgzip_output=args.bgzip_output
+        )
+        assembly.generate(validate=args.validate, nb_processes=args.processes)
+    else:
+        assembly = CustomAssemblyFromDatabase(args.assembly_accession, args.fasta_file, args.report_file,
+                                              args.no_rename, incremental=args.incremental,
+                                              bgzip_output=args.bgzip_output)
+        assembly.generate(validate=args.validate, nb_processes=args.processes)
 
 
 if __name__ == "__main__":
@@ -12,35 +12,37 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import datetime
+import json
 import os
 import subprocess
 from collections import defaultdict
-from functools import lru_cache
 
 import yaml
 from cached_property import cached_property
 from ebi_eva_common_pyutils.command_utils import run_command_with_output
 from ebi_eva_common_pyutils.common_utils import pretty_print
 from ebi_eva_common_pyutils.config import cfg
-from ebi_eva_common_pyutils.contig_alias.contig_alias import ContigAliasClient
 from ebi_eva_common_pyutils.logger import AppLogger
-from ebi_eva_common_pyutils.taxonomy.taxonomy import get_scientific_name_from_taxonomy
-from ebi_eva_internal_pyutils.config_utils import get_contig_alias_db_creds_for_profile
-from ebi_eva_internal_pyutils.metadata_utils import get_metadata_connection_handle, insert_new_assembly_and_taxonomy, \
-    add_to_supported_assemblies
-from ebi_eva_internal_pyutils.pg_utils import execute_query, get_all_results_for_query
-from ebi_eva_internal_pyutils.spring_properties import SpringPropertiesGenerator
-from psycopg2.extras import execute_values
-
-from eva_assembly_ingestion.config import get_nextflow_config_flag
-from eva_assembly_ingestion.parse_counts import count_variants_extracted, count_variants_remapped, \
-    count_variants_ingested
+from psycopg2.extras import Json, execute_values
+
+from eva_assembly_ingestion.config import get_nextflow_config_flag, ALL_TASKS
+from eva_assembly_ingestion.cost_planner import CostPlanner
+from eva_assembly_ingestion.counts_collector import CountsCollector
+from eva_assembly_ingestion.db_session import MetadataSession, fetch_all
+from eva_assembly_ingestion.instrumentation import Instrumentation
+from eva_assembly_ingestion.log_metrics import parse_log_directory_metrics, write_log_metrics_json
+from eva_assembly_ingestion.nextflow_events import NextflowEventListener, SourceAssemblyProgress
+from eva_assembly_ingestion.nextflow_trace import write_trace_config, parse_trace, group_by_source_assembly
+from eva_assembly_ingestion.parse_counts import count_variants_extracted, count_variants_ingested, \
+    load_remapping_counts, summarise_remapping_counts
+from eva_assembly_ingestion.taxonomy_cache import TaxonomyNameCache, DEFAULT_TAXONOMY_CACHE_TTL
+from eva_assembly_ingestion.tracker_snapshot import TrackerSnapshot, TRACKER_RETURNING_COLUMNS
 
 SUPPORTED_ASSEMBLY_TRACKER_TABLE = "evapro.supported_assembly_tracker"
 
 
 class AssemblyIngestionJob(AppLogger):
-    all_tasks = ['load_tracker', 'remap_cluster', 'update_dbs']
+    all_tasks = ALL_TASKS
     tracking_table = 'eva_progress_tracker.remapping_tracker'
 
     def __init__(self, taxonomy, target_assembly, release_version):
@@ -48,12 +50,51 @@ class AssemblyIngestionJob(AppLogger):
         self.release_version = release_version
         self.private_settings_file = cfg['maven']['settings_file']
         self.maven_profile = cfg['maven']['environment']
-        self.properties_generator = SpringPropertiesGenerator(self.maven_profile, self.private_settings_file)
         self.source_taxonomy = taxonomy
+        # Metrics of the job are only recorded when they have somewhere to go
+        self.metrics_directory = cfg.query('metrics', 'output_directory')
+        self.instrumentation = Instrumentation(
+            enabled=bool(self.metrics_directory),
+            labels={'taxonomy': taxonomy, 'target_assembly': target_assembly, 'release_version': release_version}
+        )
+        # All the steps of the job share the same connections to the metadata database
+        self.metadata_session = MetadataSession(self.maven_profile, self.private_settings_file,
+                                                instrumentation=self.instrumentation)
+        self.tracker_snapshot = TrackerSnapshot(self.metadata_session, self.tracking_table, self.release_version,
+                                                self.target_assembly)
+
+    def close(self):
+        self.metadata_session.close()
+
+    def write_metrics(self, name=None):
+        """Write the metrics of the job to <name>_metrics.json and <name>_metrics.prom in the metrics directory."""
+        if not self.metrics_directory:
+            return
+        name = name or f'{self.source_taxonomy}_{self.target_assembly}'
+        os.makedirs(self.metrics_directory, exist_ok=True)
+        self.instrumentation.write(os.path.join(self.metrics_directory, f'{name}_metrics.json'),
+                                   os.path.join(self.metrics_directory, f'{name}_metrics.prom'))
+
+    @cached_property
+    def properties_generator(self):
+        from ebi_eva_internal_pyutils.spring_properties import SpringPropertiesGenerator
+        return SpringPropertiesGenerator(self.maven_profile, self.private_settings_file)
+
+    @cached_property
+    def taxonomy_name_cache(self):
+        from ebi_eva_common_pyutils.taxonomy.taxonomy import get_scientific_name_from_taxonomy
+        return TaxonomyNameCache(
+            cfg.query('taxonomy_cache', 'file'),
+            ttl=cfg.query('taxonomy_cache', 'ttl', ret_default=DEFAULT_TAXONOMY_CACHE_TTL),
+            lookup=self.instrumentation.instrument('taxonomy_lookup', get_scientific_name_from_taxonomy)
+        )
+
+    @cached_property
+    def cost_planner(self):
+        return CostPlanner(self.metadata_session, self.tracking_table, self.target_assembly)
 
-    @lru_cache
     def scientific_name(self, taxonomy):
-        return get_scientific_name_from_taxonomy(taxonomy)
+        return self.taxonomy_name_cache.get(taxonomy)
 
     @cached_property
     def taxonomies(self):
@@ -61,22 +102,29 @@ class AssemblyIngestionJob(AppLogger):
         taxonomy_query = (
             f"select taxonomy_id from {SUPPORTED_ASSEMBLY_TRACKER_TABLE} where current=true AND assembly_id in ("
             f"    SELECT assembly_id FROM {SUPPORTED_ASSEMBLY_TRACKER_TABLE} "
-            f"    WHERE taxonomy_id={self.source_taxonomy} AND current=true"
+            f"    WHERE taxonomy_id=%s AND current=true"
             f");"
         )
-        with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
-            taxonomy_list = list(set([t for t, in get_all_results_for_query(pg_conn, taxonomy_query)]))
+        with self.metadata_session.connection() as pg_conn:
+            taxonomy_list = list(set([t for t, in fetch_all(pg_conn, taxonomy_query, (self.source_taxonomy,))]))
         if not taxonomy_list:
             taxonomy_list = [self.source_taxonomy]
         return taxonomy_list
 
     def run_all(self, tasks, source_of_assembly, resume):
-        if 'load_tracker' in tasks:
-            self.load_tracker()
-        if 'remap_cluster' in tasks:
-            self.run_remapping_and_clustering(resume)
-        if 'update_dbs' in tasks:
-            self.update_dbs(source_of_assembly)
+        try:
+            if 'load_tracker' in tasks:
+                with self.instrumentation.span('load_tracker'):
+                    self.load_tracker()
+            if 'remap_cluster' in tasks:
+                with self.instrumentation.span('remap_cluster'):
+                    self.run_remapping_and_clustering(resume)
+            if 'update_dbs' in tasks:
+                with self.instrumentation.span('update_dbs'):
+                    self.update_dbs(source_of_assembly)
+        finally:
+            self.close()
+            self.write_metrics()
 
     def load_tracker(self):
         """Load the tracking table with the source assemblies for these taxonomies. Will not load anything if jobs in
@@ -93,65 +141,72 @@ class AssemblyIngestionJob(AppLogger):
         column_names = ('source', 'taxonomy', 'scientific_name', 'origin_assembly_accession', 'assembly_accession',
                         'remapping_version', 'release_version', 'num_studies', 'num_ss_ids', 'study_accessions',
                         'remapping_status')
+        # Resolve all the scientific names at once rather than one at a time while building the rows
+        self.taxonomy_name_cache.get_many(self.taxonomies)
+        eva_source_assemblies = self.get_source_assemblies_and_projects()
+        dbsnp_source_assemblies = self.get_source_assemblies_and_num_studies_dbsnp()
+        # Number of submitted variants from previous remappings, 1 when unknown
+        variant_counts = self.cost_planner.load_variant_counts(
+            set(row[0] for row in eva_source_assemblies + dbsnp_source_assemblies), self.taxonomies
+        )
         rows = []
         rows_to_print = []
-        for source_assembly, taxonomy, projects in self.get_source_assemblies_and_projects():
+        for source_assembly, taxonomy, projects in eva_source_assemblies:
             rows.append(('EVA', taxonomy, self.scientific_name(taxonomy), source_assembly, self.target_assembly,
-                         1, self.release_version, len(projects), 1, None, 'Pending'))
+                         1, self.release_version, len(projects),
+                         variant_counts.get((source_assembly, taxonomy, 'EVA'), 1), None, 'Pending'))
             rows_to_print.append(('EVA', taxonomy, self.scientific_name(taxonomy), source_assembly,
                                   self.target_assembly, len(projects), 'Pending'))
-        for source_assembly, taxonomy, num_studies in self.get_source_assemblies_and_num_studies_dbsnp():
+        for source_assembly, taxonomy, num_studies in dbsnp_source_assemblies:
             rows.append(('DBSNP', taxonomy, self.scientific_name(taxonomy), source_assembly, self.target_assembly,
-                         1, self.release_version, num_studies, 1, None, 'Pending'))
+                         1, self.release_version, num_studies,
+                         variant_counts.get((source_assembly, taxonomy, 'DBSNP'), 1), None, 'Pending'))
             rows_to_print.append(('DBSNP', taxonomy, self.scientific_name(taxonomy), source_assembly,
                                   self.target_assembly, num_studies, 'Pending'))
         if len(rows) == 0:
             self.warning(f'Nothing to process for taxonomy {self.taxonomies} and target assembly {self.target_assembly}')
             return
-        with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
+        with self.metadata_session.connection() as pg_conn:
             with pg_conn.cursor() as cursor:
-                insert_query = f"INSERT INTO {self.tracking_table} ({','.join(column_names)}) VALUES %s "
-                execute_values(cursor, insert_query, rows)
+                insert_query = (f"INSERT INTO {self.tracking_table} AS tracker ({','.join(column_names)}) VALUES %s "
+                                f"RETURNING {TRACKER_RETURNING_COLUMNS}")
+                self.tracker_snapshot.apply(execute_values(cursor, insert_query, rows, fetch=True))
         pretty_print(header_to_print, rows_to_print)
 
     def get_job_information_from_tracker(self):
         """Gets jobs from tracker by target assembly, taxonomies, and release version"""
-        query = (
-            f"SELECT source, taxonomy, scientific_name, origin_assembly_accession, "
-            f"assembly_accession, num_studies, remapping_status "
-            f"FROM {self.tracking_table} "
-            f"WHERE release_version={self.release_version} "
-            f"AND assembly_accession='{self.target_assembly}' "
-            f"AND taxonomy in ({', '.join([str(t) for t in self.taxonomies])})"
-        )
-        with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
-            return get_all_results_for_query(pg_conn, query)
+        return [
+            (row.source, row.taxonomy, row.scientific_name, row.origin_assembly_accession, row.assembly_accession,
+             row.num_studies, row.remapping_status)
+            for row in self.tracker_snapshot.rows(self.taxonomies)
+        ]
 
     def get_source_assemblies_and_projects(self):
         """Query metadata for all public projects with these taxonomies, of these getting all reference accessions
         for all analyses."""
-        with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
+        taxonomies = self.taxonomies
+        with self.metadata_session.connection() as pg_conn:
             query = (
-                f"SELECT DISTINCT vcf_reference_accession, taxonomy_id, ARRAY_AGG(project_accession) "
-                f"FROM evapro.project "
-                f"LEFT OUTER JOIN evapro.project_taxonomy USING (project_accession) "
-                f"LEFT OUTER JOIN evapro.project_analysis USING (project_accession) "
-                f"LEFT OUTER JOIN evapro.analysis USING (analysis_accession) "
-                f"WHERE taxonomy_id in ({', '.join([str(t) for t in self.taxonomies])}) "
-                f"AND ena_status=4 AND hidden_in_eva=0 AND vcf_reference_accession IS NOT NULL "
-                f"GROUP BY vcf_reference_accession, taxonomy_id"
+                "SELECT DISTINCT vcf_reference_accession, taxonomy_id, ARRAY_AGG(project_accession) "
+                "FROM evapro.project "
+                "LEFT OUTER JOIN evapro.project_taxonomy USING (project_accession) "
+                "LEFT OUTER JOIN evapro.project_analysis USING (project_accession) "
+                "LEFT OUTER JOIN evapro.analysis USING (analysis_accession) "
+                "WHERE taxonomy_id = ANY(%s) "
+                "AND ena_status=4 AND hidden_in_eva=0 AND vcf_reference_accession IS NOT NULL "
+                "GROUP BY vcf_reference_accession, taxonomy_id"
             )
-            return get_all_results_for_query(pg_conn, query)
+            return fetch_all(pg_conn, query, (taxonomies,))
 
     def get_source_assemblies_and_num_studies_dbsnp(self):
         # Source assemblies for dbSNP are not in metadata, so instead we get them from release 3 in the tracker
-        with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
+        taxonomies = self.taxonomies
+        with self.metadata_session.connection() as pg_conn:
             query = (
                 f"SELECT origin_assembly_accession, taxonomy, num_studies FROM {self.tracking_table} "
-                f"WHERE release_version=3 AND taxonomy in ({', '.join([str(t) for t in self.taxonomies])}) "
-                f"AND source='DBSNP'"
+                f"WHERE release_version=3 AND taxonomy = ANY(%s) AND source='DBSNP'"
             )
-            return get_all_results_for_query(pg_conn, query)
+            return fetch_all(pg_conn, query, (taxonomies,))
 
     def run_remapping_and_clustering(self, resume):
         """Run remapping and clustering for all source assemblies in the tracker marked as not Complete, resuming
@@ -160,8 +215,36 @@ class AssemblyIngestionJob(AppLogger):
         if not source_assemblies_and_taxonomies:
             self.info('No incomplete source assemblies or taxonomies to process')
             return
+        # Start the most expensive source assemblies first so that they do not delay the end of the run
+        try:
+            plan = self.cost_planner.plan(source_assemblies_and_taxonomies)
+        except Exception as e:
+            # Planning only changes the order of the source assemblies, so the run goes ahead without it
+            self.warning(f'Could not plan the remapping, source assemblies are run in the tracker order: {e!r}')
+        else:
+            for line in plan.report_lines():
+                self.info(line)
+            source_assemblies_and_taxonomies = plan.source_assemblies_and_taxonomies
         self.process_all_assemblies(source_assemblies_and_taxonomies, resume)
 
+    def plan_remapping(self):
+        """
+        Print the expected cost of remapping the incomplete source assemblies in the tracker, or of all the source
+        assemblies of the taxonomies when the tracker is not loaded yet, without changing anything.
+        """
+        if self.get_job_information_from_tracker():
+            source_assemblies_and_taxonomies = self.get_incomplete_assemblies_and_taxonomies()
+        else:
+            taxonomies_per_source_assembly = defaultdict(list)
+            for source_assembly, taxonomy, _ in (self.get_source_assemblies_and_projects() +
+                                                 self.get_source_assemblies_and_num_studies_dbsnp()):
+                if taxonomy not in taxonomies_per_source_assembly[source_assembly]:
+                    taxonomies_per_source_assembly[source_assembly].append(taxonomy)
+            source_assemblies_and_taxonomies = list(taxonomies_per_source_assembly.items())
+        plan = self.cost_planner.plan(source_assemblies_and_taxonomies)
+        plan.report()
+        return plan
+
     def get_incomplete_assemblies_and_taxonomies(self):
         incomplete_assemblies = defaultdict(list)
         for row in self.get_job_information_from_tracker():
@@ -182,15 +265,16 @@ class AssemblyIngestionJob(AppLogger):
         work_dir = os.path.join(taxonomy_directory, 'work')
         os.makedirs(work_dir, exist_ok=True)
 
-        extraction_properties_file = self.create_extraction_properties(
-            output_file_path=os.path.join(taxonomy_directory, 'remapping_extraction.properties')
-        )
-        ingestion_properties_file = self.create_ingestion_properties(
-            output_file_path=os.path.join(taxonomy_directory, 'remapping_ingestion.properties')
-        )
-        clustering_template_file = self.create_clustering_properties(
-            output_file_path=os.path.join(taxonomy_directory, 'clustering_template.properties')
-        )
+        with self.instrumentation.span('remap_cluster.properties'):
+            extraction_properties_file = self.create_extraction_properties(
+                output_file_path=os.path.join(taxonomy_directory, 'remapping_extraction.properties')
+            )
+            ingestion_properties_file = self.create_ingestion_properties(
+                output_file_path=os.path.join(taxonomy_directory, 'remapping_ingestion.properties')
+            )
+            clustering_template_file = self.create_clustering_properties(
+                output_file_path=os.path.join(taxonomy_directory, 'clustering_template.properties')
+            )
 
         remapping_log = os.path.join(taxonomy_directory, 'remapping_process.log')
         remap_cluster_config_file = os.path.join(taxonomy_directory, 'remap_cluster_config.yaml')
@@ -206,33 +290,123 @@ class AssemblyIngestionJob(AppLogger):
             'extraction_properties': extraction_properties_file,
             'ingestion_properties': ingestion_properties_file,
             'clustering_properties': clustering_template_file,
-            'remapping_config': cfg.config_file
+            'remapping_config': cfg.config_file,
+            # Shared by all the jobs to ingest into Mongo one at a time
+            'mongo_ingestion_lock': cfg.query('remapping', 'mongo_ingestion_lock',
+                                              ret_default=os.path.join(base_directory, 'mongo_ingestion.lock'))
         }
         for part in ['executable', 'nextflow', 'jar']:
             remap_cluster_config[part] = cfg[part]
         with open(remap_cluster_config_file, 'w') as open_file:
             yaml.safe_dump(remap_cluster_config, open_file)
+        # The trace of all the tasks is always recorded to profile the run
+        trace_file = os.path.join(taxonomy_directory, 'remapping_trace.txt')
+        trace_config_file = write_trace_config(os.path.join(taxonomy_directory, 'remapping_trace.config'), trace_file)
+        # The status of each source assembly is updated as its tasks complete, from the events sent by Nextflow
+        progress = SourceAssemblyProgress()
         try:
-            command = [
-                cfg['executable']['nextflow'],
-                '-log', remapping_log,
-                'run', nextflow_pipeline,
-                '-params-file', remap_cluster_config_file,
-                '-work-dir', work_dir,
-                get_nextflow_config_flag()
-            ]
-            if resume:
-                command.append('-resume')
-            curr_working_dir = os.getcwd()
-            os.chdir(taxonomy_directory)
-            run_command_with_output('Nextflow remapping process', ' '.join(command))
+            with NextflowEventListener(lambda event: self.handle_nextflow_event(progress, event)) as listener:
+                # Nextflow runs from the taxonomy directory without changing the working directory of this process,
+                # which can be running other jobs concurrently
+                command = [
+                    'cd', taxonomy_directory, '&&',
+                    cfg['executable']['nextflow'],
+                    '-log', remapping_log,
+                    'run', nextflow_pipeline,
+                    '-params-file', remap_cluster_config_file,
+                    '-work-dir', work_dir,
+                    '-with-weblog', listener.url,
+                    '-c', trace_config_file,
+                    get_nextflow_config_flag()
+                ]
+                if resume:
+                    command.append('-resume')
+                with self.instrumentation.span('remap_cluster.nextflow'):
+                    run_command_with_output('Nextflow remapping process', ' '.join(command))
         except subprocess.CalledProcessError as e:
             self.error('Nextflow remapping pipeline failed')
-            self.set_status_failed(source_assemblies_and_taxonomies)
+            # Source assemblies completed before the failure stay Completed and are not rerun when resuming
+            self.set_status_failed(self._exclude_source_assemblies(
+                source_assemblies_and_taxonomies, progress.source_assemblies_with_status('Completed')
+            ))
             raise e
+        else:
+            self.set_status_end(self._exclude_source_assemblies(
+                source_assemblies_and_taxonomies, progress.source_assemblies_with_status('Completed')
+            ))
         finally:
-            os.chdir(curr_working_dir)
-        self.set_status_end(source_assemblies_and_taxonomies)
+            # The profile of the run is only diagnostic, so failing to save it must not hide the outcome of the run
+            with self.instrumentation.span('remap_cluster.task_profile'):
+                try:
+                    self.save_task_profile(trace_file,
+                                           os.path.join(taxonomy_directory, 'remapping_task_profile.json'))
+                except Exception as e:
+                    self.warning(f'Could not save the task profile of the run: {e!r}')
+            with self.instrumentation.span('remap_cluster.step_metrics'):
+                try:
+                    self.save_step_metrics(os.path.join(taxonomy_directory, 'logs'),
+                                           os.path.join(taxonomy_directory, 'remapping_step_metrics.json'))
+                except Exception as e:
+                    self.warning(f'Could not save the step metrics of the run: {e!r}')
+
+    def save_step_metrics(self, log_directory, step_metrics_file):
+        """Write the metrics of the Spring Batch steps found in the logs of the run to a json report."""
+        if not os.path.isdir(log_directory):
+            return
+        step_metrics = parse_log_directory_metrics(log_directory)
+        write_log_metrics_json(step_metrics, step_metrics_file)
+        self.info(f'Metrics of {len(step_metrics)} steps written to {step_metrics_file}')
+
+    def save_task_profile(self, trace_file, profile_file):
+        """
+        Parse the Nextflow trace of the run into task records, write them to a json report and store the records of
+        each source assembly and taxonomy in the task_profile column of the tracker.
+        """
+        if not os.path.exists(trace_file):
+            self.warning(f'No Nextflow trace found in {trace_file}, the tasks of the run are not profiled')
+            return
+        records = parse_trace(trace_file)
+        with open(profile_file, 'w') as open_file:
+            json.dump(records, open_file, indent=2)
+        records_per_source_assembly = group_by_source_assembly(records)
+        rows = [
+            (self.release_version, source_assembly, taxonomy, Json(source_assembly_records))
+            for (source_assembly, taxonomy), source_assembly_records in records_per_source_assembly.items()
+        ]
+        if not rows:
+            return
+        query = (
+            f"UPDATE {self.tracking_table} AS tracker SET task_profile=new.task_profile "
+            f"FROM (VALUES %s) AS new(release_version, origin_assembly_accession, taxonomy, task_profile) "
+            f"WHERE tracker.release_version=new.release_version "
+            f"AND tracker.origin_assembly_accession=new.origin_assembly_accession AND tracker.taxonomy=new.taxonomy "
+            f"RETURNING {TRACKER_RETURNING_COLUMNS}"
+        )
+        with self.metadata_session.connection() as pg_conn:
+            with pg_conn.cursor() as cursor:
+                self.tracker_snapshot.apply(execute_values(
+                    cursor, query, rows, template='(%s, %s, %s, %s::jsonb)', page_size=len(rows), fetch=True
+                ))
+
+    def handle_nextflow_event(self, progress, event):
+        """Update the status of the source assembly and taxonomies whose task is reported by the Nextflow event."""
+        status_change = progress.status_change(event)
+        if not status_change:
+            return
+        source_assembly, taxonomies, status = status_change
+        self.info(f'Source assembly {source_assembly} for taxonomies {taxonomies} {status.lower()}')
+        end_time = datetime.datetime.now() if status == 'Completed' else None
+        self.set_status([(source_assembly, taxonomies)], status, end_time=end_time)
+
+    @staticmethod
+    def _exclude_source_assemblies(source_assemblies_and_taxonomies, excluded_source_assemblies_and_taxonomies):
+        remaining = []
+        for source_assembly, taxonomy_list in source_assemblies_and_taxonomies:
+            taxonomies = [taxonomy for taxonomy in taxonomy_list
+                          if (source_assembly, taxonomy) not in excluded_source_assemblies_and_taxonomies]
+            if taxonomies:
+                remaining.append((source_assembly, taxonomies))
+        return remaining
 
     def create_extraction_properties(self, output_file_path):
         properties = self.properties_generator.get_remapping_extraction_properties(
@@ -260,19 +434,36 @@ class AssemblyIngestionJob(AppLogger):
         return output_file_path
 
     def set_status(self, source_assemblies_and_taxonomies, status, start_time=None, end_time=None):
-        for source_assembly, taxonomy_list in source_assemblies_and_taxonomies:
-            for taxonomy in taxonomy_list:
-                query = f"UPDATE {self.tracking_table} SET remapping_status='{status}' "
-                if start_time:
-                    query += f", remapping_start='{start_time.isoformat()}' "
-                if end_time:
-                    query += f", remapping_end='{end_time.isoformat()}' "
-                query += (
-                    f"WHERE release_version={self.release_version} "
-                    f"AND origin_assembly_accession='{source_assembly}' AND taxonomy={taxonomy}"
-                )
-                with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
-                    execute_query(pg_conn, query)
+        """
+        Set the status of all the source assemblies and taxonomies, and optionally their start or end time, with a
+        single statement so that the tracker is never left partially updated.
+        """
+        rows = [
+            (self.release_version, source_assembly, taxonomy, status, start_time, end_time)
+            for source_assembly, taxonomy_list in source_assemblies_and_taxonomies
+            for taxonomy in taxonomy_list
+        ]
+        if not rows:
+            return
+        query = (
+            f"UPDATE {self.tracking_table} AS tracker "
+            f"SET remapping_status=new.remapping_status, "
+            f"remapping_start=COALESCE(new.remapping_start, tracker.remapping_start), "
+            f"remapping_end=COALESCE(new.remapping_end, tracker.remapping_end) "
+            f"FROM (VALUES %s) AS new(release_version, origin_assembly_accession, taxonomy, remapping_status, "
+            f"remapping_start, remapping_end) "
+            f"WHERE tracker.release_version=new.release_version "
+            f"AND tracker.origin_assembly_accession=new.origin_assembly_accession AND tracker.taxonomy=new.taxonomy "
+            f"RETURNING {TRACKER_RETURNING_COLUMNS}"
+        )
+        # psycopg2 already casts the datetimes, only the NULLs need a type for the COALESCE
+        time_placeholders = ['%s' if time is not None else '%s::timestamp' for time in (start_time, end_time)]
+        template = '(%s, %s, %s, %s, ' + ', '.join(time_placeholders) + ')'
+        with self.metadata_session.connection() as pg_conn:
+            with pg_conn.cursor() as cursor:
+                self.tracker_snapshot.apply(execute_values(
+                    cursor, query, rows, template=template, page_size=len(rows), fetch=True
+                ))
 
     def set_status_start(self, source_assemblies_and_taxonomies):
         self.set_status(source_assemblies_and_taxonomies, 'Started', start_time=datetime.datetime.now())
@@ -285,73 +476,72 @@ class AssemblyIngestionJob(AppLogger):
 
     def set_counts(self, source_assembly, taxonomy, source, nb_variant_extracted=None, nb_variant_remapped=None,
                    nb_variant_ingested=None):
-        set_statements = []
-        query = (
-            f"SELECT * FROM {self.tracking_table} "
-            f"WHERE release_version={self.release_version} AND origin_assembly_accession='{source_assembly}' "
-            f"AND taxonomy='{taxonomy}' AND source='{source}'"
-        )
-        with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
-            # Check that this row exists
-            results = get_all_results_for_query(pg_conn, query)
-        if results:
-            if nb_variant_extracted is not None:
-                set_statements.append(f"num_ss_extracted = {nb_variant_extracted}")
-            if nb_variant_remapped is not None:
-                set_statements.append(f"num_ss_remapped = {nb_variant_remapped}")
-            if nb_variant_ingested is not None:
-                set_statements.append(f"num_ss_ingested = {nb_variant_ingested}")
-
-        if set_statements:
-            query = (
-                f"UPDATE {self.tracking_table} SET {', '.join(set_statements)} "
-                f"WHERE release_version={self.release_version} AND origin_assembly_accession='{source_assembly}' "
-                f"AND taxonomy='{taxonomy}' AND source='{source}'"
-            )
-            with get_metadata_connection_handle(cfg['maven']['environment'], cfg['maven']['settings_file']) as pg_conn:
-                execute_query(pg_conn, query)
+        counts_collector = CountsCollector(self.tracking_table, self.release_version)
+        counts_collector.add(source_assembly, taxonomy, source, nb_variant_extracted=nb_variant_extracted,
+                             nb_variant_remapped=nb_variant_remapped, nb_variant_ingested=nb_variant_ingested)
+        with self.metadata_session.connection() as pg_conn:
+            self.tracker_snapshot.apply(counts_collector.write(pg_conn))
 
     def count_variants_from_logs(self, output_directory, source_assembly, taxonomy_list):
-        for taxonomy in taxonomy_list:
-            vcf_extractor_log = os.path.join(output_directory, 'logs',
-                                             f'{source_assembly}_{taxonomy}_vcf_extractor.log')
-            eva_remapping_count = os.path.join(output_directory, 'eva',
-                                               f'{source_assembly}_{taxonomy}_eva_remapped_counts.yml')
-            dbsnp_remapping_count = os.path.join(output_directory, 'dbsnp',
-                                                 f'{source_assembly}_{taxonomy}_dbsnp_remapped_counts.yml')
-            eva_ingestion_log = os.path.join(output_directory, 'logs',
-                                             f'{source_assembly}_{taxonomy}_eva_remapped.vcf_ingestion.log')
-            dbsnp_ingestion_log = os.path.join(output_directory, 'logs',
-                                               f'{source_assembly}_{taxonomy}_dbsnp_remapped.vcf_ingestion.log')
-
-            eva_total, eva_written, dbsnp_total, dbsnp_written = count_variants_extracted(vcf_extractor_log)
-            eva_candidate, eva_remapped, eva_unmapped = count_variants_remapped(eva_remapping_count)
-            dbsnp_candidate, dbsnp_remapped, dbsnp_unmapped = count_variants_remapped(dbsnp_remapping_count)
-            # Use the number of variant read rather than the number of variant ingested to get the total number of variant
-            # when some might have been written in previous execution.
-            eva_ingestion_candidate, eva_ingested, eva_duplicates = count_variants_ingested(eva_ingestion_log)
-            dbsnp_ingestion_candidate, dbsnp_ingested, dbsnp_duplicates = count_variants_ingested(dbsnp_ingestion_log)
-
-            self.set_counts(
-                source_assembly, taxonomy, 'EVA',
-                nb_variant_extracted=eva_written,
-                nb_variant_remapped=eva_remapped,
-                nb_variant_ingested=eva_ingestion_candidate
-            )
-            self.set_counts(
-                source_assembly, taxonomy, 'DBSNP',
-                nb_variant_extracted=dbsnp_written,
-                nb_variant_remapped=dbsnp_remapped,
-                nb_variant_ingested=dbsnp_ingestion_candidate
-            )
+        """Read the counts of all the taxonomies from the logs and write them to the tracker at once."""
+        self.count_all_variants_from_logs(output_directory, [(source_assembly, taxonomy_list)])
+
+    def count_all_variants_from_logs(self, output_directory, source_assemblies_and_taxonomies):
+        """
+        Read the counts of all the source assemblies and taxonomies of a run from the logs and write them to the
+        tracker in a single statement.
+        """
+        counts_collector = CountsCollector(self.tracking_table, self.release_version)
+        with self.instrumentation.span('count_variants_from_logs.read_logs'):
+            for source_assembly, taxonomy_list in source_assemblies_and_taxonomies:
+                for taxonomy in taxonomy_list:
+                    self._collect_counts_from_logs(counts_collector, output_directory, source_assembly, taxonomy)
+        with self.metadata_session.connection() as pg_conn:
+            self.tracker_snapshot.apply(counts_collector.write(pg_conn))
+
+    def _collect_counts_from_logs(self, counts_collector, output_directory, source_assembly, taxonomy):
+        vcf_extractor_log = os.path.join(output_directory, 'logs', f'{source_assembly}_{taxonomy}_vcf_extractor.log')
+        eva_remapping_count = os.path.join(output_directory, 'eva',
+                                           f'{source_assembly}_{taxonomy}_eva_remapped_counts.yml')
+        dbsnp_remapping_count = os.path.join(output_directory, 'dbsnp',
+                                             f'{source_assembly}_{taxonomy}_dbsnp_remapped_counts.yml')
+        eva_ingestion_log = os.path.join(output_directory, 'logs',
+                                         f'{source_assembly}_{taxonomy}_eva_remapped.vcf_ingestion.log')
+        dbsnp_ingestion_log = os.path.join(output_directory, 'logs',
+                                           f'{source_assembly}_{taxonomy}_dbsnp_remapped.vcf_ingestion.log')
+
+        eva_total, eva_written, dbsnp_total, dbsnp_written = count_variants_extracted(vcf_extractor_log)
+        eva_remapping_breakdown = load_remapping_counts(eva_remapping_count)
+        dbsnp_remapping_breakdown = load_remapping_counts(dbsnp_remapping_count)
+        eva_candidate, eva_remapped, eva_unmapped = summarise_remapping_counts(eva_remapping_breakdown)
+        dbsnp_candidate, dbsnp_remapped, dbsnp_unmapped = summarise_remapping_counts(dbsnp_remapping_breakdown)
+        # Use the number of variant read rather than the number of variant ingested to get the total number of variant
+        # when some might have been written in previous execution.
+        eva_ingestion_candidate, eva_ingested, eva_duplicates = count_variants_ingested(eva_ingestion_log)
+        dbsnp_ingestion_candidate, dbsnp_ingested, dbsnp_duplicates = count_variants_ingested(dbsnp_ingestion_log)
+
+        counts_collector.add(
+            source_assembly, taxonomy, 'EVA',
+            nb_variant_extracted=eva_written,
+            nb_variant_remapped=eva_remapped,
+            nb_variant_ingested=eva_ingestion_candidate,
+            remapping_breakdown=eva_remapping_breakdown
+        )
+        counts_collector.add(
+            source_assembly, taxonomy, 'DBSNP',
+            nb_variant_extracted=dbsnp_written,
+            nb_variant_remapped=dbsnp_remapped,
+            nb_variant_ingested=dbsnp_ingestion_candidate,
+            remapping_breakdown=dbsnp_remapping_breakdown
+        )
 
-            self.info(f'For Taxonomy: {taxonomy} and Assembly: {source_assembly} Source: EVA ')
-            self.info(f'Number of variant read:{eva_total}, written:{eva_written}, attempt remapping: {eva_candidate}, '
-                      f'remapped: {eva_remapped}, failed remapped {eva_unmapped}')
-            self.info(f'For Taxonomy: {taxonomy} and Assembly: {source_assembly} Source: DBSNP ')
-            self.info(
-                f'Number of variant read:{dbsnp_total}, written:{dbsnp_written}, attempt remapping: {dbsnp_candidate}, '
-                f'remapped: {dbsnp_remapped}, failed remapped {dbsnp_unmapped}')
+        self.info(f'For Taxonomy: {taxonomy} and Assembly: {source_assembly} Source: EVA ')
+        self.info(f'Number of variant read:{eva_total}, written:{eva_written}, attempt remapping: {eva_candidate}, '
+                  f'remapped: {eva_remapped}, failed remapped {eva_unmapped}')
+        self.info(f'For Taxonomy: {taxonomy} and Assembly: {source_assembly} Source: DBSNP ')
+        self.info(
+            f'Number of variant read:{dbsnp_total}, written:{dbsnp_written}, attempt remapping: {dbsnp_candidate}, '
+            f'remapped: {dbsnp_remapped}, failed remapped {dbsnp_unmapped}')
 
     def update_dbs(self, source_of_assembly):
         """Update all relevant databases to reflect the new assembly."""
@@ -360,33 +550,37 @@ class AssemblyIngestionJob(AppLogger):
             self.warning(f'Processing for the following source assemblies is not yet complete: {incomplete_assemblies_taxonomies}')
             self.warning('Not updating databases.')
             return
-        with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
-            for taxonomy in self.taxonomies:
-                add_to_supported_assemblies(metadata_connection_handle=pg_conn, source_of_assembly=source_of_assembly,
-                                            target_assembly=self.target_assembly, taxonomy_id=taxonomy)
-        self.add_to_metadata()
-        self.add_to_contig_alias()
-        self.add_to_clustered_variant_update()
+        taxonomies = self.taxonomies
+        taxonomies_and_source_assemblies = self.get_taxonomies_and_source_assemblies()
+        # All the metadata updates are applied in a single transaction
+        from eva_assembly_ingestion.metadata_writer import MetadataWriter
+        with self.metadata_session.connection() as pg_conn:
+            metadata_writer = MetadataWriter(pg_conn)
+            with self.instrumentation.span('update_dbs.supported_assemblies'):
+                metadata_writer.add_to_supported_assemblies(source_of_assembly, self.target_assembly, taxonomies)
+            with self.instrumentation.span('update_dbs.metadata'):
+                self.add_to_metadata(metadata_writer, taxonomies)
+            with self.instrumentation.span('update_dbs.clustered_variant_update'):
+                self.add_to_clustered_variant_update(metadata_writer, taxonomies_and_source_assemblies)
+        with self.instrumentation.span('update_dbs.contig_alias'):
+            self.add_to_contig_alias()
         self.info('Metadata database updates complete.')
 
-    def add_to_metadata(self):
-        with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
-            for taxonomy in self.taxonomies:
-                insert_new_assembly_and_taxonomy(pg_conn, self.target_assembly, taxonomy)
+    def add_to_metadata(self, metadata_writer, taxonomies):
+        metadata_writer.insert_new_assemblies_and_taxonomies([(self.target_assembly, taxonomy)
+                                                              for taxonomy in taxonomies])
 
     def add_to_contig_alias(self):
+        from ebi_eva_common_pyutils.contig_alias.contig_alias import ContigAliasClient
+        from ebi_eva_internal_pyutils.config_utils import get_contig_alias_db_creds_for_profile
         contig_alias_url, contig_alias_user, contig_alias_pass = get_contig_alias_db_creds_for_profile(
             self.maven_profile, self.private_settings_file)
         client = ContigAliasClient(contig_alias_url, contig_alias_user, contig_alias_pass)
         client.insert_assembly(self.target_assembly)
 
-    def add_to_clustered_variant_update(self):
-        ingestion_time = datetime.datetime.now()
-        with get_metadata_connection_handle(self.maven_profile, self.private_settings_file) as pg_conn:
-            taxonomy_and_assemblies = set((row[1], row[3]) for row in self.get_job_information_from_tracker())
-            for taxonomy, source_assembly in taxonomy_and_assemblies:
-                execute_query(pg_conn, (
-                    f"INSERT INTO evapro.clustered_variant_update "
-                    f"(taxonomy_id, assembly_accession, source, ingestion_time) "
-                    f"VALUES ({taxonomy}, '{self.target_assembly}', '{source_assembly}', '{ingestion_time}')"
-                ))
+    def get_taxonomies_and_source_assemblies(self):
+        return sorted(set((row[1], row[3]) for row in self.get_job_information_from_tracker()))
+
+    def add_to_clustered_variant_update(self, metadata_writer, taxonomies_and_source_assemblies):
+        metadata_writer.add_to_clustered_variant_update(self.target_assembly, taxonomies_and_source_assemblies,
+                                                        ingestion_time=datetime.datetime.now())
@@ -0,0 +1,166 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import sys
+from collections.abc import Mapping
+from csv import reader, excel_tab, DictWriter
+
+SEQUENCE_NAME = '# Sequence-Name'
+GENBANK_ACCESSION = 'GenBank-Accn'
+REFSEQ_ACCESSION = 'RefSeq-Accn'
+SEQUENCE_LENGTH = 'Sequence-Length'
+
+
+class AssemblyReportRow(Mapping):
+    """
+    Read-only dict-like view of one row of an AssemblyReport. Like DictReader, values missing at the end of a short row
+    are None and values beyond the headers are listed under the key None.
+    """
+    __slots__ = ('_report', '_index')
+
+    def __init__(self, report, index):
+        self._report = report
+        self._index = index
+
+    def __getitem__(self, key):
+        column = self._report.columns.get(key)
+        if column is None:
+            if key is None and self._index in self._report.extra_fields:
+                return self._report.extra_fields[self._index]
+            raise KeyError(key)
+        return column[self._index]
+
+    def __iter__(self):
+        yield from self._report.headers
+        if self._index in self._report.extra_fields:
+            yield None
+
+    def __len__(self):
+        return len(self._report.headers) + (1 if self._index in self._report.extra_fields else 0)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class AssemblyReport:
+    """
+    Column oriented representation of an NCBI assembly report.
+    Each column is stored as a list of interned strings and rows are provided as lightweight dict-like views so that
+    reports with millions of sequences stay small in memory. Rows added to a custom assembly are kept separately as
+    dicts. Lookups by GenBank accession, RefSeq accession and sequence name are indexed.
+    """
+    indexed_columns = (SEQUENCE_NAME, GENBANK_ACCESSION, REFSEQ_ACCESSION)
+
+    def __init__(self, headers, columns, nb_rows, extra_fields=None, additional_rows=()):
+        self.headers = headers
+        self.columns = columns
+        self.nb_rows = nb_rows
+        self.extra_fields = extra_fields or {}
+        self.additional_rows = list(additional_rows)
+        self._indexes = {}
+
+    @classmethod
+    def parse(cls, assembly_report_path):
+        """Parse the assembly report, skipping the comments before the header line like DictReader would."""
+        headers = None
+        with open(assembly_report_path) as open_file:
+            # Parse the assembly report file to find the header then stop
+            for line in open_file:
+                if line.lower().startswith("# sequence-name") and "sequence-role" in line.lower():
+                    headers = line.strip().split('\t')
+                    break
+            csv_reader = reader(open_file, dialect=excel_tab)
+            if headers is None:
+                headers = next((row for row in csv_reader if row), [])
+            columns = {header: [] for header in headers}
+            column_lists = [columns[header] for header in headers]
+            nb_columns = len(headers)
+            extra_fields = {}
+            nb_rows = 0
+            intern = sys.intern
+            for row in csv_reader:
+                if not row:
+                    continue
+                for column, value in zip(column_lists, row):
+                    column.append(intern(value))
+                if len(row) < nb_columns:
+                    for column in column_lists[len(row):]:
+                        column.append(None)
+                elif len(row) > nb_columns:
+                    extra_fields[nb_rows] = row[nb_columns:]
+                nb_rows += 1
+        report = cls(headers, columns, nb_rows, extra_fields)
+        for header in cls.indexed_columns:
+            if header in columns:
+                report.index(header)
+        return report
+
+    def extend(self, rows):
+        """Return a new report, sharing the columns of this one, with the additional rows provided as dicts."""
+        return AssemblyReport(self.headers, self.columns, self.nb_rows, self.extra_fields,
+                              self.additional_rows + list(rows))
+
+    def __len__(self):
+        return self.nb_rows + len(self.additional_rows)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('Assembly report row index out of range')
+        if index < self.nb_rows:
+            return AssemblyReportRow(self, index)
+        return self.additional_rows[index - self.nb_rows]
+
+    def __iter__(self):
+        for index in range(self.nb_rows):
+            yield AssemblyReportRow(self, index)
+        yield from self.additional_rows
+
+    def column(self, header):
+        """Return all the values of one column, including the additional rows."""
+        return self.columns[header] + [row.get(header) for row in self.additional_rows]
+
+    def index(self, header):
+        """Return a dict of value to the position of the first row with that value in the column."""
+        if header not in self._indexes:
+            index = {}
+            for position, value in enumerate(self.column(header)):
+                index.setdefault(value, position)
+            self._indexes[header] = index
+        return self._indexes[header]
+
+    def get_row_by(self, header, value):
+        """Return the first row with this value in the column or None."""
+        position = self.index(header).get(value)
+        return None if position is None else self[position]
+
+    @property
+    def genbank_accessions(self):
+        return self.index(GENBANK_ACCESSION)
+
+    @property
+    def refseq_accessions(self):
+        return self.index(REFSEQ_ACCESSION)
+
+    @property
+    def sequence_names(self):
+        return self.index(SEQUENCE_NAME)
+
+    def write(self, output_path):
+        """Stream the rows to a tab separated file with the header line and 'na' for absent values."""
+        with open(output_path, 'w') as open_output:
+            writer = DictWriter(open_output, fieldnames=self.headers, dialect=excel_tab, restval='na')
+            writer.writeheader()
+            for row in self:
+                writer.writerow(row)
@@ -0,0 +1,134 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import gzip
+import struct
+import zlib
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Largest amount of uncompressed data stored in one block, as used by bgzip, so that a block always fits in 64KB
+BGZF_BLOCK_SIZE = 0xff00
+
+# Empty block marking the end of a BGZF file
+BGZF_EOF = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+# Gzip header with the BC extra subfield holding the total size of the block minus 1
+_BGZF_HEADER = struct.Struct('<4BI2BH2BHH')
+
+
+def is_gzipped(file_path):
+    """Check the magic number of the file to find out if it is gzip compressed, which includes BGZF."""
+    with open(file_path, 'rb') as open_file:
+        return open_file.read(2) == GZIP_MAGIC
+
+
+def is_bgzf(file_path):
+    """Check if the file starts with a BGZF block, i.e. a gzip header with the BC extra subfield."""
+    with open(file_path, 'rb') as open_file:
+        header = open_file.read(16)
+    return len(header) == 16 and header[:4] == b'\x1f\x8b\x08\x04' and header[12:14] == b'BC'
+
+
+def open_binary(file_path):
+    """Open a plain or gzip/BGZF compressed file for reading its uncompressed bytes."""
+    if is_gzipped(file_path):
+        return gzip.open(file_path, 'rb')
+    return open(file_path, 'rb')
+
+
+class BgzfWriter:
+    """
+    Write BGZF compressed data to a binary file object opened for writing.
+    The positions of the blocks are recorded so that the .gzi index can be written once the file is closed.
+    """
+
+    def __init__(self, open_file, compression_level=6):
+        self.open_file = open_file
+        self.compression_level = compression_level
+        self.buffer = bytearray()
+        self.compressed_offset = 0
+        self.uncompressed_offset = 0
+        # (compressed, uncompressed) offsets of the start of every block but the first, as stored in a .gzi file
+        self.block_offsets = []
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= BGZF_BLOCK_SIZE:
+            self._write_block(bytes(self.buffer[:BGZF_BLOCK_SIZE]))
+            del self.buffer[:BGZF_BLOCK_SIZE]
+        return len(data)
+
+    def _write_block(self, data):
+        compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, -15)
+        compressed_data = compressor.compress(data) + compressor.flush()
+        block_size = _BGZF_HEADER.size + len(compressed_data) + 8
+        if self.compressed_offset:
+            self.block_offsets.append((self.compressed_offset, self.uncompressed_offset))
+        self.open_file.write(_BGZF_HEADER.pack(0x1f, 0x8b, 8, 4, 0, 0, 0xff, 6, ord('B'), ord('C'), 2,
+                                               block_size - 1))
+        self.open_file.write(compressed_data)
+        self.open_file.write(struct.pack('<II', zlib.crc32(data), len(data)))
+        self.compressed_offset += block_size
+        self.uncompressed_offset += len(data)
+
+    def close(self):
+        """Write the remaining data and the end of file marker. The underlying file is not closed."""
+        if self.closed:
+            return
+        if self.buffer:
+            self._write_block(bytes(self.buffer))
+            self.buffer = bytearray()
+        self.open_file.write(BGZF_EOF)
+        self.closed = True
+
+
+def read_block_offsets(file_path):
+    """
+    Return the (compressed, uncompressed) offsets of the start of every block but the first in a BGZF file, only
+    reading the headers and sizes of the blocks.
+    """
+    block_offsets = []
+    compressed_offset = 0
+    uncompressed_offset = 0
+    with open(file_path, 'rb') as open_file:
+        while True:
+            header = open_file.read(_BGZF_HEADER.size)
+            if not header:
+                break
+            if len(header) < _BGZF_HEADER.size or header[12:14] != b'BC':
+                raise ValueError(f'{file_path} is not a valid BGZF file at offset {compressed_offset}')
+            block_size = _BGZF_HEADER.unpack(header)[-1] + 1
+            open_file.seek(compressed_offset + block_size - 4)
+            block_data_size = struct.unpack('<I', open_file.read(4))[0]
+            if block_data_size and compressed_offset:
+                block_offsets.append((compressed_offset, uncompressed_offset))
+            compressed_offset += block_size
+            uncompressed_offset += block_data_size
+    return block_offsets
+
+
+def write_gzi(block_offsets, gzi_path):
+    """Write the index of the blocks in the format used by bgzip and samtools."""
+    with open(gzi_path, 'wb') as open_file:
+        open_file.write(struct.pack('<Q', len(block_offsets)))
+        for compressed_offset, uncompressed_offset in block_offsets:
+            open_file.write(struct.pack('<QQ', compressed_offset, uncompressed_offset))
@@ -1,6 +1,8 @@
 import os
 
-from ebi_eva_common_pyutils.config import cfg
+# Tasks of an assembly ingestion job, in the order they run. Kept here so that the scripts can list them without
+# importing the job and its dependencies before parsing their arguments.
+ALL_TASKS = ['load_tracker', 'remap_cluster', 'update_dbs']
 
 
 def load_config(*args):
@@ -9,6 +11,7 @@ def load_config(*args):
     If none are provided then read from a file path provided in the environment variable ASSEMBLYCONFIG.
     If not provided then default to .assembly_config.yml place in the current users' home
     """
+    from ebi_eva_common_pyutils.config import cfg
     cfg.load_config_file(
         *args,
         os.getenv('ASSEMBLYCONFIG'),
@@ -0,0 +1,129 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import fcntl
+import hashlib
+import os
+import re
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_assembly_ingestion.file_utils import atomic_write
+
+# Only versioned INSDC/RefSeq accessions are cached since the sequence behind them never changes
+CACHEABLE_ACCESSION = re.compile(r'^[A-Za-z0-9_]+\.\d+$')
+
+
+class ContigSequenceCache(AppLogger):
+    """
+    On-disk cache of the contig sequences downloaded from NCBI, keyed by accession.version.
+    Entries are written atomically with their MD5 checksum, which is checked on every read. When the cache grows
+    above max_size bytes, the least recently used entries are removed. Several processes can use the same cache
+    concurrently: reads and writes rely on atomic renames and eviction is serialised with a lock file.
+    """
+    sequence_suffix = '.fa'
+    checksum_suffix = '.md5'
+
+    def __init__(self, cache_directory, max_size=None):
+        self.cache_directory = cache_directory
+        self.max_size = int(max_size) if max_size else None
+        os.makedirs(cache_directory, exist_ok=True)
+
+    @staticmethod
+    def is_cacheable(accession):
+        return bool(CACHEABLE_ACCESSION.match(accession))
+
+    def _sequence_path(self, accession):
+        return os.path.join(self.cache_directory, accession + self.sequence_suffix)
+
+    def _checksum_path(self, accession):
+        return os.path.join(self.cache_directory, accession + self.checksum_suffix)
+
+    def _remove(self, accession):
+        # Remove the checksum first so that readers never validate a partially removed entry
+        for path in (self._checksum_path(accession), self._sequence_path(accession)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get(self, accession):
+        """Return the fasta record cached for this accession or None if it is absent or corrupted."""
+        if not self.is_cacheable(accession):
+            return None
+        try:
+            with open(self._checksum_path(accession)) as open_file:
+                expected_checksum = open_file.read().strip()
+            with open(self._sequence_path(accession), 'rb') as open_file:
+                content = open_file.read()
+        except FileNotFoundError:
+            return None
+        if hashlib.md5(content).hexdigest() != expected_checksum:
+            self.warning(f'Cached sequence for {accession} does not match its checksum, removing it')
+            self._remove(accession)
+            return None
+        try:
+            # Mark the entry as recently used for the eviction
+            os.utime(self._sequence_path(accession))
+        except FileNotFoundError:
+            pass
+        return content.decode()
+
+    def put(self, accession, sequence):
+        """Store the fasta record for this accession."""
+        if not self.is_cacheable(accession):
+            return
+        content = sequence.encode()
+        atomic_write(self._sequence_path(accession), content)
+        atomic_write(self._checksum_path(accession), hashlib.md5(content).hexdigest().encode())
+
+    def get_many(self, accessions):
+        """Return a dict of accession to fasta record for all the accessions present in the cache."""
+        sequences = {}
+        for accession in accessions:
+            sequence = self.get(accession)
+            if sequence is not None:
+                sequences[accession] = sequence
+        return sequences
+
+    def put_many(self, sequences):
+        for accession, sequence in sequences.items():
+            self.put(accession, sequence)
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.cache_directory) as directory_entries:
+            for entry in directory_entries:
+                if entry.name.endswith(self.sequence_suffix) and not entry.name.startswith('.'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.name[:-len(self.sequence_suffix)]))
+        return entries
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits within max_size."""
+        if not self.max_size:
+            return
+        with open(os.path.join(self.cache_directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = sorted(self._entries())
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, accession in entries:
+                if total_size <= self.max_size:
+                    break
+                self.info(f'Evicting {accession} from the contig cache')
+                self._remove(accession)
+                total_size -= size
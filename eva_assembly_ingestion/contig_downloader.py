@@ -0,0 +1,149 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+EUTILS_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/'
+
+
+class TokenBucket:
+    """Thread safe token bucket that limits the number of requests made per second."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a token is available and consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+def split_fasta_records(fasta_text):
+    """Split a multi-record fasta text into a dict of sequence name to record, removing the empty lines."""
+    records = {}
+    name = None
+    for line in fasta_text.splitlines(keepends=True):
+        if not line.strip():
+            continue
+        if line.startswith('>'):
+            name = line.split()[0][1:]
+            records[name] = []
+        if name is not None:
+            records[name].append(line if line.endswith('\n') else line + '\n')
+    return {name: ''.join(lines) for name, lines in records.items()}
+
+
+class ContigDownloadError(Exception):
+    """Raised when some sequences could not be downloaded, holding the sequences that were."""
+
+    def __init__(self, failed_accessions, sequences):
+        super().__init__(f'Could not download {len(failed_accessions)} sequences from NCBI: {failed_accessions}')
+        self.failed_accessions = failed_accessions
+        self.sequences = sequences
+
+
+class NCBIContigDownloader(AppLogger):
+    """
+    Download sequences from NCBI nuccore with efetch, requesting many accessions per call.
+    Batches are run concurrently within the eutils rate limits and only the batches that failed are retried, one
+    accession per request, so that a bad accession does not prevent the download of the rest of its batch.
+    """
+    eutils_url = EUTILS_URL
+    requests_per_second_with_key = 10
+    requests_per_second_without_key = 3
+
+    def __init__(self, api_key=None, batch_size=50, max_workers=3, max_attempts=4, retry_delay=2):
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        rate = self.requests_per_second_with_key if api_key else self.requests_per_second_without_key
+        self.rate_limiter = TokenBucket(rate)
+
+    def _efetch(self, accessions):
+        parameters = {
+            'db': 'nuccore',
+            'id': ','.join(accessions),
+            'rettype': 'fasta',
+            'retmode': 'text',
+            'tool': 'eva',
+            'email': 'eva-dev@ebi.ac.uk'
+        }
+        if self.api_key:
+            parameters['api_key'] = self.api_key
+        self.rate_limiter.acquire()
+        # Use POST so that the list of accessions is not limited by the URL length
+        request = urllib.request.Request(self.eutils_url + 'efetch.fcgi',
+                                         data=urllib.parse.urlencode(parameters).encode())
+        with urllib.request.urlopen(request, timeout=300) as response:
+            return response.read().decode()
+
+    def _fetch_batch(self, accessions):
+        records = split_fasta_records(self._efetch(accessions))
+        sequences = {}
+        for accession in accessions:
+            if accession in records:
+                sequences[accession] = records[accession]
+            else:
+                # The accession might have been requested without its version
+                matching_names = [name for name in records if name.split('.')[0] == accession]
+                if len(matching_names) != 1:
+                    raise ValueError(f'Sequence {accession} is missing from the efetch response')
+                sequences[accession] = records[matching_names[0]]
+        return sequences
+
+    def download_contigs(self, accessions):
+        """
+        Download the sequences of the accessions and return a dict of accession to fasta record.
+        Raises ContigDownloadError naming the accessions that still failed after the last attempt.
+        """
+        accessions = list(dict.fromkeys(accessions))
+        batches = [accessions[i:i + self.batch_size] for i in range(0, len(accessions), self.batch_size)]
+        sequences = {}
+        for attempt in range(1, self.max_attempts + 1):
+            self.info(f'Downloading {sum(len(batch) for batch in batches)} sequences from NCBI in '
+                      f'{len(batches)} batches (attempt {attempt})')
+            failed_batches = []
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                future_to_batch = {executor.submit(self._fetch_batch, batch): batch for batch in batches}
+                for future in as_completed(future_to_batch):
+                    try:
+                        sequences.update(future.result())
+                    except Exception as e:
+                        self.warning(f'Batch starting with {future_to_batch[future][0]} failed: {e}')
+                        failed_batches.append(future_to_batch[future])
+            if not failed_batches:
+                return sequences
+            batches = [[accession] for batch in failed_batches for accession in batch]
+            if attempt < self.max_attempts:
+                time.sleep(self.retry_delay * attempt)
+        raise ContigDownloadError([accession for batch in batches for accession in batch], sequences)
@@ -0,0 +1,215 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections import namedtuple, defaultdict
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_assembly_ingestion.db_session import fetch_all
+
+# Rough rates used until the tracker holds task profiles of previous runs
+DEFAULT_FIXED_SECONDS = 600
+DEFAULT_SECONDS_PER_VARIANT = 2e-4
+DEFAULT_INGESTION_SECONDS_PER_VARIANT = 1e-4
+DEFAULT_CORE_SECONDS_PER_VARIANT = 3e-4
+
+# Number of variants assumed for a source assembly that was never remapped
+DEFAULT_NB_VARIANTS = 1000000
+
+# Number of tracker rows with a task profile used to fit the cost model
+HISTORY_SIZE = 1000
+
+REPORT_HEADER = ('Source Assembly', 'Taxonomy', 'Variants', 'Expected Hours', 'Core Hours')
+
+SourceAssemblyCost = namedtuple('SourceAssemblyCost', ('source_assembly', 'taxonomy', 'nb_variants', 'variants_known',
+                                                       'wall_seconds', 'ingestion_seconds', 'core_seconds'))
+
+
+class CostModel:
+    """
+    Linear model of the cost of remapping the variants of a source assembly and taxonomy: a fixed time, mostly spent
+    retrieving the source genome, and a time per variant for the extraction, remapping and ingestion. The ingestion
+    time is kept separately since ingestions run one at a time.
+    """
+
+    def __init__(self, fixed_seconds=DEFAULT_FIXED_SECONDS, seconds_per_variant=DEFAULT_SECONDS_PER_VARIANT,
+                 ingestion_seconds_per_variant=DEFAULT_INGESTION_SECONDS_PER_VARIANT,
+                 core_seconds_per_variant=DEFAULT_CORE_SECONDS_PER_VARIANT):
+        self.fixed_seconds = fixed_seconds
+        self.seconds_per_variant = seconds_per_variant
+        self.ingestion_seconds_per_variant = ingestion_seconds_per_variant
+        self.core_seconds_per_variant = core_seconds_per_variant
+
+    @classmethod
+    def from_task_profiles(cls, task_profiles):
+        """
+        Fit the model on (number of variants, task records) of previously remapped source assemblies and taxonomies,
+        as stored by AssemblyIngestionJob.save_task_profile. Returns the default model without any usable profile.
+        """
+        fixed_times = []
+        total_variants = wall_seconds = ingestion_seconds = core_seconds = 0
+        for nb_variants, records in task_profiles:
+            if not nb_variants:
+                continue
+            total_variants += nb_variants
+            for record in records:
+                realtime = (record.get('realtime_ms') or 0) / 1000
+                if record['process'] == 'retrieve_source_genome':
+                    fixed_times.append(realtime)
+                    continue
+                wall_seconds += realtime
+                if record['process'] == 'ingest_vcf_into_mongo':
+                    ingestion_seconds += realtime
+                core_seconds += realtime * (record.get('cpu_percent') or 100) / 100
+        if not total_variants:
+            return cls()
+        return cls(
+            fixed_seconds=sum(fixed_times) / len(fixed_times) if fixed_times else DEFAULT_FIXED_SECONDS,
+            seconds_per_variant=wall_seconds / total_variants,
+            ingestion_seconds_per_variant=ingestion_seconds / total_variants,
+            core_seconds_per_variant=core_seconds / total_variants
+        )
+
+    def estimate(self, source_assembly, taxonomy, nb_variants, variants_known=True):
+        return SourceAssemblyCost(
+            source_assembly, taxonomy, nb_variants, variants_known,
+            wall_seconds=self.fixed_seconds + nb_variants * self.seconds_per_variant,
+            ingestion_seconds=nb_variants * self.ingestion_seconds_per_variant,
+            core_seconds=self.fixed_seconds + nb_variants * self.core_seconds_per_variant
+        )
+
+
+class RemappingPlan:
+    """Estimated costs of the source assemblies and taxonomies of a run, longest first."""
+
+    def __init__(self, costs):
+        total_per_source_assembly = defaultdict(float)
+        for cost in costs:
+            total_per_source_assembly[cost.source_assembly] += cost.wall_seconds
+        # Sorting is stable so equal costs keep their original order
+        self.costs = sorted(costs, key=lambda cost: (-total_per_source_assembly[cost.source_assembly],
+                                                     -cost.wall_seconds))
+
+    @property
+    def source_assemblies_and_taxonomies(self):
+        """The source assemblies and their taxonomies, starting with the most expensive."""
+        taxonomies_per_source_assembly = {}
+        for cost in self.costs:
+            taxonomies_per_source_assembly.setdefault(cost.source_assembly, []).append(cost.taxonomy)
+        return list(taxonomies_per_source_assembly.items())
+
+    @property
+    def critical_path_seconds(self):
+        """
+        The source assemblies are remapped in parallel but ingested one at a time, so the run lasts at least as long
+        as the most expensive source assembly and as all the ingestions together.
+        """
+        if not self.costs:
+            return 0
+        return max(max(cost.wall_seconds for cost in self.costs), sum(cost.ingestion_seconds for cost in self.costs))
+
+    @property
+    def total_core_hours(self):
+        return sum(cost.core_seconds for cost in self.costs) / 3600
+
+    def report_lines(self):
+        """The lines of a table of the estimated costs, laid out like pretty_print, and of the expected totals."""
+        rows = [
+            (cost.source_assembly, cost.taxonomy, cost.nb_variants if cost.variants_known else f'~{cost.nb_variants}',
+             round(cost.wall_seconds / 3600, 2), round(cost.core_seconds / 3600, 2))
+            for cost in self.costs
+        ]
+        cell_widths = [max([len(header)] + [len(str(row[i])) for row in rows])
+                       for i, header in enumerate(REPORT_HEADER)]
+        format_string = '| ' + ' | '.join('{%s:>%s}' % (i, width) for i, width in enumerate(cell_widths)) + ' |'
+        return [format_string.format(*row) for row in [REPORT_HEADER] + rows] + [
+            f'Expected critical path: {self.critical_path_seconds / 3600:.2f} hours, '
+            f'total: {self.total_core_hours:.2f} core hours'
+        ]
+
+    def report(self):
+        print('\n'.join(self.report_lines()))
+
+
+class CostPlanner(AppLogger):
+    """
+    Estimate the cost of remapping source assemblies and taxonomies from the number of submitted variants extracted the
+    last time they were remapped and the task profiles of previous runs, both taken from the tracker.
+    """
+
+    def __init__(self, metadata_session, tracking_table, target_assembly):
+        self.metadata_session = metadata_session
+        self.tracking_table = tracking_table
+        self.target_assembly = target_assembly
+
+    def load_variant_counts(self, source_assemblies, taxonomies):
+        """
+        Return the number of submitted variants of each (source assembly, taxonomy, source) from the last time it was
+        remapped, or from the number of submitted variants recorded when it is not the default of 1.
+        """
+        query = (
+            f"SELECT DISTINCT ON (origin_assembly_accession, taxonomy, source) "
+            f"origin_assembly_accession, taxonomy, source, COALESCE(num_ss_extracted, NULLIF(num_ss_ids, 1)) "
+            f"FROM {self.tracking_table} "
+            f"WHERE origin_assembly_accession = ANY(%s) AND taxonomy = ANY(%s) "
+            f"AND COALESCE(num_ss_extracted, NULLIF(num_ss_ids, 1)) IS NOT NULL "
+            f"ORDER BY origin_assembly_accession, taxonomy, source, release_version DESC"
+        )
+        with self.metadata_session.connection() as pg_conn:
+            rows = fetch_all(pg_conn, query, (list(source_assemblies), list(taxonomies)))
+        return {(source_assembly, taxonomy, source): nb_variants
+                for source_assembly, taxonomy, source, nb_variants in rows}
+
+    def load_cost_model(self):
+        query = (
+            f"SELECT origin_assembly_accession, taxonomy, release_version, sum(num_ss_extracted), "
+            f"(array_agg(task_profile))[1] FROM {self.tracking_table} "
+            f"WHERE task_profile IS NOT NULL AND num_ss_extracted IS NOT NULL "
+            f"GROUP BY origin_assembly_accession, taxonomy, release_version "
+            f"ORDER BY release_version DESC LIMIT %s"
+        )
+        try:
+            with self.metadata_session.connection() as pg_conn:
+                rows = fetch_all(pg_conn, query, (HISTORY_SIZE,))
+        except Exception as e:
+            # The task profiles only refine the estimates, for instance when the task_profile column is missing
+            self.warning(f'Could not load the task profiles of previous runs, using the default cost model: {e!r}')
+            return CostModel()
+        # Each task profile covers all the sources of a source assembly and taxonomy
+        cost_model = CostModel.from_task_profiles((nb_variants, records) for _, _, _, nb_variants, records in rows)
+        self.debug(f'Cost model fitted on {len(rows)} task profiles: {vars(cost_model)}')
+        return cost_model
+
+    def plan(self, source_assemblies_and_taxonomies):
+        """Estimate the cost of each source assembly and taxonomy and return them in a RemappingPlan."""
+        source_assemblies = [source_assembly for source_assembly, _ in source_assemblies_and_taxonomies]
+        taxonomies = sorted(set(taxonomy for _, taxonomy_list in source_assemblies_and_taxonomies
+                                for taxonomy in taxonomy_list))
+        variant_counts = defaultdict(int)
+        previous_variant_counts = self.load_variant_counts(source_assemblies, taxonomies)
+        for (source_assembly, taxonomy, _), nb_variants in previous_variant_counts.items():
+            variant_counts[(source_assembly, taxonomy)] += nb_variants
+        cost_model = self.load_cost_model()
+        costs = []
+        for source_assembly, taxonomy_list in source_assemblies_and_taxonomies:
+            for taxonomy in taxonomy_list:
+                if source_assembly == self.target_assembly:
+                    # Variants already on the target assembly are not remapped
+                    costs.append(SourceAssemblyCost(source_assembly, taxonomy, 0, True, 0, 0, 0))
+                elif (source_assembly, taxonomy) in variant_counts:
+                    costs.append(cost_model.estimate(source_assembly, taxonomy,
+                                                     variant_counts[(source_assembly, taxonomy)]))
+                else:
+                    costs.append(cost_model.estimate(source_assembly, taxonomy, DEFAULT_NB_VARIANTS,
+                                                     variants_known=False))
+        return RemappingPlan(costs)
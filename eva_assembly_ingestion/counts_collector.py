@@ -0,0 +1,87 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from ebi_eva_common_pyutils.logger import AppLogger
+from psycopg2.extras import Json, execute_values
+
+from eva_assembly_ingestion.tracker_snapshot import TRACKER_RETURNING_COLUMNS
+
+COUNT_COLUMNS = ('num_ss_extracted', 'num_ss_remapped', 'num_ss_ingested', 'remapping_breakdown')
+COLUMN_TYPES = {'num_ss_extracted': 'bigint', 'num_ss_remapped': 'bigint', 'num_ss_ingested': 'bigint',
+                'remapping_breakdown': 'jsonb'}
+
+
+class CountsCollector(AppLogger):
+    """
+    Gather the counts of every (source assembly, taxonomy, source) of a run and write them to the tracker in one
+    statement. Along with the number of variants extracted, remapped and ingested, the breakdown of the remapping
+    outcomes per flank size is stored in the remapping_breakdown jsonb column. That column is only written when a
+    breakdown was added, so that the tracker tables without it can still be updated with the other counts.
+    Counts left to None do not overwrite the values already in the tracker.
+    """
+
+    def __init__(self, tracking_table, release_version):
+        self.tracking_table = tracking_table
+        self.release_version = release_version
+        self.records = {}
+
+    def add(self, source_assembly, taxonomy, source, nb_variant_extracted=None, nb_variant_remapped=None,
+            nb_variant_ingested=None, remapping_breakdown=None):
+        record = self.records.setdefault((source_assembly, taxonomy, source), dict.fromkeys(COUNT_COLUMNS))
+        for column, value in zip(COUNT_COLUMNS, (nb_variant_extracted, nb_variant_remapped, nb_variant_ingested,
+                                                 remapping_breakdown)):
+            if value is not None:
+                record[column] = value
+
+    def __len__(self):
+        return len(self.records)
+
+    def _columns(self):
+        if any(record['remapping_breakdown'] is not None for record in self.records.values()):
+            return COUNT_COLUMNS
+        return tuple(column for column in COUNT_COLUMNS if column != 'remapping_breakdown')
+
+    def _rows(self, columns):
+        for (source_assembly, taxonomy, source), record in self.records.items():
+            yield (self.release_version, source_assembly, taxonomy, source) + tuple(
+                Json(record[column]) if column == 'remapping_breakdown' and record[column] is not None
+                else record[column]
+                for column in columns
+            )
+
+    def write(self, pg_conn):
+        """
+        Update the tracker rows of all the records in the current transaction of pg_conn. Only the rows that exist are
+        updated. Returns the rows updated with the columns of TRACKER_RETURNING_COLUMNS.
+        """
+        columns = self._columns()
+        rows = list(self._rows(columns))
+        if not rows:
+            return []
+        set_statements = ', '.join(f'{column}=COALESCE(new.{column}, tracker.{column})' for column in columns)
+        query = (
+            f"UPDATE {self.tracking_table} AS tracker SET {set_statements} "
+            f"FROM (VALUES %s) AS new(release_version, origin_assembly_accession, taxonomy, source, "
+            f"{', '.join(columns)}) "
+            f"WHERE tracker.release_version=new.release_version "
+            f"AND tracker.origin_assembly_accession=new.origin_assembly_accession "
+            f"AND tracker.taxonomy=new.taxonomy AND tracker.source=new.source "
+            f"RETURNING {TRACKER_RETURNING_COLUMNS}"
+        )
+        template = '(%s, %s, %s, %s, ' + ', '.join(f'%s::{COLUMN_TYPES[column]}' for column in columns) + ')'
+        with pg_conn.cursor() as cursor:
+            updated_rows = execute_values(cursor, query, rows, page_size=len(rows), fetch=True, template=template)
+        if len(updated_rows) < len(rows):
+            self.warning(f'Only {len(updated_rows)} of the {len(rows)} counts records matched a row of '
+                         f'{self.tracking_table}')
+        return updated_rows
@@ -11,20 +11,64 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import fcntl
+import hashlib
+import json
 import os
 import re
-import shutil
-import urllib
-from copy import copy
-from csv import DictReader, excel_tab, DictWriter
+from contextlib import contextmanager
 from typing import List, Dict
 
 from cached_property import cached_property
 from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.logger import AppLogger
-from ebi_eva_internal_pyutils.metadata_utils import get_metadata_connection_handle
-from ebi_eva_internal_pyutils.pg_utils import get_all_results_for_query
-from retry import retry
+
+from eva_assembly_ingestion.assembly_report import AssemblyReport, GENBANK_ACCESSION, REFSEQ_ACCESSION, \
+    SEQUENCE_NAME, SEQUENCE_LENGTH
+from eva_assembly_ingestion.bgzf import BgzfWriter, is_bgzf, is_gzipped, open_binary, read_block_offsets, \
+    write_gzi
+from eva_assembly_ingestion.config import load_config
+from eva_assembly_ingestion.contig_cache import ContigSequenceCache
+from eva_assembly_ingestion.contig_downloader import ContigDownloadError, NCBIContigDownloader
+from eva_assembly_ingestion.db_session import get_metadata_connection_handle, fetch_all
+from eva_assembly_ingestion.fasta_utils import contains_carriage_return, rewrite_fasta_headers, FastaHeaderIndex, \
+    clone_or_copy_file, write_all, rewrite_fasta_headers_stream, FastaIndexingWriter, write_fai, \
+    find_header_offsets
+from eva_assembly_ingestion.file_utils import atomic_output, atomic_write
+from eva_assembly_ingestion.sequence_digests import compute_sequence_digests, write_sequence_digests
+
+# Increase when the content of the custom assemblies changes so that the existing ones are not reused
+CUSTOM_ASSEMBLY_FORMAT_VERSION = 1
+
+
+def _tool_version():
+    # importlib.metadata is slow to import and only needed when a build manifest is written
+    import importlib.metadata
+    try:
+        return importlib.metadata.version('eva_assembly_ingestion')
+    except importlib.metadata.PackageNotFoundError:
+        version_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'VERSION')
+        if os.path.isfile(version_file):
+            with open(version_file) as open_file:
+                return open_file.read().strip()
+        return 'unknown'
+
+
+def _custom_path(file_path, compressed=False):
+    """Add _custom before the extension, keeping the .gz of compressed files last."""
+    if file_path.endswith('.gz'):
+        file_path = file_path[:-len('.gz')]
+        compressed = True
+    base, ext = os.path.splitext(file_path)
+    return base + '_custom' + ext + ('.gz' if compressed else '')
+
+
+def _file_sha256(file_path, buffer_size=8 * 1024 * 1024):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as open_file:
+        for chunk in iter(lambda: open_file.read(buffer_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
 
 
 class CustomAssembly(AppLogger):
@@ -33,10 +77,21 @@ class CustomAssembly(AppLogger):
     It adds additional contigs provided by the required_contigs function after checking that they are not already in
     the assembly.
     It also renames all the sequence to INSDC accession.
+    The assembly fasta can be plain or gzip/BGZF compressed. The custom fasta is BGZF compressed, with its .fai and
+    .gzi indexes, when the assembly fasta is compressed or when bgzip_output is set.
     """
     def __init__(self, assembly_accession, assembly_fasta_path, assembly_report_path, no_rename=False,
-                 eutils_api_key=None):
+                 eutils_api_key=None, incremental=False, bgzip_output=False):
         self.assembly_accession = assembly_accession
+        self.incremental = incremental
+        self.bgzip_output = bgzip_output
+        # In incremental mode the custom assembly is built next to the original genome files so that it can be reused
+        # and links to it are created next to the provided paths
+        self.link_fasta_path = assembly_fasta_path
+        self.link_report_path = assembly_report_path
+        if incremental:
+            assembly_fasta_path = os.path.realpath(assembly_fasta_path)
+            assembly_report_path = os.path.realpath(assembly_report_path)
         self.assembly_fasta_path = assembly_fasta_path
         self.assembly_report_path = assembly_report_path
         self.no_rename = no_rename
@@ -45,13 +100,35 @@ class CustomAssembly(AppLogger):
 
     @property
     def output_assembly_report_path(self):
-        base, ext = os.path.splitext(self.assembly_report_path)
-        return base + '_custom' + ext
+        return _custom_path(self.assembly_report_path)
+
+    @cached_property
+    def input_compressed(self):
+        return os.path.isfile(self.assembly_fasta_path) and is_gzipped(self.assembly_fasta_path)
+
+    @property
+    def output_compressed(self):
+        return self.bgzip_output or self.input_compressed
 
     @property
     def output_assembly_fasta_path(self):
-        base, ext = os.path.splitext(self.assembly_fasta_path)
-        return base + '_custom' + ext
+        return _custom_path(self.assembly_fasta_path, self.output_compressed)
+
+    @property
+    def output_index_paths(self):
+        """The .fai and .gzi indexes written next to a compressed custom fasta."""
+        if self.output_compressed:
+            return [self.output_assembly_fasta_path + '.fai', self.output_assembly_fasta_path + '.gzi']
+        return []
+
+    @property
+    def output_digests_path(self):
+        """Length, MD5 and sha512t24u of every sequence of the custom fasta, written once it has been validated."""
+        return self.output_assembly_fasta_path + '.digests.tsv'
+
+    @property
+    def build_manifest_path(self):
+        return self.output_assembly_fasta_path + '.manifest.json'
 
     @property
     def assembly_directory(self):
@@ -68,16 +145,9 @@ class CustomAssembly(AppLogger):
 
     @staticmethod
     def _get_assembly_report(assembly_report):
-        """Parse the assembly report and return each row as a dict."""
-        headers = None
-        with open(assembly_report) as open_file:
-            # Parse the assembly report file to find the header then stop
-            for line in open_file:
-                if line.lower().startswith("# sequence-name") and "sequence-role" in line.lower():
-                    headers = line.strip().split('\t')
-                    break
-            reader = DictReader(open_file, fieldnames=headers, dialect=excel_tab)
-            return headers, [record for record in reader]
+        """Parse the assembly report and return the headers and the AssemblyReport providing each row as a dict."""
+        report = AssemblyReport.parse(assembly_report)
+        return report.headers, report
 
     @cached_property
     def assembly_report_rows(self):
@@ -88,9 +158,9 @@ class CustomAssembly(AppLogger):
 
     @cached_property
     def extended_report_rows(self):
-        """Provide the list of assembly report rows extended with additional ones if there are any."""
+        """Provide the assembly report rows extended with additional ones if there are any."""
         if self.genbank_contig_to_add:
-            extended_report_rows = copy(self.assembly_report_rows)
+            additional_rows = []
             for contig_dict in self.genbank_contig_to_add:
                 row = {
                     "# Sequence-Name": contig_dict['genbank'],
@@ -101,28 +171,37 @@ class CustomAssembly(AppLogger):
                 if 'refseq' in contig_dict:
                     row['RefSeq-Accn'] = contig_dict['refseq']
                     row['Relationship'] = '='
-                extended_report_rows.append(row)
+                additional_rows.append(row)
+            extended_report_rows = self.assembly_report_rows.extend(additional_rows)
         else:
             extended_report_rows = self.assembly_report_rows
         return extended_report_rows
 
     @cached_property
     def genbank_contig_to_add(self):
-        genbank_contigs = set(row['GenBank-Accn'] for row in self.assembly_report_rows)
+        genbank_contigs = self.assembly_report_rows.genbank_accessions
         return [contig_dict for contig_dict in self.required_contigs if contig_dict['genbank'] not in genbank_contigs]
 
     @staticmethod
     def _get_contig_accessions_in_fasta(fasta_path):
         written_contigs = []
-        match = re.compile(r'>(.*?)\s')
+        match = re.compile(rb'>(.*?)\s')
         if os.path.isfile(fasta_path):
-            with open(fasta_path, 'r') as file:
+            with open_binary(fasta_path) as file:
                 for line in file:
-                    written_contigs.extend(match.findall(line))
+                    written_contigs.extend(name.decode() for name in match.findall(line))
         return written_contigs
 
     @staticmethod
-    def rewrite_changing_names(input_fasta, output_fasta, contig_to_rename):
+    def rewrite_changing_names(input_fasta, output_fasta, contig_to_rename, block_copy=True, header_offsets=None):
+        """
+        Write a copy of the input fasta where the sequences in contig_to_rename are renamed.
+        By default, only the header lines are read in Python and the sequences are copied in bulk by the kernel.
+        Files with carriage returns, or block_copy=False, are rewritten line by line.
+        """
+        if block_copy and not contains_carriage_return(input_fasta):
+            rewrite_fasta_headers(input_fasta, output_fasta, contig_to_rename, header_offsets)
+            return
         with open(input_fasta) as open_input, open(output_fasta, 'w') as open_output:
             for line in open_input:
                 if line.startswith('>'):
@@ -131,20 +210,27 @@ class CustomAssembly(AppLogger):
                         line = '>' + contig_to_rename[contig_name] + '\n'
                 open_output.write(line)
 
+    @cached_property
+    def fasta_index(self):
+        """Index of the sequences in the assembly fasta, loaded from next to the fasta when it is up to date."""
+        return FastaHeaderIndex.load_or_build(self.assembly_fasta_path)
+
     @cached_property
     def contig_names_in_fasta(self):
-        return self._get_contig_accessions_in_fasta(self.assembly_fasta_path)
+        return self.fasta_index.names
 
     @cached_property
     def contig_to_rename(self):
         rename_map = {}
         genbank_contigs = set()
         map_to_genbank = {}
-        for row in self.assembly_report_rows:
-            if row['GenBank-Accn'] != 'na' and row['Relationship'] != '<>':
-                genbank_contigs.add(row['GenBank-Accn'])
-                map_to_genbank[row['RefSeq-Accn']] = row['GenBank-Accn']
-                map_to_genbank[row['# Sequence-Name']] = row['GenBank-Accn']
+        columns = self.assembly_report_rows.columns
+        for genbank_accession, relationship, refseq_accession, sequence_name in zip(
+                columns[GENBANK_ACCESSION], columns['Relationship'], columns[REFSEQ_ACCESSION], columns[SEQUENCE_NAME]):
+            if genbank_accession != 'na' and relationship != '<>':
+                genbank_contigs.add(genbank_accession)
+                map_to_genbank[refseq_accession] = genbank_accession
+                map_to_genbank[sequence_name] = genbank_accession
 
         for name in self.contig_names_in_fasta:
             if name not in genbank_contigs:
@@ -155,63 +241,265 @@ class CustomAssembly(AppLogger):
 
         return rename_map
 
-    @retry(tries=4, delay=2, backoff=1.2, jitter=(1, 3))
-    def download_contig_from_ncbi(self, contig_accession):
-        sequence_tmp_path = os.path.join(self.assembly_directory, contig_accession + '.fa')
-        parameters = {
-            'db': 'nuccore',
-            'id': contig_accession,
-            'rettype': 'fasta',
-            'retmode': 'text',
-            'tool': 'eva',
-            'email': 'eva-dev@ebi.ac.uk'
-        }
-        if self.eutils_api_key:
-            parameters['api_key'] = self.eutils_api_key
-        url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?' + urllib.parse.urlencode(parameters)
-        self.info('Downloading ' + contig_accession)
-        urllib.request.urlretrieve(url, sequence_tmp_path)
-        return sequence_tmp_path
+    @cached_property
+    def contig_cache(self):
+        """Cache of downloaded contigs shared across assemblies and runs, if one is configured."""
+        cache_directory = cfg.query('contig_cache', 'directory')
+        if cache_directory:
+            return ContigSequenceCache(cache_directory, cfg.query('contig_cache', 'max_size'))
+        return None
+
+    def download_contigs_from_ncbi(self, contig_accessions):
+        """
+        Retrieve the contigs from the contig cache or download them in batched efetch requests.
+        Returns a dict of accession to fasta record.
+        """
+        contig_sequences = self.contig_cache.get_many(contig_accessions) if self.contig_cache else {}
+        contigs_to_download = [accession for accession in contig_accessions if accession not in contig_sequences]
+        if contig_sequences:
+            self.info(f'Found {len(contig_sequences)} contigs in the contig cache')
+        if contigs_to_download:
+            try:
+                downloaded_sequences = NCBIContigDownloader(api_key=self.eutils_api_key).download_contigs(
+                    contigs_to_download)
+            except ContigDownloadError as e:
+                # Keep the sequences that were downloaded so that the next run only fetches the failed ones
+                if self.contig_cache:
+                    self.contig_cache.put_many(e.sequences)
+                raise
+            if self.contig_cache:
+                self.contig_cache.put_many(downloaded_sequences)
+            contig_sequences.update(downloaded_sequences)
+        return contig_sequences
 
     def generate_assembly_report(self):
         if self.genbank_contig_to_add:
             self.info(f'Create custom assembly report for {self.assembly_accession}')
-            with open(self.output_assembly_report_path, 'w') as open_output:
-                writer = DictWriter(open_output, fieldnames=self.assembly_report_headers,  dialect=excel_tab, restval='na')
-                writer.writeheader()
-                for row in self.extended_report_rows:
-                    writer.writerow(row)
+            self.extended_report_rows.write(self.output_assembly_report_path)
         else:
             os.symlink(self.assembly_report_path, self.output_assembly_report_path)
 
     def generate_fasta(self):
         """
-        Check if custom contig needs to be added to the assembly. If yes then copy the fasta file and append the new
-        contigs otherwise create a symlink to the normal assembly.
+        Check if custom contig needs to be added to the assembly or if contigs need to be renamed. If yes then write the
+        custom fasta in one pass, copying or rewriting the assembly then appending the new contigs, otherwise create a
+        symlink to the normal assembly. The custom fasta is written to a temporary file that is only moved to its final
+        path once complete. Compressed custom fasta are streamed to BGZF and indexed as they are written.
         """
         # Find out what are the contigs that needs to be appended to the assembly
-        contig_to_append = []
-        for contig_dict in self.genbank_contig_to_add:
-            if contig_dict['genbank'] not in self.contig_names_in_fasta:
-                contig_to_append.append(self.download_contig_from_ncbi(contig_dict['genbank']))
+        contig_to_append = [contig_dict['genbank'] for contig_dict in self.genbank_contig_to_add
+                            if contig_dict['genbank'] not in self.contig_names_in_fasta]
+        contig_sequences = self.download_contigs_from_ncbi(contig_to_append) if contig_to_append else {}
+        rename = not self.no_rename and self.contig_to_rename
+        # Plain gzip or uncompressed assemblies need to be recompressed when the output is BGZF
+        recompress = self.output_compressed and not is_bgzf(self.assembly_fasta_path)
 
-        if contig_to_append or self.contig_to_rename:
+        if self.output_compressed and (contig_to_append or rename or recompress):
+            self.info(f'Create compressed custom assembly fasta for {self.assembly_accession}')
+            self._write_bgzf_fasta(rename, contig_to_append, contig_sequences)
+        elif contig_to_append or rename:
             self.info(f'Create custom assembly fasta for {self.assembly_accession}')
-            if self.contig_to_rename and not self.no_rename:
-                self.rewrite_changing_names(self.assembly_fasta_path, self.output_assembly_fasta_path, self.contig_to_rename)
-            else:
-                shutil.copy(self.assembly_fasta_path, self.output_assembly_fasta_path, follow_symlinks=True)
-            if contig_to_append:
-                with open(self.output_assembly_fasta_path, 'a+') as fasta:
-                    for contig_path in contig_to_append:
-                        with open(contig_path) as sequence:
-                            for line in sequence:
-                                # Check that the line is not empty
-                                if line.strip():
-                                    fasta.write(line)
-                        os.remove(contig_path)
+            with atomic_output(self.output_assembly_fasta_path, mode_from=self.assembly_fasta_path) as tmp_fasta_path:
+                if rename:
+                    self.rewrite_changing_names(self.assembly_fasta_path, tmp_fasta_path, self.contig_to_rename,
+                                                header_offsets=self.fasta_index.header_offsets)
+                    open_mode = 'ab'
+                else:
+                    open_mode = 'wb'
+                with open(self.assembly_fasta_path, 'rb') as open_input, open(tmp_fasta_path, open_mode) as open_output:
+                    if not rename:
+                        clone_or_copy_file(open_input.fileno(), open_output.fileno())
+                    contigs = ''.join(contig_sequences[contig] for contig in dict.fromkeys(contig_to_append))
+                    write_all(open_output.fileno(), contigs.encode())
         else:
             os.symlink(self.assembly_fasta_path, self.output_assembly_fasta_path)
+            if self.output_compressed:
+                self._write_fasta_indexes(self.fasta_index.records, read_block_offsets(self.assembly_fasta_path))
+
+    def _write_fasta_indexes(self, fasta_index_records, block_offsets):
+        fai_path, gzi_path = self.output_index_paths
+        with atomic_output(fai_path) as tmp_fai_path:
+            write_fai(fasta_index_records, tmp_fai_path)
+        with atomic_output(gzi_path) as tmp_gzi_path:
+            write_gzi(block_offsets, tmp_gzi_path)
+
+    def _write_bgzf_fasta(self, rename, contig_to_append, contig_sequences):
+        """Stream the assembly, renamed if required, and the appended contigs to a BGZF fasta indexed on the fly."""
+        with atomic_output(self.output_assembly_fasta_path, mode_from=self.assembly_fasta_path) as tmp_fasta_path:
+            with open_binary(self.assembly_fasta_path) as open_input, open(tmp_fasta_path, 'wb') as open_output:
+                bgzf_writer = BgzfWriter(open_output)
+                indexing_writer = FastaIndexingWriter(bgzf_writer)
+                if rename:
+                    rewrite_fasta_headers_stream(open_input, indexing_writer, self.contig_to_rename,
+                                                 self.fasta_index.header_offsets)
+                else:
+                    rewrite_fasta_headers_stream(open_input, indexing_writer, {}, [])
+                contigs = ''.join(contig_sequences[contig] for contig in dict.fromkeys(contig_to_append))
+                indexing_writer.write(contigs.encode())
+                bgzf_writer.close()
+        fasta_index_records = indexing_writer.finish()
+        self._write_fasta_indexes(fasta_index_records, bgzf_writer.block_offsets)
+        # Save the header index as well so that the custom fasta never has to be decompressed to be indexed
+        stat = os.stat(self.output_assembly_fasta_path)
+        FastaHeaderIndex(self.output_assembly_fasta_path, fasta_index_records, stat.st_size, stat.st_mtime_ns).save()
+
+    def validate(self, nb_processes=1):
+        """
+        Check the custom fasta against the custom assembly report: the length of every sequence must match its
+        Sequence-Length and all the contigs added to the report must be in the fasta. The sequences are digested in
+        parallel and the digests are written next to the custom fasta once validated.
+        """
+        if self.output_compressed:
+            header_offsets = FastaHeaderIndex.load_or_build(self.output_assembly_fasta_path).header_offsets
+            block_offsets = read_block_offsets(self.output_assembly_fasta_path)
+        else:
+            header_offsets = find_header_offsets(self.output_assembly_fasta_path)
+            block_offsets = None
+        self.info(f'Validate {len(header_offsets)} sequences of the custom assembly for {self.assembly_accession}')
+        digests = compute_sequence_digests(self.output_assembly_fasta_path, header_offsets, nb_processes,
+                                           block_offsets)
+        report = self.extended_report_rows
+        problems = []
+        for digest in digests:
+            row = report.get_row_by(GENBANK_ACCESSION, digest.name) or \
+                report.get_row_by(REFSEQ_ACCESSION, digest.name) or report.get_row_by(SEQUENCE_NAME, digest.name)
+            expected_length = row.get(SEQUENCE_LENGTH) if row else None
+            if expected_length and expected_length.isdigit() and int(expected_length) != digest.length:
+                problems.append(f'Sequence {digest.name} has {digest.length} bases in the fasta but {expected_length} '
+                                f'in the assembly report')
+        names_in_fasta = set(digest.name for digest in digests)
+        for contig_dict in self.genbank_contig_to_add:
+            if contig_dict['genbank'] not in names_in_fasta:
+                problems.append(f'Sequence {contig_dict["genbank"]} added to the assembly report is missing from the '
+                                f'fasta')
+        for problem in problems:
+            self.error(problem)
+        if problems:
+            raise ValueError(f'Custom assembly for {self.assembly_accession} does not match its assembly report')
+        with atomic_output(self.output_digests_path) as tmp_digests_path:
+            write_sequence_digests(digests, tmp_digests_path)
+        return digests
+
+    @staticmethod
+    def _input_fingerprint(file_path, previous_fingerprint=None):
+        """Describe an input file with its checksum, reusing the previous checksum if the size and mtime match."""
+        stat = os.stat(file_path)
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if previous_fingerprint and all(previous_fingerprint.get(key) == value for key, value in fingerprint.items()):
+            fingerprint['sha256'] = previous_fingerprint.get('sha256')
+        else:
+            fingerprint['sha256'] = _file_sha256(file_path)
+        return fingerprint
+
+    @staticmethod
+    def _output_fingerprint(file_path):
+        if os.path.islink(file_path):
+            return {'symlink': os.readlink(file_path)}
+        stat = os.stat(file_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _build_inputs(self, previous_inputs=None):
+        """Everything the content of the custom assembly depends on."""
+        previous_inputs = previous_inputs or {}
+        return {
+            'format_version': CUSTOM_ASSEMBLY_FORMAT_VERSION,
+            'tool_version': _tool_version(),
+            'assembly_accession': self.assembly_accession,
+            'no_rename': self.no_rename,
+            'fasta': self._input_fingerprint(self.assembly_fasta_path, previous_inputs.get('fasta')),
+            'report': self._input_fingerprint(self.assembly_report_path, previous_inputs.get('report')),
+            'required_contigs': sorted([contig_dict.get('genbank'), contig_dict.get('refseq')]
+                                       for contig_dict in self.required_contigs)
+        }
+
+    def _build_outputs(self):
+        return {
+            'fasta': self._output_fingerprint(self.output_assembly_fasta_path),
+            'report': self._output_fingerprint(self.output_assembly_report_path)
+        }
+
+    def is_up_to_date(self):
+        """Check with the build manifest that the custom fasta and report were built from the same inputs."""
+        try:
+            with open(self.build_manifest_path) as open_file:
+                manifest = json.load(open_file)
+            return (
+                manifest['inputs'] == self._build_inputs(manifest['inputs'])
+                and manifest['outputs'] == self._build_outputs()
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def _remove_outputs(self):
+        # Remove the manifest first so that an interrupted build is never considered up to date
+        for file_path in [self.build_manifest_path, self.output_digests_path, self.output_assembly_fasta_path,
+                          self.output_assembly_report_path] + self.output_index_paths:
+            if os.path.lexists(file_path):
+                os.remove(file_path)
+
+    def _link_outputs(self):
+        link_fasta_path = _custom_path(self.link_fasta_path, self.output_compressed)
+        output_and_link_paths = [(self.output_assembly_fasta_path, link_fasta_path),
+                                 (self.output_assembly_report_path, _custom_path(self.link_report_path))]
+        for index_path in self.output_index_paths:
+            output_and_link_paths.append((index_path, link_fasta_path + index_path[-len('.fai'):]))
+        if os.path.exists(self.output_digests_path):
+            output_and_link_paths.append((self.output_digests_path, link_fasta_path + '.digests.tsv'))
+        for output_path, link_path in output_and_link_paths:
+            if os.path.abspath(link_path) == output_path:
+                continue
+            # The link is replaced atomically so that it always points to a file while other runs read it
+            tmp_link_path = f'{link_path}.{os.getpid()}.tmp'
+            if os.path.lexists(tmp_link_path):
+                os.remove(tmp_link_path)
+            os.symlink(output_path, tmp_link_path)
+            os.replace(tmp_link_path, link_path)
+
+    @contextmanager
+    def _build_lock(self):
+        """Serialise the builds of the custom assembly across processes, which share the genome directory."""
+        with open(self.output_assembly_fasta_path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def generate(self, force=False, validate=False, nb_processes=1):
+        """
+        Generate the custom assembly report and fasta, unless the build manifest written next to them shows that they
+        were generated from the same assembly files, required contigs and version of this tool.
+        With validate, the custom assembly is also validated with nb_processes processes if it was not already.
+        The build holds an exclusive lock on <custom fasta>.lock, so that concurrent runs sharing the genome directory
+        wait for each other rather than rebuilding the custom assembly while it is used.
+        """
+        with self._build_lock():
+            if not force and self.is_up_to_date():
+                self.info(f'Custom assembly for {self.assembly_accession} is up to date')
+            else:
+                self._remove_outputs()
+                self.generate_assembly_report()
+                self.generate_fasta()
+                manifest = {'inputs': self._build_inputs(), 'outputs': self._build_outputs()}
+                atomic_write(self.build_manifest_path, json.dumps(manifest, indent=2).encode())
+            if validate and not os.path.exists(self.output_digests_path):
+                self.validate(nb_processes)
+            if self.incremental:
+                self._link_outputs()
+
+
+REQUIRED_CONTIGS_QUERY = (
+    "select distinct {columns} from eva_tasks.eva2469_contig_analysis "
+    "where source_table in ('dbsnpSubmittedVariantEntity', 'submittedVariantEntity') "
+    "and assembly_accession = ANY(%s)"
+)
+
+
+def _required_contig_dict(genbank_accession, refseq_accession):
+    return dict([
+        ('genbank', genbank_accession.strip() if genbank_accession else ''),
+        ('refseq', refseq_accession.strip() if refseq_accession else '')
+    ])
 
 
 class CustomAssemblyFromDatabase(CustomAssembly):
@@ -221,10 +509,105 @@ class CustomAssemblyFromDatabase(CustomAssembly):
         """Return list of dict retrieve from the eva_tasks.eva2469_contig_analysis table."""
         self.info('Retrieve required contigs from database')
         with get_metadata_connection_handle(cfg['maven']['environment'], cfg['maven']['settings_file']) as pg_conn:
-            query = ("select distinct contig_accession,refseq_contig_from_equiv_table from eva_tasks.eva2469_contig_analysis "
-                     "where source_table in ('dbsnpSubmittedVariantEntity', 'submittedVariantEntity') "
-                     f"and assembly_accession='{self.assembly_accession}'")
-            return [dict([
-                ('genbank', genbank_accession.strip() if genbank_accession else ''),
-                ('refseq', refseq_accession.strip() if refseq_accession else '')
-            ]) for genbank_accession, refseq_accession in get_all_results_for_query(pg_conn, query)]
+            query = REQUIRED_CONTIGS_QUERY.format(columns='contig_accession,refseq_contig_from_equiv_table')
+            return [_required_contig_dict(genbank_accession, refseq_accession)
+                    for genbank_accession, refseq_accession in fetch_all(pg_conn, query, ([self.assembly_accession],))]
+
+    @staticmethod
+    def required_contigs_for_assemblies(assembly_accessions):
+        """
+        Retrieve the required contigs of several assemblies with a single query.
+        Returns a dict of assembly accession to the list of dict provided by required_contigs.
+        """
+        required_contigs = {assembly_accession: [] for assembly_accession in assembly_accessions}
+        if not required_contigs:
+            return required_contigs
+        with get_metadata_connection_handle(cfg['maven']['environment'], cfg['maven']['settings_file']) as pg_conn:
+            query = REQUIRED_CONTIGS_QUERY.format(
+                columns='assembly_accession,contig_accession,refseq_contig_from_equiv_table'
+            )
+            rows = fetch_all(pg_conn, query, (list(required_contigs),))
+            for assembly_accession, genbank_accession, refseq_accession in rows:
+                required_contigs[assembly_accession].append(_required_contig_dict(genbank_accession, refseq_accession))
+        return required_contigs
+
+
+class CustomAssemblyFromRequiredContigs(CustomAssembly):
+    """Custom assembly for which the required contigs have already been retrieved, for example in bulk."""
+
+    def __init__(self, assembly_accession, assembly_fasta_path, assembly_report_path, required_contigs,
+                 no_rename=False, eutils_api_key=None, incremental=False, bgzip_output=False):
+        super().__init__(assembly_accession, assembly_fasta_path, assembly_report_path, no_rename, eutils_api_key,
+                         incremental, bgzip_output)
+        self._required_contigs = required_contigs
+
+    @cached_property
+    def required_contigs(self):
+        return self._required_contigs
+
+
+def write_required_contigs(assembly_accessions, output_path):
+    """
+    Retrieve the required contigs of all the assemblies with a single query and write them to a json file, so that the
+    custom assemblies can then be generated separately without querying the database each.
+    """
+    required_contigs = CustomAssemblyFromDatabase.required_contigs_for_assemblies(assembly_accessions)
+    atomic_write(output_path, json.dumps(required_contigs, indent=2, sort_keys=True).encode())
+
+
+def read_required_contigs(required_contigs_path, assembly_accession):
+    """Read the required contigs of one assembly from a json file written by write_required_contigs."""
+    with open(required_contigs_path) as open_file:
+        required_contigs = json.load(open_file)
+    if assembly_accession not in required_contigs:
+        raise ValueError(f'{assembly_accession} is missing from the required contigs in {required_contigs_path}')
+    return required_contigs[assembly_accession]
+
+
+def read_custom_assembly_manifest(manifest_path):
+    """Read a tab separated manifest with one assembly accession, fasta path and report path per line."""
+    entries = []
+    with open(manifest_path) as open_file:
+        for line in open_file:
+            if not line.strip() or line.startswith('#'):
+                continue
+            assembly_accession, fasta_path, report_path = line.rstrip('\n').split('\t')
+            entries.append((assembly_accession, fasta_path, report_path))
+    return entries
+
+
+def _generate_custom_assembly(assembly_accession, fasta_path, report_path, required_contigs, no_rename,
+                              eutils_api_key, incremental, bgzip_output, validate, nb_validation_processes):
+    assembly = CustomAssemblyFromRequiredContigs(assembly_accession, fasta_path, report_path, required_contigs,
+                                                 no_rename, eutils_api_key, incremental, bgzip_output)
+    assembly.generate(validate=validate, nb_processes=nb_validation_processes)
+    return assembly.output_assembly_fasta_path, assembly.output_assembly_report_path
+
+
+def generate_custom_assemblies(manifest_entries, no_rename=False, nb_processes=1, incremental=False,
+                               bgzip_output=False, validate=False):
+    """
+    Generate the custom assemblies for all the (assembly accession, fasta path, report path) entries, retrieving the
+    required contigs for all of them at once and processing the assemblies in a pool of processes.
+    Returns a dict of assembly accession to the paths of the custom fasta and report.
+    """
+    required_contigs = CustomAssemblyFromDatabase.required_contigs_for_assemblies(
+        [assembly_accession for assembly_accession, _, _ in manifest_entries]
+    )
+    # multiprocessing is only imported when several custom assemblies are generated in a pool
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    eutils_api_key = cfg.get('eutils_api_key')
+    # Share the processes between the assemblies generated concurrently
+    nb_validation_processes = max(1, nb_processes // max(len(manifest_entries), 1))
+    outputs = {}
+    with ProcessPoolExecutor(max_workers=nb_processes, initializer=load_config,
+                             initargs=(cfg.config_file,)) as executor:
+        future_to_accession = {
+            executor.submit(_generate_custom_assembly, assembly_accession, fasta_path, report_path,
+                            required_contigs[assembly_accession], no_rename, eutils_api_key, incremental,
+                            bgzip_output, validate, nb_validation_processes): assembly_accession
+            for assembly_accession, fasta_path, report_path in manifest_entries
+        }
+        for future in as_completed(future_to_accession):
+            outputs[future_to_accession[future]] = future.result()
+    return outputs
@@ -0,0 +1,222 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_assembly_ingestion.instrumentation import NO_INSTRUMENTATION
+
+# Connections idle for longer are closed rather than reused, since the server or a firewall may have dropped them
+# while the job waited, for instance on Nextflow
+DEFAULT_MAX_IDLE_SECONDS = 60
+
+
+def get_metadata_connection_handle(maven_profile, private_settings_file):
+    """
+    Open a connection to the metadata database, like metadata_utils.get_metadata_connection_handle. psycopg2 and the
+    credentials helpers are only imported here, and metadata_utils not at all since it pulls in the ENA, NCBI and
+    Ensembl clients, so that the scripts not connecting to the database start quickly.
+    """
+    import psycopg2
+    from ebi_eva_internal_pyutils.config_utils import get_metadata_creds_for_profile
+    pg_url, pg_user, pg_pass = get_metadata_creds_for_profile(maven_profile, private_settings_file)
+    return psycopg2.connect(urlsplit(pg_url).path, user=pg_user, password=pg_pass)
+
+
+class RoundTripCountingCursor:
+    """Cursor wrapper counting the statements sent to the server through it."""
+
+    def __init__(self, connection, cursor):
+        self._connection = connection
+        self._cursor = cursor
+
+    def execute(self, query, vars=None):
+        self._connection.round_trips += 1
+        return self._cursor.execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        # psycopg2 sends one statement per set of parameters
+        vars_list = list(vars_list)
+        self._connection.round_trips += len(vars_list)
+        return self._cursor.executemany(query, vars_list)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._cursor.close()
+
+    def __getattr__(self, item):
+        return getattr(self._cursor, item)
+
+
+class RoundTripCountingConnection:
+    """Connection wrapper counting the round trips to the server: statements executed, commits and rollbacks."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.round_trips = 0
+
+    def cursor(self, *args, **kwargs):
+        return RoundTripCountingCursor(self, self._connection.cursor(*args, **kwargs))
+
+    def _in_transaction(self):
+        from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+        # Commit and rollback do not reach the server when no transaction is open
+        return self._connection.get_transaction_status() != TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        if self._in_transaction():
+            self.round_trips += 1
+        self._connection.commit()
+
+    def rollback(self):
+        if self._in_transaction():
+            self.round_trips += 1
+        self._connection.rollback()
+
+    def __enter__(self):
+        self._connection.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._connection.__exit__(exc_type, exc_val, exc_tb)
+
+    def __getattr__(self, item):
+        return getattr(self._connection, item)
+
+
+def fetch_all(pg_conn, query, parameters=None):
+    """Run a parameterized query and return all the resulting rows."""
+    with pg_conn.cursor() as cursor:
+        cursor.execute(query, parameters)
+        return cursor.fetchall()
+
+
+def execute(pg_conn, query, parameters=None):
+    """Run a parameterized statement in the current transaction without committing it."""
+    with pg_conn.cursor() as cursor:
+        cursor.execute(query, parameters)
+        return cursor.rowcount
+
+
+class MetadataSession(AppLogger):
+    """
+    Small pool of connections to the metadata database shared by all the steps of a job, so that connections are
+    opened once per job rather than once per query. Connections are borrowed with connection(), which commits the
+    transaction when the block completes and rolls it back on error. Connections idle for more than max_idle_seconds
+    are closed and replaced by new ones when borrowed. close() closes all the connections and reports the number of
+    round trips each of them served. Transactions are recorded in the db_transaction span of the instrumentation.
+    """
+
+    def __init__(self, maven_profile, private_settings_file, max_connections=2, instrumentation=NO_INSTRUMENTATION,
+                 max_idle_seconds=DEFAULT_MAX_IDLE_SECONDS):
+        self.maven_profile = maven_profile
+        self.private_settings_file = private_settings_file
+        self.max_connections = max_connections
+        self.instrumentation = instrumentation
+        self.max_idle_seconds = max_idle_seconds
+        self._connections = []
+        self._idle_connections = []
+        self._discarded_round_trips = 0
+        self._condition = threading.Condition()
+
+    def _connect(self):
+        return RoundTripCountingConnection(
+            get_metadata_connection_handle(self.maven_profile, self.private_settings_file)
+        )
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                while self._idle_connections:
+                    pg_conn = self._idle_connections.pop()
+                    if not pg_conn.closed and time.monotonic() - pg_conn.idle_since <= self.max_idle_seconds:
+                        return pg_conn
+                    self._discard(pg_conn)
+                if len(self._connections) < self.max_connections:
+                    # Reserve the slot while connecting outside of the lock
+                    self._connections.append(None)
+                    break
+                self._condition.wait()
+        try:
+            pg_conn = self._connect()
+        except BaseException:
+            with self._condition:
+                self._connections.remove(None)
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._connections[self._connections.index(None)] = pg_conn
+        return pg_conn
+
+    def _discard(self, pg_conn):
+        if not pg_conn.closed:
+            self.debug(f'Closing metadata connection idle for {time.monotonic() - pg_conn.idle_since:.0f}s')
+            pg_conn.close()
+        self._discarded_round_trips += pg_conn.round_trips
+        self._connections.remove(pg_conn)
+
+    def _release(self, pg_conn):
+        pg_conn.idle_since = time.monotonic()
+        with self._condition:
+            self._idle_connections.append(pg_conn)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of one transaction."""
+        with self.instrumentation.span('db_transaction'):
+            pg_conn = self._acquire()
+            try:
+                yield pg_conn
+                pg_conn.commit()
+            except BaseException:
+                if not pg_conn.closed:
+                    pg_conn.rollback()
+                raise
+            finally:
+                self._release(pg_conn)
+
+    @property
+    def round_trips(self):
+        return self._discarded_round_trips + sum(pg_conn.round_trips for pg_conn in self._connections
+                                                 if pg_conn is not None)
+
+    def close(self):
+        with self._condition:
+            for i, pg_conn in enumerate(self._connections):
+                if pg_conn is None:
+                    continue
+                self.debug(f'Metadata connection {i + 1} served {pg_conn.round_trips} round trips')
+                if not pg_conn.closed:
+                    pg_conn.close()
+            if self._connections or self._discarded_round_trips:
+                self.info(f'Closed {len(self._connections)} metadata connections after {self.round_trips} round trips')
+                self.instrumentation.count('db_round_trips', self.round_trips)
+            self._connections = []
+            self._idle_connections = []
+            self._discarded_round_trips = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,399 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import errno
+import fcntl
+import mmap
+import os
+from collections import namedtuple
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_assembly_ingestion.bgzf import open_binary
+from eva_assembly_ingestion.file_utils import atomic_output
+
+# Size of the chunks used when the kernel cannot copy the data for us
+COPY_BUFFER_SIZE = 16 * 1024 * 1024
+
+# Size of the chunks read when scanning a fasta file
+SCAN_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Errors raised by copy_file_range/sendfile when the files or the kernel do not support them
+_UNSUPPORTED_COPY_ERRORS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF)
+
+# ioctl request to share the extents of a file with another (reflink) on Linux filesystems that support it
+FICLONE = 0x40049409
+
+
+def _next_header(mapped, position):
+    found = mapped.find(b'\n>', position)
+    if found == -1:
+        return -1
+    return found + 1
+
+
+def find_header_offsets(fasta_path):
+    """
+    Find the header lines of a fasta file without reading the sequences in Python.
+    Returns a list of (header_start, header_end) byte offsets where header_end points after the header's newline.
+    """
+    offsets = []
+    with open(fasta_path, 'rb') as open_file:
+        if os.fstat(open_file.fileno()).st_size == 0:
+            return offsets
+        with mmap.mmap(open_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            position = 0 if mapped[:1] == b'>' else _next_header(mapped, 0)
+            while position != -1:
+                end = mapped.find(b'\n', position)
+                end = len(mapped) if end == -1 else end + 1
+                offsets.append((position, end))
+                if end >= len(mapped):
+                    break
+                position = _next_header(mapped, end - 1)
+    return offsets
+
+
+def contains_carriage_return(file_path):
+    """Check if a file contains any carriage return, which text mode would translate when reading it."""
+    with open(file_path, 'rb') as open_file:
+        if os.fstat(open_file.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(open_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped.find(b'\r') != -1
+
+
+def header_name(header_line):
+    """Return the sequence name from a header line provided as bytes (first word without the '>')."""
+    return header_line.decode().split()[0][1:]
+
+
+def write_all(fd, data):
+    """Write all the bytes to the file descriptor, looping over partial writes."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _copy_with_buffer(src_fd, dst_fd, offset, count):
+    while count > 0:
+        data = os.pread(src_fd, min(count, COPY_BUFFER_SIZE), offset)
+        if not data:
+            raise EOFError(f'Unexpected end of file while copying {count} remaining bytes')
+        write_all(dst_fd, data)
+        offset += len(data)
+        count -= len(data)
+
+
+def copy_byte_range(src_fd, dst_fd, offset, count):
+    """
+    Copy count bytes starting at offset in src_fd to the current position of dst_fd.
+    The copy is done in the kernel with copy_file_range (which can reflink) or sendfile when they are available, and
+    falls back to a buffered copy otherwise.
+    """
+    if count <= 0:
+        return
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while count > 0:
+                copied = os.copy_file_range(src_fd, dst_fd, count, offset)
+                if copied == 0:
+                    raise EOFError(f'Unexpected end of file while copying {count} remaining bytes')
+                offset += copied
+                count -= copied
+            return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_COPY_ERRORS:
+                raise
+    if hasattr(os, 'sendfile'):
+        try:
+            while count > 0:
+                copied = os.sendfile(dst_fd, src_fd, offset, count)
+                if copied == 0:
+                    raise EOFError(f'Unexpected end of file while copying {count} remaining bytes')
+                offset += copied
+                count -= copied
+            return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_COPY_ERRORS:
+                raise
+    _copy_with_buffer(src_fd, dst_fd, offset, count)
+
+
+def clone_or_copy_file(src_fd, dst_fd):
+    """
+    Copy the whole content of src_fd to dst_fd, which must be empty, and leave dst_fd positioned at the end.
+    Try to reflink the file first, then fall back to a kernel side copy.
+    """
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError:
+        copy_byte_range(src_fd, dst_fd, 0, os.fstat(src_fd).st_size)
+    os.lseek(dst_fd, 0, os.SEEK_END)
+
+
+def rewrite_fasta_headers(input_fasta, output_fasta, contig_to_rename, header_offsets=None):
+    """
+    Copy input_fasta to output_fasta, renaming the sequences listed in contig_to_rename.
+    Only the renamed header lines are written from Python, everything between them is copied in bulk by the kernel.
+    header_offsets can be provided if they are already known (see find_header_offsets).
+    """
+    if header_offsets is None:
+        header_offsets = find_header_offsets(input_fasta)
+    with open(input_fasta, 'rb') as open_input, open(output_fasta, 'wb') as open_output:
+        src_fd = open_input.fileno()
+        dst_fd = open_output.fileno()
+        position = 0
+        for start, end in header_offsets:
+            name = header_name(os.pread(src_fd, end - start, start))
+            if name in contig_to_rename:
+                copy_byte_range(src_fd, dst_fd, position, start - position)
+                write_all(dst_fd, ('>' + contig_to_rename[name] + '\n').encode())
+                position = end
+        copy_byte_range(src_fd, dst_fd, position, os.fstat(src_fd).st_size - position)
+
+
+def _copy_stream(open_input, output, count):
+    while count > 0:
+        data = open_input.read(min(count, COPY_BUFFER_SIZE))
+        if not data:
+            raise EOFError(f'Unexpected end of file while copying {count} remaining bytes')
+        output.write(data)
+        count -= len(data)
+
+
+def rewrite_fasta_headers_stream(open_input, output, contig_to_rename, header_offsets):
+    """
+    Stream the fasta read from open_input, a binary file object positioned at the start, to output, renaming the
+    sequences listed in contig_to_rename. The header_offsets refer to the uncompressed data so this also works when
+    reading or writing compressed files.
+    """
+    position = 0
+    for start, end in header_offsets:
+        _copy_stream(open_input, output, start - position)
+        header = open_input.read(end - start)
+        name = header_name(header)
+        if name in contig_to_rename:
+            header = ('>' + contig_to_rename[name] + '\n').encode()
+        output.write(header)
+        position = end
+    for chunk in iter(lambda: open_input.read(COPY_BUFFER_SIZE), b''):
+        output.write(chunk)
+
+
+FastaIndexRecord = namedtuple(
+    'FastaIndexRecord', ['name', 'header_offset', 'sequence_offset', 'length', 'line_bases', 'line_width']
+)
+
+
+class _FastaIndexBuilder:
+    """Accumulate the index records of a fasta file provided as a stream of byte chunks."""
+
+    def __init__(self):
+        self.records = []
+        self.position = 0
+        self.at_line_start = True
+        self.header = None
+        self.header_offset = None
+        self.sequence_offset = None
+        self.name = None
+        self.length = 0
+        self.line_width = None
+        self.first_line_length = 0
+        self.first_line_carriage_returns = 0
+
+    def _start_record(self, sequence_offset):
+        self.sequence_offset = sequence_offset
+        self.name = header_name(self.header)
+        self.header = None
+        self.length = 0
+        self.line_width = None
+        self.first_line_length = 0
+        self.first_line_carriage_returns = 0
+
+    def _finish_record(self):
+        if self.name is None:
+            return
+        if self.line_width is None:
+            # Single unterminated line
+            line_width = self.first_line_length
+            line_bases = line_width - self.first_line_carriage_returns
+        else:
+            line_width = self.line_width
+            line_bases = line_width - 1 - self.first_line_carriage_returns
+        self.records.append(FastaIndexRecord(self.name, self.header_offset, self.sequence_offset, self.length,
+                                             line_bases, line_width))
+        self.name = None
+
+    def _add_sequence(self, segment):
+        self.length += len(segment) - segment.count(b'\n') - segment.count(b'\r')
+        if self.line_width is None:
+            newline = segment.find(b'\n')
+            first_line = segment if newline == -1 else segment[:newline]
+            self.first_line_length += len(first_line)
+            self.first_line_carriage_returns += first_line.count(b'\r')
+            if newline != -1:
+                self.line_width = self.first_line_length + 1
+
+    def add_chunk(self, data):
+        i = 0
+        while i < len(data):
+            if self.header is not None:
+                newline = data.find(b'\n', i)
+                if newline == -1:
+                    self.header += data[i:]
+                    break
+                self.header += data[i:newline + 1]
+                i = newline + 1
+                self._start_record(self.position + i)
+                self.at_line_start = True
+                continue
+            if self.at_line_start and data[i:i + 1] == b'>':
+                self._finish_record()
+                self.header_offset = self.position + i
+                self.header = b''
+                continue
+            next_header = data.find(b'\n>', i)
+            end = len(data) if next_header == -1 else next_header + 1
+            segment = data[i:end]
+            if self.name is not None:
+                self._add_sequence(segment)
+            self.at_line_start = segment.endswith(b'\n')
+            i = end
+        self.position += len(data)
+
+    def finish(self):
+        if self.header is not None:
+            # Header on the last line without any newline
+            self._start_record(self.position)
+        self._finish_record()
+        return self.records
+
+
+class FastaIndexingWriter:
+    """Pass the data written to a binary output through while indexing the fasta sequences it contains."""
+
+    def __init__(self, output):
+        self.output = output
+        self.builder = _FastaIndexBuilder()
+
+    def write(self, data):
+        self.builder.add_chunk(data)
+        return self.output.write(data)
+
+    def finish(self):
+        """Return the FastaIndexRecords of everything written."""
+        return self.builder.finish()
+
+
+def write_fai(records, fai_path):
+    """Write the records in the samtools faidx format, where the offsets are in the uncompressed data."""
+    with open(fai_path, 'w') as open_file:
+        for record in records:
+            open_file.write(f'{record.name}\t{record.length}\t{record.sequence_offset}\t{record.line_bases}\t'
+                            f'{record.line_width}\n')
+
+
+class FastaHeaderIndex(AppLogger):
+    """
+    Index of the sequences in a fasta file, similar to a samtools .fai with the offsets of the header lines added.
+    The index is saved next to the fasta file and reused as long as the size and modification time of the fasta
+    file do not change. For compressed fasta files, the offsets are positions in the uncompressed data.
+    """
+    index_suffix = '.header_index'
+    index_version = 1
+
+    def __init__(self, fasta_path, records, file_size=None, file_mtime_ns=None):
+        self.fasta_path = fasta_path
+        self.records = records
+        self.file_size = file_size
+        self.file_mtime_ns = file_mtime_ns
+        self.records_by_name = {}
+        for record in records:
+            self.records_by_name.setdefault(record.name, record)
+
+    def __contains__(self, name):
+        return name in self.records_by_name
+
+    def __iter__(self):
+        return iter(self.records_by_name)
+
+    def __len__(self):
+        return len(self.records_by_name)
+
+    def __getitem__(self, name):
+        return self.records_by_name[name]
+
+    @property
+    def names(self):
+        return self.records_by_name.keys()
+
+    @property
+    def header_offsets(self):
+        return [(record.header_offset, record.sequence_offset) for record in self.records]
+
+    @staticmethod
+    def index_path_for(fasta_path):
+        # Resolve symlinks so that the index is stored with the genome rather than in the working directory
+        return os.path.realpath(fasta_path) + FastaHeaderIndex.index_suffix
+
+    @classmethod
+    def build(cls, fasta_path):
+        stat = os.stat(fasta_path)
+        builder = _FastaIndexBuilder()
+        with open_binary(fasta_path) as open_file:
+            for chunk in iter(lambda: open_file.read(SCAN_BUFFER_SIZE), b''):
+                builder.add_chunk(chunk)
+        return cls(fasta_path, builder.finish(), stat.st_size, stat.st_mtime_ns)
+
+    @classmethod
+    def load(cls, fasta_path, index_path=None):
+        """Load the index saved for this fasta file. Returns None if there are none or if it is out of date."""
+        index_path = index_path or cls.index_path_for(fasta_path)
+        if not os.path.isfile(index_path):
+            return None
+        stat = os.stat(fasta_path)
+        with open(index_path) as open_file:
+            version, file_size, file_mtime_ns = open_file.readline().lstrip('#').split()
+            if int(version) != cls.index_version or int(file_size) != stat.st_size \
+                    or int(file_mtime_ns) != stat.st_mtime_ns:
+                return None
+            records = []
+            for line in open_file:
+                name, *values = line.rstrip('\n').split('\t')
+                records.append(FastaIndexRecord(name, *(int(value) for value in values)))
+        return cls(fasta_path, records, stat.st_size, stat.st_mtime_ns)
+
+    def save(self, index_path=None):
+        """Write the index atomically so that concurrent readers never see a partial file."""
+        index_path = index_path or self.index_path_for(self.fasta_path)
+        with atomic_output(index_path, mode_from=self.fasta_path) as tmp_index_path:
+            with open(tmp_index_path, 'w') as open_file:
+                open_file.write(f'#{self.index_version}\t{self.file_size}\t{self.file_mtime_ns}\n')
+                for record in self.records:
+                    open_file.write('\t'.join(str(value) for value in record) + '\n')
+
+    @classmethod
+    def load_or_build(cls, fasta_path):
+        """Return the saved index of the fasta file, building and saving it first if needed."""
+        if not os.path.isfile(fasta_path):
+            return cls(fasta_path, [])
+        index = cls.load(fasta_path)
+        if index is None:
+            index = cls.build(fasta_path)
+            index.info(f'Built sequence index for {fasta_path} with {len(index.records)} sequences')
+            try:
+                index.save()
+            except OSError as e:
+                index.warning(f'Could not save the sequence index for {fasta_path}: {e}')
+        return index
@@ -0,0 +1,44 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_output(output_path, mode_from=None):
+    """
+    Provide a temporary path in the directory of output_path which is renamed to output_path only once the block
+    completes, so that output_path is never left half-written. The permissions can be copied from mode_from.
+    """
+    output_directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=output_directory, prefix='.' + os.path.basename(output_path), suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_path
+        with open(tmp_path, 'rb') as open_file:
+            os.fsync(open_file.fileno())
+        if mode_from:
+            os.chmod(tmp_path, os.stat(mode_from).st_mode & 0o777)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def atomic_write(file_path, content):
+    """Write the content to a temporary file in the same directory then rename it to file_path."""
+    with atomic_output(file_path) as tmp_path:
+        with open(tmp_path, 'wb') as open_file:
+            open_file.write(content)
@@ -0,0 +1,149 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import datetime
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ebi_eva_common_pyutils.common_utils import pretty_print
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_assembly_ingestion.assembly_ingestion_job import AssemblyIngestionJob
+
+
+def read_ingestion_jobs(jobs_path):
+    """Read a tab separated file with one taxonomy and target assembly per line."""
+    jobs = []
+    with open(jobs_path) as open_file:
+        for line in open_file:
+            if not line.strip() or line.startswith('#'):
+                continue
+            taxonomy, target_assembly = line.rstrip('\n').split('\t')
+            jobs.append((int(taxonomy), target_assembly))
+    return jobs
+
+
+class IngestionOrchestrator(AppLogger):
+    """
+    Run the AssemblyIngestionJob of several (taxonomy, target assembly) pairs concurrently, with at most
+    max_concurrent_jobs running at the same time. Each job waits on its own Nextflow process, so the jobs run in
+    threads. The ingestion into Mongo stays serialised across jobs through the lock file used by the Nextflow
+    pipeline. A job processes all the taxonomies sharing the current assembly of its taxonomy, so jobs whose taxonomies
+    overlap are rejected before any of them starts. The progress is reported every time a job starts or ends and a
+    summary of all the jobs is returned at the end.
+    """
+
+    def __init__(self, jobs, release_version, source_of_assembly='Ensembl', tasks=None, resume=False,
+                 max_concurrent_jobs=2):
+        taxonomies = [taxonomy for taxonomy, _ in jobs]
+        duplicated_taxonomies = sorted(set(taxonomy for taxonomy in taxonomies if taxonomies.count(taxonomy) > 1))
+        if duplicated_taxonomies:
+            # Jobs for the same taxonomy would share the same processing directory
+            raise ValueError(f'Several jobs provided for taxonomies {duplicated_taxonomies}')
+        self.jobs = list(jobs)
+        self.release_version = release_version
+        self.source_of_assembly = source_of_assembly
+        self.tasks = tasks or AssemblyIngestionJob.all_tasks
+        self.resume = resume
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.statuses = {job: 'Pending' for job in self.jobs}
+        self._lock = threading.Lock()
+
+    def _set_status(self, taxonomy, target_assembly, status):
+        with self._lock:
+            self.statuses[(taxonomy, target_assembly)] = status
+            counts = {s: list(self.statuses.values()).count(s) for s in ('Running', 'Completed', 'Failed')}
+        self.info(f'Job for taxonomy {taxonomy} and target assembly {target_assembly} {status.lower()}: '
+                  f'{counts["Completed"] + counts["Failed"]}/{len(self.jobs)} jobs finished '
+                  f'({counts["Failed"]} failed), {counts["Running"]} running')
+
+    def _run_job(self, taxonomy, target_assembly):
+        summary = {'taxonomy': taxonomy, 'target_assembly': target_assembly, 'status': 'Completed', 'error': None,
+                   'start_time': datetime.datetime.now().isoformat(timespec='seconds')}
+        start = time.perf_counter()
+        self._set_status(taxonomy, target_assembly, 'Running')
+        job = AssemblyIngestionJob(taxonomy, target_assembly, self.release_version)
+        try:
+            job.run_all(tasks=self.tasks, source_of_assembly=self.source_of_assembly, resume=self.resume)
+        except Exception as e:
+            self.error(f'Job for taxonomy {taxonomy} and target assembly {target_assembly} failed: {e!r}')
+            summary['status'] = 'Failed'
+            summary['error'] = repr(e)
+        try:
+            summary['source_assemblies'] = [
+                {'source': source, 'taxonomy': row_taxonomy, 'source_assembly': source_assembly, 'status': status}
+                for source, row_taxonomy, _, source_assembly, _, _, status in job.get_job_information_from_tracker()
+            ]
+        except Exception as e:
+            self.warning(f'Could not retrieve the tracker rows for taxonomy {taxonomy}: {e!r}')
+            summary['source_assemblies'] = []
+        finally:
+            job.close()
+        summary['end_time'] = datetime.datetime.now().isoformat(timespec='seconds')
+        summary['duration_seconds'] = round(time.perf_counter() - start, 1)
+        self._set_status(taxonomy, target_assembly, summary['status'])
+        return summary
+
+    def resolve_taxonomies(self):
+        """Return the taxonomies processed by each job."""
+        taxonomies_per_job = {}
+        for taxonomy, target_assembly in self.jobs:
+            job = AssemblyIngestionJob(taxonomy, target_assembly, self.release_version)
+            try:
+                taxonomies_per_job[(taxonomy, target_assembly)] = set(job.taxonomies)
+            finally:
+                job.close()
+        return taxonomies_per_job
+
+    def check_overlapping_jobs(self):
+        """
+        Raise a ValueError if several jobs process the same taxonomy, since they would load the same tracker rows,
+        remap the same source assemblies and update the databases at the same time.
+        """
+        taxonomies_per_job = self.resolve_taxonomies()
+        overlaps = []
+        for i, job in enumerate(self.jobs):
+            for other_job in self.jobs[i + 1:]:
+                shared_taxonomies = taxonomies_per_job[job] & taxonomies_per_job[other_job]
+                if shared_taxonomies:
+                    overlaps.append(f'{job} and {other_job} share taxonomies {sorted(shared_taxonomies)}')
+        if overlaps:
+            raise ValueError('Several jobs process the same taxonomies: ' + ', '.join(overlaps))
+
+    def run(self):
+        """Run all the jobs and return their summaries in the order of the jobs."""
+        self.check_overlapping_jobs()
+        self.info(f'Running {len(self.jobs)} ingestion jobs, {self.max_concurrent_jobs} at a time')
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_jobs) as executor:
+            futures = [executor.submit(self._run_job, taxonomy, target_assembly)
+                       for taxonomy, target_assembly in self.jobs]
+            summaries = [future.result() for future in futures]
+        self.report(summaries)
+        return summaries
+
+    def report(self, summaries):
+        rows = []
+        for summary in summaries:
+            statuses = [source_assembly['status'] for source_assembly in summary['source_assemblies']]
+            rows.append((summary['taxonomy'], summary['target_assembly'], summary['status'],
+                         f'{statuses.count("Completed")}/{len(statuses)}', summary['duration_seconds'],
+                         summary['error'] or ''))
+        pretty_print(('Taxonomy', 'Target Assembly', 'Status', 'Source Assemblies Completed', 'Duration (s)',
+                      'Error'), rows)
+
+    @staticmethod
+    def write_summary_report(summaries, report_path):
+        with open(report_path, 'w') as open_file:
+            json.dump(summaries, open_file, indent=2)
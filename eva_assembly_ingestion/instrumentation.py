@@ -0,0 +1,173 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import functools
+import json
+import resource
+import sys
+import threading
+import time
+
+from eva_assembly_ingestion.file_utils import atomic_write
+
+METRIC_PREFIX = 'eva_assembly_ingestion'
+
+
+def peak_rss_bytes(who=resource.RUSAGE_SELF):
+    """Peak resident memory of this process, or of its terminated children, in bytes."""
+    max_rss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _NoSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.instrumentation.record(self.name, time.perf_counter() - self.start, failed=exc_type is not None)
+        return False
+
+
+class Instrumentation:
+    """
+    Record the wall time and number of calls of the phases of a job with spans:
+
+        with instrumentation.span('update_dbs'):
+            ...
+
+    The peak resident memory of the process and of its children, like Nextflow, is sampled at the end of each span.
+    The metrics are written to a json file and to a Prometheus textfile, with the labels of the job on every sample.
+    When disabled, span() returns a shared context manager doing nothing and no metrics are recorded.
+    """
+
+    def __init__(self, enabled=True, labels=None):
+        self.enabled = enabled
+        self.labels = dict(labels or {})
+        self.spans = {}
+        self.counters = {}
+        self.peak_rss_bytes = 0
+        self.peak_children_rss_bytes = 0
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name)
+
+    def instrument(self, name, function):
+        """Return function recording each of its calls in the span name."""
+        if not self.enabled:
+            return function
+
+        @functools.wraps(function)
+        def instrumented_function(*args, **kwargs):
+            with self.span(name):
+                return function(*args, **kwargs)
+        return instrumented_function
+
+    def record(self, name, seconds, failed=False):
+        peak_rss = peak_rss_bytes()
+        peak_children_rss = peak_rss_bytes(resource.RUSAGE_CHILDREN)
+        with self._lock:
+            span = self.spans.setdefault(name, {'calls': 0, 'failures': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            span['calls'] += 1
+            span['failures'] += int(failed)
+            span['total_seconds'] += seconds
+            span['max_seconds'] = max(span['max_seconds'], seconds)
+            self.peak_rss_bytes = max(self.peak_rss_bytes, peak_rss)
+            self.peak_children_rss_bytes = max(self.peak_children_rss_bytes, peak_children_rss)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'labels': dict(self.labels),
+                'spans': {name: dict(span) for name, span in self.spans.items()},
+                'counters': dict(self.counters),
+                'peak_rss_bytes': self.peak_rss_bytes,
+                'peak_children_rss_bytes': self.peak_children_rss_bytes,
+            }
+
+    def _prometheus_labels(self, **extra_labels):
+        labels = dict(self.labels, **extra_labels)
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{_escape_label_value(value)}"' for key, value in sorted(labels.items())) + '}'
+
+    def prometheus_text(self):
+        metrics = self.metrics()
+        lines = []
+
+        def add_metric(name, metric_type, help_text, samples):
+            lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name} {metric_type}')
+            for labels, value in samples:
+                lines.append(f'{METRIC_PREFIX}_{name}{labels} {value}')
+
+        spans = sorted(metrics['spans'].items())
+        add_metric('span_seconds_total', 'counter', 'Wall time spent in each span',
+                   [(self._prometheus_labels(span=name), span['total_seconds']) for name, span in spans])
+        add_metric('span_max_seconds', 'gauge', 'Longest call of each span',
+                   [(self._prometheus_labels(span=name), span['max_seconds']) for name, span in spans])
+        add_metric('span_calls_total', 'counter', 'Number of calls of each span',
+                   [(self._prometheus_labels(span=name), span['calls']) for name, span in spans])
+        add_metric('span_failures_total', 'counter', 'Number of calls of each span that raised an error',
+                   [(self._prometheus_labels(span=name), span['failures']) for name, span in spans])
+        for name, value in sorted(metrics['counters'].items()):
+            add_metric(f'{name}_total', 'counter', f'Number of {name.replace("_", " ")}',
+                       [(self._prometheus_labels(), value)])
+        add_metric('peak_rss_bytes', 'gauge', 'Peak resident memory of the job process',
+                   [(self._prometheus_labels(), metrics['peak_rss_bytes'])])
+        add_metric('peak_children_rss_bytes', 'gauge', 'Peak resident memory of the child processes of the job',
+                   [(self._prometheus_labels(), metrics['peak_children_rss_bytes'])])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, json_path, prometheus_path):
+        """Write the metrics to a json file and a Prometheus textfile, replacing them atomically."""
+        if not self.enabled:
+            return
+        atomic_write(json_path, json.dumps(self.metrics(), indent=2, sort_keys=True).encode())
+        atomic_write(prometheus_path, self.prometheus_text().encode())
+
+
+# Shared by everything that is not instrumented
+NO_INSTRUMENTATION = Instrumentation(enabled=False)
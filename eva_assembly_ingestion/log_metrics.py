@@ -0,0 +1,199 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import csv
+import datetime
+import json
+import os
+import re
+from collections import namedtuple
+
+StepMetrics = namedtuple('StepMetrics', ('log_file', 'job', 'job_status', 'step', 'read', 'written', 'skipped',
+                                         'commits', 'start_time', 'end_time', 'duration_seconds'))
+
+# Fields of the exported records, with the throughput derived from the counts and the duration
+EXPORTED_FIELDS = StepMetrics._fields + ('items_per_second',)
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+TIMESTAMP_REGEX = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})')
+JOB_LAUNCHED_REGEX = re.compile(r'Job: \[\w+: \[name=([^\]]+)\]\] launched')
+JOB_COMPLETED_REGEX = re.compile(r'Job: \[\w+: \[name=([^\]]+)\]\] completed .*status: \[(\w+)\]')
+STEP_STARTED_REGEX = re.compile(r'Executing step: \[([^\]]+)\]')
+STEP_EXECUTED_REGEX = re.compile(r'Step: \[([^\]]+)\] executed in ((?:\d+ms|\d+[hms])+)')
+DURATION_REGEX = re.compile(r'(\d+)(ms|h|m|s)')
+# Progress reported by the EVA listeners, the last one of a step holds its final counts
+PROGRESS_REGEX = re.compile(r'(\w+): Items read = (\d+), items written = (\d+)')
+INGESTION_COUNTS_REGEX = re.compile(r'Step (\w+) finished: Items \(remapped ss\) read = (\d+), ss ingested = (\d+), '
+                                    r'ss skipped \(duplicate\) = (\d+)')
+STEP_EXECUTION_REGEX = re.compile(r'StepExecution: id=\d+, version=\d+, name=(\w+), .*readCount=(\d+), .*'
+                                  r'writeCount=(\d+),? readSkipCount=(\d+), writeSkipCount=(\d+), '
+                                  r'processSkipCount=(\d+), commitCount=(\d+)')
+
+DURATION_UNITS = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+
+# Parsing is CPU bound so the logs are spread over a few processes
+DEFAULT_LOG_METRICS_PROCESSES = min(4, os.cpu_count() or 1)
+
+
+def parse_duration(duration):
+    """Parse a Spring Batch duration like 1m2s345ms into seconds."""
+    return sum(int(value) * DURATION_UNITS[unit] for value, unit in DURATION_REGEX.findall(duration))
+
+
+def _parse_timestamp(line):
+    match = TIMESTAMP_REGEX.match(line)
+    return datetime.datetime.strptime(match.group(1), TIMESTAMP_FORMAT) if match else None
+
+
+class _LogParser:
+    """Follow the jobs and steps of one log and build a StepMetrics for every step executed."""
+
+    def __init__(self, log_file):
+        self.log_file = log_file
+        self.job = None
+        self.steps = []
+        self.job_steps = []
+        self.current_step = None
+        self.last_timestamp = None
+
+    def _step(self, step_name):
+        """Return the record of the step in the current job, or start one if the step was not seen yet."""
+        for step in reversed(self.job_steps):
+            if step['step'] == step_name:
+                return step
+        step = {'log_file': self.log_file, 'job': self.job, 'job_status': None, 'step': step_name, 'read': None,
+                'written': None, 'skipped': None, 'commits': None, 'start_time': None, 'end_time': None,
+                'duration_seconds': None}
+        self.job_steps.append(step)
+        return step
+
+    def _end_current_step(self, timestamp):
+        if self.current_step and not self.current_step['end_time']:
+            self.current_step['end_time'] = timestamp
+        self.current_step = None
+
+    def _end_job(self, status, timestamp):
+        self._end_current_step(timestamp)
+        for step in self.job_steps:
+            step['job_status'] = status
+        self.steps.extend(self.job_steps)
+        self.job_steps = []
+        self.job = None
+
+    def parse_line(self, line):
+        timestamp = _parse_timestamp(line) or self.last_timestamp
+        self.last_timestamp = timestamp
+        if 'Job: [' in line:
+            match = JOB_LAUNCHED_REGEX.search(line)
+            if match:
+                self.job = match.group(1)
+                return
+            match = JOB_COMPLETED_REGEX.search(line)
+            if match:
+                self.job = self.job or match.group(1)
+                self._end_job(match.group(2), timestamp)
+            return
+        match = STEP_STARTED_REGEX.search(line)
+        if match:
+            self._end_current_step(timestamp)
+            self.current_step = self._step(match.group(1))
+            self.current_step['start_time'] = timestamp
+            return
+        match = STEP_EXECUTED_REGEX.search(line)
+        if match:
+            step = self._step(match.group(1))
+            step['duration_seconds'] = parse_duration(match.group(2))
+            step['end_time'] = timestamp
+            return
+        match = INGESTION_COUNTS_REGEX.search(line)
+        if match:
+            step = self._step(match.group(1))
+            step['read'], step['written'], step['skipped'] = (int(value) for value in match.groups()[1:])
+            return
+        match = PROGRESS_REGEX.search(line)
+        if match:
+            step = self._step(match.group(1))
+            step['read'], step['written'] = int(match.group(2)), int(match.group(3))
+            return
+        match = STEP_EXECUTION_REGEX.search(line)
+        if match:
+            step = self._step(match.group(1))
+            read, written, read_skips, write_skips, process_skips, commits = (int(v) for v in match.groups()[1:])
+            step['read'], step['written'] = read, written
+            step['skipped'] = read_skips + write_skips + process_skips
+            step['commits'] = commits
+
+    def metrics(self):
+        # Steps of a job that did not complete, because it failed or is still running, are reported without status
+        if self.job_steps:
+            self._end_current_step(None)
+            self.steps.extend(self.job_steps)
+            self.job_steps = []
+        step_metrics = []
+        for step in self.steps:
+            if step['duration_seconds'] is None and step['start_time'] and step['end_time']:
+                step['duration_seconds'] = (step['end_time'] - step['start_time']).total_seconds()
+            step_metrics.append(StepMetrics(**step))
+        return step_metrics
+
+
+def parse_log_metrics(log_file):
+    """Parse the metrics of every Spring Batch step executed in the log file, in the order they were executed."""
+    parser = _LogParser(log_file)
+    with open(log_file, errors='replace') as open_file:
+        for line in open_file:
+            # Only lines about jobs and steps are matched against the patterns
+            if 'tep' in line or 'TEP' in line or 'Job: [' in line:
+                parser.parse_line(line)
+    return parser.metrics()
+
+
+def find_log_files(log_directory):
+    log_files = []
+    for directory, _, file_names in os.walk(log_directory):
+        log_files.extend(os.path.join(directory, file_name) for file_name in file_names if file_name.endswith('.log'))
+    return sorted(log_files)
+
+
+def parse_log_directory_metrics(log_directory, nb_processes=DEFAULT_LOG_METRICS_PROCESSES):
+    """Parse the step metrics of all the logs in the directory and its subdirectories in a pool of processes."""
+    log_files = find_log_files(log_directory)
+    if nb_processes <= 1 or len(log_files) <= 1:
+        return [metrics for log_file in log_files for metrics in parse_log_metrics(log_file)]
+    # multiprocessing is only imported when the logs are parsed in a pool
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=nb_processes) as executor:
+        return [metrics for log_metrics in executor.map(parse_log_metrics, log_files) for metrics in log_metrics]
+
+
+def _export_record(metrics):
+    record = metrics._asdict()
+    for field in ('start_time', 'end_time'):
+        record[field] = record[field].isoformat() if record[field] else None
+    items = metrics.read if metrics.read is not None else metrics.written
+    record['items_per_second'] = round(items / metrics.duration_seconds, 1) \
+        if items is not None and metrics.duration_seconds else None
+    return record
+
+
+def write_log_metrics_json(step_metrics, json_path):
+    with open(json_path, 'w') as open_file:
+        json.dump([_export_record(metrics) for metrics in step_metrics], open_file, indent=2)
+
+
+def write_log_metrics_csv(step_metrics, csv_path):
+    with open(csv_path, 'w', newline='') as open_file:
+        writer = csv.DictWriter(open_file, fieldnames=EXPORTED_FIELDS)
+        writer.writeheader()
+        for metrics in step_metrics:
+            writer.writerow(_export_record(metrics))
@@ -0,0 +1,155 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import datetime
+
+from ebi_eva_common_pyutils.ena_utils import get_scientific_name_and_common_name
+from ebi_eva_common_pyutils.logger import AppLogger
+from ebi_eva_common_pyutils.ncbi_utils import get_ncbi_assembly_name_from_term
+from ebi_eva_internal_pyutils.metadata_utils import build_taxonomy_code, get_assembly_code
+from psycopg2.extras import execute_values
+
+from eva_assembly_ingestion.db_session import execute, fetch_all
+
+SUPPORTED_ASSEMBLY_TRACKER_TABLE = 'evapro.supported_assembly_tracker'
+
+
+class MetadataWriter(AppLogger):
+    """
+    Write a new assembly to the metadata database for several taxonomies with multi-row statements. Nothing is
+    committed: the caller provides the connection and owns the transaction, so that all the writes are either applied
+    together or not at all. The methods mirror add_to_supported_assemblies and insert_new_assembly_and_taxonomy from
+    ebi_eva_internal_pyutils.metadata_utils, which run several statements and commit for every taxonomy.
+    """
+
+    def __init__(self, pg_conn, ncbi_api_key=None):
+        self.pg_conn = pg_conn
+        self.ncbi_api_key = ncbi_api_key
+
+    def _insert_rows(self, query, rows, template=None, fetch=False):
+        with self.pg_conn.cursor() as cursor:
+            return execute_values(cursor, query, rows, template=template, page_size=max(len(rows), 1), fetch=fetch)
+
+    def add_to_supported_assemblies(self, source_of_assembly, target_assembly, taxonomies):
+        """Make target_assembly the current assembly of the taxonomies, deprecating their previous current assembly."""
+        today = datetime.date.today()
+        current_assemblies = dict(fetch_all(
+            self.pg_conn,
+            f"SELECT taxonomy_id, assembly_id FROM {SUPPORTED_ASSEMBLY_TRACKER_TABLE} "
+            f"WHERE taxonomy_id = ANY(%s) AND current=true",
+            (list(taxonomies),)
+        ))
+        taxonomies_to_update = []
+        for taxonomy in taxonomies:
+            if current_assemblies.get(taxonomy) == target_assembly:
+                self.warning(f'Current assembly for taxonomy {taxonomy} is already {target_assembly}!')
+            elif taxonomy not in taxonomies_to_update:
+                taxonomies_to_update.append(taxonomy)
+        if not taxonomies_to_update:
+            return
+        execute(
+            self.pg_conn,
+            f"UPDATE {SUPPORTED_ASSEMBLY_TRACKER_TABLE} SET current=false, end_date=%s "
+            f"WHERE taxonomy_id = ANY(%s) AND current=true",
+            (today, taxonomies_to_update)
+        )
+        self._insert_rows(
+            f"INSERT INTO {SUPPORTED_ASSEMBLY_TRACKER_TABLE} (taxonomy_id, source, assembly_id, current, start_date) "
+            f"VALUES %s",
+            [(taxonomy, source_of_assembly, target_assembly, True, today) for taxonomy in taxonomies_to_update]
+        )
+
+    def _existing_assemblies_and_taxonomies(self, assemblies_and_taxonomies):
+        rows = fetch_all(
+            self.pg_conn,
+            "SELECT acc.assembly_accession, asm.taxonomy_id FROM evapro.accessioned_assembly acc "
+            "JOIN evapro.assembly_set asm ON acc.assembly_set_id = asm.assembly_set_id "
+            "WHERE acc.assembly_accession = ANY(%s) AND asm.taxonomy_id = ANY(%s)",
+            (sorted({assembly for assembly, _ in assemblies_and_taxonomies}),
+             sorted({taxonomy for _, taxonomy in assemblies_and_taxonomies}))
+        )
+        return set(rows)
+
+    def _insert_missing_taxonomies(self, taxonomies):
+        existing_taxonomies = {taxonomy for taxonomy, in fetch_all(
+            self.pg_conn, 'SELECT taxonomy_id FROM evapro.taxonomy WHERE taxonomy_id = ANY(%s)', (sorted(taxonomies),)
+        )}
+        rows = []
+        for taxonomy in sorted(set(taxonomies) - existing_taxonomies):
+            self.info(f'Taxonomy {taxonomy} not present in EVAPRO. Adding taxonomy ...')
+            scientific_name, common_name = get_scientific_name_and_common_name(taxonomy)
+            # If a common name cannot be found then we should use the scientific name
+            rows.append((taxonomy, common_name, scientific_name, build_taxonomy_code(scientific_name),
+                         common_name or scientific_name))
+        if rows:
+            self._insert_rows(
+                'INSERT INTO evapro.taxonomy(taxonomy_id, common_name, scientific_name, taxonomy_code, eva_name) '
+                'VALUES %s',
+                rows
+            )
+
+    def insert_new_assemblies_and_taxonomies(self, assemblies_and_taxonomies, in_accessioning=True):
+        """
+        Add the (assembly accession, taxonomy) pairs that are not in EVAPRO yet, with their taxonomy when it is missing,
+        and flag the assemblies as in the accessioning data store.
+        """
+        assemblies_and_taxonomies = list(dict.fromkeys(assemblies_and_taxonomies))
+        if not assemblies_and_taxonomies:
+            return
+        existing = self._existing_assemblies_and_taxonomies(assemblies_and_taxonomies)
+        missing = [pair for pair in assemblies_and_taxonomies if pair not in existing]
+        if missing:
+            self._insert_missing_taxonomies({taxonomy for _, taxonomy in missing})
+            assembly_names_and_codes = {}
+            for assembly, _ in missing:
+                if assembly not in assembly_names_and_codes:
+                    assembly_names_and_codes[assembly] = (
+                        get_ncbi_assembly_name_from_term(assembly, api_key=self.ncbi_api_key),
+                        get_assembly_code(self.pg_conn, assembly, ncbi_api_key=self.ncbi_api_key)
+                    )
+            # The ids are returned in the order of the rows inserted
+            assembly_set_ids = self._insert_rows(
+                'INSERT INTO evapro.assembly_set(taxonomy_id, assembly_name, assembly_code) VALUES %s '
+                'RETURNING assembly_set_id',
+                [(taxonomy,) + assembly_names_and_codes[assembly] for assembly, taxonomy in missing],
+                fetch=True
+            )
+            accessioned_assembly_rows = []
+            for (assembly, _), (assembly_set_id,) in zip(missing, assembly_set_ids):
+                assembly_chain, assembly_version = assembly.split('.')[:2]
+                accessioned_assembly_rows.append((assembly_set_id, assembly, assembly_chain, assembly_version))
+                self.info(f'New assembly {assembly} added with assembly_set_id: {assembly_set_id}')
+            self._insert_rows(
+                'INSERT INTO evapro.accessioned_assembly(assembly_set_id, assembly_accession, assembly_chain, '
+                'assembly_version) VALUES %s',
+                accessioned_assembly_rows
+            )
+        # Only insert assembly accessions which are NOT already in the assembly_accessioning_store_status table
+        self._insert_rows(
+            'INSERT INTO evapro.assembly_accessioning_store_status '
+            'SELECT new.assembly_accession, new.loaded FROM (VALUES %s) AS new(assembly_accession, loaded) '
+            'WHERE new.assembly_accession NOT IN '
+            '(SELECT assembly_accession FROM evapro.assembly_accessioning_store_status)',
+            [(assembly, in_accessioning) for assembly in dict.fromkeys(a for a, _ in assemblies_and_taxonomies)],
+            template='(%s::text, %s::boolean)'
+        )
+
+    def add_to_clustered_variant_update(self, target_assembly, taxonomies_and_source_assemblies, ingestion_time):
+        rows = [(taxonomy, target_assembly, source_assembly, ingestion_time)
+                for taxonomy, source_assembly in taxonomies_and_source_assemblies]
+        if rows:
+            self._insert_rows(
+                'INSERT INTO evapro.clustered_variant_update (taxonomy_id, assembly_accession, source, ingestion_time) '
+                'VALUES %s',
+                rows
+            )
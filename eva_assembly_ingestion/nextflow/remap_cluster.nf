@@ -18,6 +18,7 @@ def helpMessage() {
             --clustering_properties             path to clustering properties file
             --output_dir                        path to the directory where the output file should be copied.
             --remapping_config                  path to the remapping configuration file
+            --mongo_ingestion_lock              path to a lock file serialising the ingestion into Mongo across runs
     """
 }
 
@@ -25,6 +26,7 @@ params.release_version = null
 params.source_assemblies_and_taxonomies = null
 params.target_assembly_accession = null
 params.species_name = null
+params.mongo_ingestion_lock = null
 // help
 params.help = null
 
@@ -53,8 +55,15 @@ workflow {
     if (remapping_required) {
         // Process source genomes
         retrieve_source_genome(assemblies_to_remap, species_name)
+        // The required contigs of all the source assemblies are retrieved with a single query while the genomes are
+        // downloaded. Each custom source genome is then generated as soon as its genome is retrieved, so that the
+        // extraction of the source assemblies submitted first is not held back by the others
+        retrieve_required_contigs(
+            assemblies_to_remap.map { it[0] }.collect(),
+            params.remapping_config)
         update_source_genome(
             retrieve_source_genome.out.fasta_and_report,
+            retrieve_required_contigs.out.required_contigs,
             params.remapping_config)
 
         // Process target genome
@@ -75,7 +84,12 @@ workflow {
             remap_variants.out.remapped_vcfs,
             update_target_genome.out.updated_target_report)
 
-        gather_counts(ingest_vcf_into_mongo.out.ingestion_log_filename)
+        // Gather the counts of all the source assemblies and taxonomies once all the ingestions are done
+        gather_counts(
+            ingest_vcf_into_mongo.out.ingestion_log_filename
+                .map { source_assembly_accession, taxonomy, ingestion_log -> "${source_assembly_accession}:${taxonomy}" }
+                .unique()
+                .collect())
 
         // Cluster target assembly
         process_remapped_variants(ingest_vcf_into_mongo.out.ingestion_log_filename.collect())
@@ -101,6 +115,7 @@ workflow {
 
 process retrieve_source_genome {
     label 'short_time', 'med_mem'
+    tag "${source_assembly_accession} ${taxonomy_list.join(',')}"
 
     input:
     tuple val(source_assembly_accession), val(taxonomy_list)
@@ -137,11 +152,32 @@ process retrieve_target_genome {
     """
 }
 
+/*
+ * Retrieve the contigs required by all the source assemblies with a single query to the metadata database
+ */
+process retrieve_required_contigs {
+    label 'short_time', 'default_mem'
+
+    input:
+    val source_assembly_accessions
+    env REMAPPINGCONFIG
+
+    output:
+    path "required_contigs.json", emit: required_contigs
+
+    script:
+    """
+    ${params.executable.custom_assembly} --write-required-contigs --assembly-accessions ${source_assembly_accessions.join(' ')} --required-contigs-file required_contigs.json
+    """
+}
+
 process update_source_genome {
     label 'short_time', 'med_mem'
+    tag "${source_assembly_accession}"
 
     input:
     tuple val(source_assembly_accession), path(source_fasta), path(source_report)
+    path required_contigs
     env REMAPPINGCONFIG
 
     output:
@@ -149,7 +185,7 @@ process update_source_genome {
 
     script:
     """
-    ${params.executable.custom_assembly} --assembly-accession ${source_assembly_accession} --fasta-file ${source_fasta} --report-file ${source_report}
+    ${params.executable.custom_assembly} --assembly-accession ${source_assembly_accession} --fasta-file ${source_fasta} --report-file ${source_report} --required-contigs-file ${required_contigs} --incremental --validate --processes ${task.cpus}
     """
 }
 
@@ -167,7 +203,7 @@ process update_target_genome {
 
     script:
     """
-    ${params.executable.custom_assembly} --assembly-accession ${params.target_assembly_accession} --fasta-file ${target_fasta} --report-file ${target_report} --no-rename
+    ${params.executable.custom_assembly} --assembly-accession ${params.target_assembly_accession} --fasta-file ${target_fasta} --report-file ${target_report} --no-rename --incremental --validate --processes ${task.cpus}
     """
 }
 
@@ -177,6 +213,7 @@ process update_target_genome {
  */
 process extract_vcf_from_mongo {
     label 'long_time', 'med_mem'
+    tag "${source_assembly_accession} ${taxonomy}"
 
     clusterOptions "-o $params.output_dir/logs/${log_filename}.log \
                     -e $params.output_dir/logs/${log_filename}.err"
@@ -206,6 +243,7 @@ process extract_vcf_from_mongo {
  */
 process remap_variants {
     label 'long_time', 'med_mem'
+    tag "${source_assembly_accession} ${taxonomy}"
 
     input:
     tuple val(source_assembly_accession), val(taxonomy), path(source_fasta), path(source_report), path(source_vcf)
@@ -254,12 +292,14 @@ process remap_variants {
  */
 process ingest_vcf_into_mongo {
     label 'long_time', 'med_mem'
+    tag "${source_assembly_accession} ${taxonomy}"
 
     clusterOptions "-o $params.output_dir/logs/${log_filename}.log \
                     -e $params.output_dir/logs/${log_filename}.err"
 
     // Run ingestions in serial to avoid race conditions when writing variants to Mongo.
     // Note this applies across source assemblies as well as across EVA/dbSNP from the same assembly.
+    // The lock file extends this to the ingestions of all the runs sharing it.
     maxForks 1
 
     input:
@@ -271,6 +311,7 @@ process ingest_vcf_into_mongo {
 
     script:
     log_filename = "${remapped_vcf}_ingestion"
+    lock_command = params.mongo_ingestion_lock ? "flock ${params.mongo_ingestion_lock}" : ""
     """
     # Check the file name to know which database to load the variants into
     if [[ $remapped_vcf == *_eva_remapped.vcf ]]
@@ -280,7 +321,7 @@ process ingest_vcf_into_mongo {
         loadTo=DBSNP
     fi
 
-    java -Xmx${task.memory.toGiga()-1}G -jar $params.jar.vcf_ingestion \
+    ${lock_command} java -Xmx${task.memory.toGiga()-1}G -jar $params.jar.vcf_ingestion \
         --spring.config.location=file:${params.ingestion_properties} \
         --parameters.remappedFrom=${source_assembly_accession} \
         --parameters.vcf=${remapped_vcf} \
@@ -291,19 +332,19 @@ process ingest_vcf_into_mongo {
 }
 
 /*
- * Gather counts from remapping processing (extraction, remapping and ingestion)
+ * Gather counts from remapping processing (extraction, remapping and ingestion) of all the source assemblies and
+ * taxonomies, provided as <source assembly>:<taxonomy>, in a single task
  */
 process gather_counts {
     label 'default_time', 'default_mem'
 
     input:
-    tuple val(source_assembly_accession), val(taxonomy), path(ingestion_log)
+    val(source_assemblies_and_taxonomies)
 
     script:
     """
     ${params.executable.count_variants_from_logs} \
-        --source_assembly ${source_assembly_accession} \
-        --taxonomy ${taxonomy} \
+        --source_assemblies_and_taxonomies ${source_assemblies_and_taxonomies.join(' ')} \
         --target_assembly ${params.target_assembly_accession} \
         --output_directory ${params.output_dir} \
         --release_version ${params.release_version}
@@ -453,6 +494,7 @@ process qc_clustering_duplicate_rs_acc {
  */
 process backpropagate_clusters {
     label 'long_time', 'med_mem'
+    tag "${source_assembly_accession} ${taxonomy_list.join(',')}"
 
     clusterOptions "-o $params.output_dir/logs/${log_filename}.log \
                     -e $params.output_dir/logs/${log_filename}.err"
@@ -0,0 +1,145 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+# Processes of remap_cluster.nf run for one source assembly, tagged with the source assembly and its taxonomies
+SOURCE_ASSEMBLY_PROCESSES = ('retrieve_source_genome', 'extract_vcf_from_mongo', 'remap_variants',
+                             'ingest_vcf_into_mongo', 'backpropagate_clusters')
+
+# Last process run for a source assembly, once its variants are ingested and the clusters backpropagated
+FINAL_SOURCE_ASSEMBLY_PROCESS = 'backpropagate_clusters'
+
+FAILED_TASK_STATUSES = ('FAILED', 'ABORTED')
+
+
+def parse_source_assembly_tag(tag):
+    """Parse the tag of a process, '<source assembly> <taxonomy>[,<taxonomy>...]', or return None."""
+    parts = (tag or '').split()
+    if len(parts) != 2:
+        return None
+    source_assembly, taxonomies = parts
+    try:
+        return source_assembly, [int(taxonomy) for taxonomy in taxonomies.split(',')]
+    except ValueError:
+        return None
+
+
+class SourceAssemblyProgress:
+    """
+    Follow the tasks of remap_cluster.nf from the Nextflow weblog events and derive the status of each source assembly
+    and taxonomy: Completed once its clusters are backpropagated and Failed as soon as one of its tasks fails. A task
+    succeeding after a failure, when Nextflow retries it, moves the source assembly back to Started.
+    """
+
+    def __init__(self):
+        self.failed_processes = defaultdict(set)
+        self.statuses = {}
+
+    def status_change(self, event):
+        """Return (source assembly, taxonomies, status) if the event changes the status of a source assembly."""
+        if event.get('event') != 'process_completed':
+            return None
+        trace = event.get('trace') or {}
+        process = (trace.get('process') or '').split(':')[-1]
+        if process not in SOURCE_ASSEMBLY_PROCESSES:
+            return None
+        source_assembly_and_taxonomies = parse_source_assembly_tag(trace.get('tag'))
+        if not source_assembly_and_taxonomies:
+            return None
+        source_assembly, taxonomies = source_assembly_and_taxonomies
+        if trace.get('status') in FAILED_TASK_STATUSES:
+            for taxonomy in taxonomies:
+                self.failed_processes[(source_assembly, taxonomy)].add(process)
+            status = 'Failed'
+        else:
+            for taxonomy in taxonomies:
+                self.failed_processes[(source_assembly, taxonomy)].discard(process)
+            if any(self.failed_processes[(source_assembly, taxonomy)] for taxonomy in taxonomies):
+                return None
+            status = 'Completed' if process == FINAL_SOURCE_ASSEMBLY_PROCESS else 'Started'
+        changed_taxonomies = [taxonomy for taxonomy in taxonomies
+                              if self.statuses.get((source_assembly, taxonomy), 'Started') != status]
+        if not changed_taxonomies:
+            return None
+        for taxonomy in changed_taxonomies:
+            self.statuses[(source_assembly, taxonomy)] = status
+        return source_assembly, changed_taxonomies, status
+
+    def source_assemblies_with_status(self, status):
+        return set(key for key, key_status in self.statuses.items() if key_status == status)
+
+
+class _WeblogRequestHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.end_headers()
+        try:
+            event = json.loads(body)
+        except ValueError:
+            self.server.listener.warning('Ignoring Nextflow event that is not valid json')
+            return
+        self.server.listener.handle_event(event)
+
+    def log_message(self, format, *args):
+        # Requests are not logged to keep the job log readable
+        pass
+
+
+class NextflowEventListener(AppLogger):
+    """
+    HTTP server on the loopback interface receiving the events Nextflow sends with -with-weblog. The events are handled
+    one at a time, in the order they are received, by a background thread and passed to the callback.
+    Use it as a context manager around the Nextflow run and pass url to -with-weblog.
+    """
+
+    def __init__(self, callback, host='127.0.0.1', port=0):
+        self.callback = callback
+        self.server = HTTPServer((host, port), _WeblogRequestHandler)
+        self.server.listener = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def handle_event(self, event):
+        try:
+            self.callback(event)
+        except Exception as e:
+            # A failure to record the progress must not stop the pipeline
+            self.error(f'Failed to handle Nextflow event {event.get("event")}: {e!r}')
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='nextflow-weblog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
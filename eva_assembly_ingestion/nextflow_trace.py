@@ -0,0 +1,87 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import csv
+from collections import defaultdict
+
+from eva_assembly_ingestion.nextflow_events import parse_source_assembly_tag
+
+# Fields of the Nextflow trace file, written in raw format: times in milliseconds and memory and IO in bytes
+TRACE_FIELDS = ('task_id', 'hash', 'process', 'tag', 'status', 'exit', 'realtime', '%cpu', 'peak_rss', 'rchar',
+                'wchar')
+
+# Names of the numeric trace fields in the task records
+NUMERIC_TRACE_FIELDS = {
+    'exit': 'exit_code',
+    'realtime': 'realtime_ms',
+    '%cpu': 'cpu_percent',
+    'peak_rss': 'peak_rss_bytes',
+    'rchar': 'read_bytes',
+    'wchar': 'write_bytes',
+}
+
+
+def write_trace_config(config_path, trace_path):
+    """Write a Nextflow config enabling the trace file, to add to the run with -c."""
+    with open(config_path, 'w') as open_file:
+        open_file.write(
+            'trace {\n'
+            '    enabled = true\n'
+            '    overwrite = true\n'
+            '    raw = true\n'
+            f"    file = '{trace_path}'\n"
+            f"    fields = '{','.join(TRACE_FIELDS)}'\n"
+            '}\n'
+        )
+    return config_path
+
+
+def _parse_number(value):
+    value = value.strip().rstrip('%')
+    if not value or value == '-':
+        return None
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def parse_trace(trace_path):
+    """
+    Parse the trace file of a run into one record per task, with the source assembly and taxonomies of the task
+    taken from its tag. Tasks not specific to a source assembly, like the clustering, have no source assembly.
+    """
+    records = []
+    with open(trace_path) as open_file:
+        for row in csv.DictReader(open_file, delimiter='\t'):
+            source_assembly_and_taxonomies = parse_source_assembly_tag(row.get('tag'))
+            source_assembly, taxonomies = source_assembly_and_taxonomies or (None, [])
+            record = {
+                'task_id': int(row['task_id']),
+                'hash': row['hash'],
+                'process': row['process'].split(':')[-1],
+                'source_assembly': source_assembly,
+                'taxonomies': taxonomies,
+                'status': row['status'],
+            }
+            for field, name in NUMERIC_TRACE_FIELDS.items():
+                record[name] = _parse_number(row.get(field) or '')
+            records.append(record)
+    return records
+
+
+def group_by_source_assembly(records):
+    """Group the task records by (source assembly, taxonomy), in the order of the tasks."""
+    records_per_source_assembly = defaultdict(list)
+    for record in sorted(records, key=lambda record: record['task_id']):
+        for taxonomy in record['taxonomies']:
+            records_per_source_assembly[(record['source_assembly'], taxonomy)].append(record)
+    return dict(records_per_source_assembly)
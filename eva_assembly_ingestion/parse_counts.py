@@ -11,15 +11,23 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import os
 import re
 
 import yaml
-from ebi_eva_common_pyutils.command_utils import run_command_with_output
 
+# Size of the blocks read from the end of the logs
+LOG_BLOCK_SIZE = 4 * 1024 * 1024
 
-def count_variants_remapped(count_yml_file):
+
+def load_remapping_counts(count_yml_file):
+    """Load the breakdown of the remapping outcomes per flank size from the counts yaml file."""
     with open(count_yml_file) as open_file:
-        data = yaml.safe_load(open_file)
+        return yaml.safe_load(open_file) or {}
+
+
+def summarise_remapping_counts(data):
+    """Return the number of variants candidate for remapping, remapped and not remapped from the counts breakdown."""
     candidate_variants = data.get('all')
     remapped_variants = data.get('Flank_50', {}).get('Remapped', 0) + \
                         data.get('Flank_2000', {}).get('Remapped', 0) + \
@@ -29,6 +37,10 @@ def count_variants_remapped(count_yml_file):
     return candidate_variants, remapped_variants, unmapped_variants
 
 
+def count_variants_remapped(count_yml_file):
+    return summarise_remapping_counts(load_remapping_counts(count_yml_file))
+
+
 def parse_log_line(line, regex_list=None):
     if not regex_list:
         regex_list = [r'Items read = (\d+)', r'items written = (\d+)']
@@ -42,19 +54,55 @@ def parse_log_line(line, regex_list=None):
     return tuple(results)
 
 
+def find_last_lines(log_file, patterns, block_size=LOG_BLOCK_SIZE):
+    """
+    Return the last line of the log file containing each of the patterns, or None for the patterns that are not found,
+    like grep pattern log_file | tail -1 for every pattern. The file is read backwards in blocks from its end and the
+    reading stops as soon as all the patterns are found. A missing file has no lines.
+    """
+    last_lines = dict.fromkeys(patterns)
+    remaining_patterns = {pattern: pattern.encode() for pattern in patterns}
+    if not os.path.exists(log_file):
+        return last_lines
+    with open(log_file, 'rb') as open_file:
+        position = open_file.seek(0, os.SEEK_END)
+        # Start of the earliest line read so far, which might continue in the previous block
+        partial_line = b''
+        while remaining_patterns and position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            open_file.seek(position)
+            data = open_file.read(read_size) + partial_line
+            if position > 0:
+                first_line_end = data.find(b'\n')
+                if first_line_end == -1:
+                    partial_line = data
+                    continue
+                partial_line, data = data[:first_line_end], data[first_line_end:]
+            for pattern, pattern_bytes in list(remaining_patterns.items()):
+                match_start = data.rfind(pattern_bytes)
+                if match_start == -1:
+                    continue
+                line_start = data.rfind(b'\n', 0, match_start) + 1
+                line_end = data.find(b'\n', match_start)
+                line = data[line_start:line_end if line_end != -1 else len(data)]
+                last_lines[pattern] = line.decode(errors='replace').rstrip()
+                del remaining_patterns[pattern]
+    return last_lines
+
+
 def count_variants_extracted(extraction_log):
-    command = f'grep "EXPORT_EVA_SUBMITTED_VARIANTS_STEP" {extraction_log} | tail -1'
-    log_line = run_command_with_output('Get total number of eva variants written', command, return_process_output=True)
-    eva_total, eva_written = parse_log_line(log_line)
-    command = f'grep "EXPORT_DBSNP_SUBMITTED_VARIANTS_STEP" {extraction_log} | tail -1'
-    log_line = run_command_with_output('Get total number of dbsnp variants written', command, return_process_output=True)
-    dbsnp_total, dbnp_written = parse_log_line(log_line)
+    last_lines = find_last_lines(
+        extraction_log, ['EXPORT_EVA_SUBMITTED_VARIANTS_STEP', 'EXPORT_DBSNP_SUBMITTED_VARIANTS_STEP']
+    )
+    eva_total, eva_written = parse_log_line(last_lines['EXPORT_EVA_SUBMITTED_VARIANTS_STEP'] or '')
+    dbsnp_total, dbnp_written = parse_log_line(last_lines['EXPORT_DBSNP_SUBMITTED_VARIANTS_STEP'] or '')
     return eva_total, eva_written, dbsnp_total, dbnp_written
 
 
 def count_variants_ingested(ingestion_log):
-    command = f'grep "INGEST_REMAPPED_VARIANTS_FROM_VCF_STEP" {ingestion_log} | tail -1'
-    log_line = run_command_with_output('Get total number of variants written', command, return_process_output=True)
+    step_name = 'INGEST_REMAPPED_VARIANTS_FROM_VCF_STEP'
+    log_line = find_last_lines(ingestion_log, [step_name])[step_name] or ''
     regex_list = [r'Items \(remapped ss\) read = (\d+)', r'ss ingested = (\d+)', r'ss skipped \(duplicate\) = (\d+)']
     ss_read, ss_written, ss_duplicates = parse_log_line(log_line, regex_list)
     return ss_read, ss_written, ss_duplicates
@@ -0,0 +1,138 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import bisect
+import gzip
+import hashlib
+from collections import namedtuple
+
+from eva_assembly_ingestion.fasta_utils import header_name
+
+# Size of the chunks of sequence read at once when computing the digests
+DIGEST_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Number of pieces per process the fasta is split into, so that the processes stay busy until the end
+PIECES_PER_PROCESS = 4
+
+SequenceDigest = namedtuple('SequenceDigest', ['name', 'length', 'md5', 'sha512t24u'])
+
+
+def sha512t24u(sha512):
+    """Encode the first 24 bytes of a sha512 digest in base64url, as defined by GA4GH refget."""
+    return base64.urlsafe_b64encode(sha512.digest()[:24]).decode()
+
+
+def _seek_uncompressed(open_file, offset, block_offsets):
+    """
+    Return a binary stream reading the fasta from an uncompressed offset. Compressed files are decompressed from the
+    BGZF block containing the offset.
+    """
+    if block_offsets is None:
+        open_file.seek(offset)
+        return open_file
+    position = bisect.bisect_right([uncompressed for _, uncompressed in block_offsets], offset)
+    compressed_offset, uncompressed_offset = block_offsets[position - 1] if position else (0, 0)
+    open_file.seek(compressed_offset)
+    open_compressed = gzip.GzipFile(fileobj=open_file, mode='rb')
+    to_skip = offset - uncompressed_offset
+    while to_skip > 0:
+        to_skip -= len(open_compressed.read(min(to_skip, DIGEST_BUFFER_SIZE)))
+    return open_compressed
+
+
+def _digest_contigs(fasta_path, contigs, block_offsets=None):
+    """
+    Compute the SequenceDigest of consecutive contigs provided as (header_start, sequence_start, sequence_end), where
+    sequence_end is None for the last contig of the file.
+    """
+    digests = []
+    with open(fasta_path, 'rb') as open_fasta:
+        open_file = _seek_uncompressed(open_fasta, contigs[0][0], block_offsets)
+        for header_start, sequence_start, sequence_end in contigs:
+            name = header_name(open_file.read(sequence_start - header_start))
+            md5 = hashlib.md5()
+            sha512 = hashlib.sha512()
+            length = 0
+            remaining = None if sequence_end is None else sequence_end - sequence_start
+            while remaining is None or remaining > 0:
+                chunk = open_file.read(DIGEST_BUFFER_SIZE if remaining is None else min(remaining, DIGEST_BUFFER_SIZE))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                sequence = chunk.translate(None, b'\n\r').upper()
+                md5.update(sequence)
+                sha512.update(sequence)
+                length += len(sequence)
+            digests.append(SequenceDigest(name, length, md5.hexdigest(), sha512t24u(sha512)))
+    return digests
+
+
+def split_contigs(header_offsets, nb_pieces):
+    """
+    Group the consecutive contigs, provided as (header_start, sequence_start) offsets, into about nb_pieces pieces of
+    similar size. Each contig is described by (header_start, sequence_start, sequence_end).
+    """
+    contigs = []
+    for i, (header_start, sequence_start) in enumerate(header_offsets):
+        sequence_end = header_offsets[i + 1][0] if i + 1 < len(header_offsets) else None
+        contigs.append((header_start, sequence_start, sequence_end))
+    if not contigs:
+        return []
+    total_size = max(contigs[-1][1] - contigs[0][0], 1)
+    piece_size = total_size / max(nb_pieces, 1)
+    pieces = [[]]
+    piece_start = contigs[0][0]
+    for contig in contigs:
+        pieces[-1].append(contig)
+        if contig[2] is not None and contig[2] - piece_start >= piece_size:
+            pieces.append([])
+            piece_start = contig[2]
+    return [piece for piece in pieces if piece]
+
+
+def compute_sequence_digests(fasta_path, header_offsets, nb_processes=1, block_offsets=None):
+    """
+    Compute the length, MD5 and sha512t24u of the upper case sequence of every contig in the fasta file.
+    The file is split at contig boundaries and the pieces are processed in a pool of nb_processes processes.
+    For BGZF compressed files, header_offsets are in the uncompressed data and the block offsets from the .gzi are
+    used to start decompressing each piece from the nearest block.
+    Returns a list of SequenceDigest in the order of the fasta file.
+    """
+    pieces = split_contigs(header_offsets, nb_processes * PIECES_PER_PROCESS)
+    if nb_processes <= 1 or len(pieces) <= 1:
+        return [digest for piece in pieces for digest in _digest_contigs(fasta_path, piece, block_offsets)]
+    # multiprocessing is only imported when the contigs are digested in a pool
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=nb_processes) as executor:
+        results = executor.map(_digest_contigs, [fasta_path] * len(pieces), pieces, [block_offsets] * len(pieces))
+        return [digest for piece_digests in results for digest in piece_digests]
+
+
+def write_sequence_digests(digests, digests_path):
+    with open(digests_path, 'w') as open_file:
+        open_file.write('#' + '\t'.join(SequenceDigest._fields) + '\n')
+        for digest in digests:
+            open_file.write('\t'.join(str(value) for value in digest) + '\n')
+
+
+def read_sequence_digests(digests_path):
+    digests = []
+    with open(digests_path) as open_file:
+        for line in open_file:
+            if line.startswith('#'):
+                continue
+            name, length, md5, sha512t24u_digest = line.rstrip('\n').split('\t')
+            digests.append(SequenceDigest(name, int(length), md5, sha512t24u_digest))
+    return digests
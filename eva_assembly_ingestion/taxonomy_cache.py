@@ -0,0 +1,130 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import fcntl
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_assembly_ingestion.file_utils import atomic_write
+
+# Scientific names rarely change, so they are looked up again after 30 days
+DEFAULT_TAXONOMY_CACHE_TTL = 30 * 24 * 3600
+
+# Maximum number of concurrent remote lookups
+MAX_LOOKUP_WORKERS = 8
+
+
+def default_taxonomy_cache_file():
+    cache_home = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(cache_home, 'eva_assembly_ingestion', 'taxonomy_names.json')
+
+
+class TaxonomyNameCache(AppLogger):
+    """
+    On-disk cache of the scientific name of taxonomies, shared by all the processes of a host. The names are stored in
+    a json file with the time they were looked up and entries older than ttl seconds are looked up again. Names coming
+    from different lookup functions, get_scientific_name_from_taxonomy by default, are kept in separate sections of the
+    file. Missing names are looked up concurrently. Updates are serialised with a lock file and the cache file is
+    replaced atomically so it can be read without locking.
+    """
+
+    def __init__(self, cache_file=None, ttl=DEFAULT_TAXONOMY_CACHE_TTL, lookup=None, section='scientific_name'):
+        if lookup is None:
+            # The taxonomy helpers bring in an HTTP client, so they are only imported when they are used
+            from ebi_eva_common_pyutils.taxonomy.taxonomy import get_scientific_name_from_taxonomy
+            lookup = get_scientific_name_from_taxonomy
+        self.cache_file = cache_file or default_taxonomy_cache_file()
+        self.ttl = int(ttl)
+        self.lookup = lookup
+        self.section = section
+        self._names = {}
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+
+    def _load(self):
+        try:
+            with open(self.cache_file) as open_file:
+                return json.load(open_file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            self.warning(f'Taxonomy cache {self.cache_file} is corrupted, ignoring it')
+            return {}
+
+    def _fresh_entries(self, cache_content):
+        oldest_valid_time = time.time() - self.ttl
+        return {
+            int(taxonomy): name
+            for taxonomy, (name, lookup_time) in cache_content.get(self.section, {}).items()
+            if lookup_time >= oldest_valid_time
+        }
+
+    def _lookup(self, taxonomy):
+        try:
+            return self.lookup(taxonomy)
+        except Exception as e:
+            self.warning(f'Could not retrieve the scientific name of taxonomy {taxonomy}: {e}')
+            return None
+
+    def _store(self, names):
+        lookup_time = time.time()
+        with open(self.cache_file + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Merge with the names other processes may have added since the cache was read
+            cache_content = self._load()
+            section = cache_content.setdefault(self.section, {})
+            for taxonomy, name in names.items():
+                section[str(taxonomy)] = (name, lookup_time)
+            atomic_write(self.cache_file, json.dumps(cache_content, sort_keys=True).encode())
+
+    def _missing(self, taxonomies):
+        """Read the names of the taxonomies from the cache file if needed and return the ones still missing."""
+        missing = [taxonomy for taxonomy in taxonomies if taxonomy not in self._names]
+        if missing:
+            self._names.update({taxonomy: name for taxonomy, name in self._fresh_entries(self._load()).items()
+                                if taxonomy in missing})
+            missing = [taxonomy for taxonomy in missing if taxonomy not in self._names]
+        return missing
+
+    def get_many(self, taxonomies):
+        """
+        Return a dict of taxonomy to scientific name for the taxonomies provided. The names not in the cache, or
+        expired, are looked up concurrently and taxonomies without a name, or whose lookup failed, are left out.
+        """
+        taxonomies = list(dict.fromkeys(taxonomies))
+        missing = self._missing(taxonomies)
+        if missing:
+            self.info(f'Looking up the scientific name of {len(missing)} taxonomies')
+            with ThreadPoolExecutor(max_workers=min(MAX_LOOKUP_WORKERS, len(missing))) as executor:
+                looked_up = dict(zip(missing, executor.map(self._lookup, missing)))
+            looked_up = {taxonomy: name for taxonomy, name in looked_up.items() if name}
+            if looked_up:
+                self._store(looked_up)
+                self._names.update(looked_up)
+        return {taxonomy: self._names[taxonomy] for taxonomy in taxonomies if taxonomy in self._names}
+
+    def get(self, taxonomy):
+        """
+        Return the scientific name of the taxonomy, looking it up if it is not in the cache. Errors of the lookup are
+        raised, and a ValueError is raised if the taxonomy has no name.
+        """
+        if self._missing([taxonomy]):
+            name = self.lookup(taxonomy)
+            if not name:
+                raise ValueError(f'Could not find the scientific name of taxonomy {taxonomy}')
+            self._store({taxonomy: name})
+            self._names[taxonomy] = name
+        return self._names[taxonomy]
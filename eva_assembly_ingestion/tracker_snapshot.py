@@ -0,0 +1,99 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections import namedtuple
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_assembly_ingestion.db_session import fetch_all
+
+TRACKER_COLUMNS = (
+    'source', 'taxonomy', 'scientific_name', 'origin_assembly_accession', 'assembly_accession', 'num_studies',
+    'remapping_status', 'num_ss_extracted', 'num_ss_remapped', 'num_ss_ingested'
+)
+
+# The row version is the id of the last transaction that wrote the row
+TrackerRow = namedtuple('TrackerRow', TRACKER_COLUMNS + ('row_version',))
+
+# Columns to add to the RETURNING clause of the statements writing to the tracker to keep the snapshot up to date
+TRACKER_RETURNING_COLUMNS = ', '.join(f'tracker.{column}' for column in TRACKER_COLUMNS) + \
+                            ', tracker.xmin::text::bigint'
+
+
+class TrackerSnapshot(AppLogger):
+    """
+    In-process copy of the tracker rows of a job, indexed by (origin assembly, taxonomy, source).
+    The rows are loaded once with their row version. Each time the rows are requested, the number and sum of the row
+    versions in the database are compared with the snapshot, and the rows are only reloaded when another process wrote
+    to them. Statements run by the job return the rows they wrote, which are applied to the snapshot with apply().
+    """
+
+    where_clause = 'WHERE release_version=%s AND assembly_accession=%s AND taxonomy = ANY(%s)'
+
+    def __init__(self, metadata_session, tracking_table, release_version, target_assembly):
+        self.metadata_session = metadata_session
+        self.tracking_table = tracking_table
+        self.release_version = release_version
+        self.target_assembly = target_assembly
+        self.taxonomies = None
+        self._rows = None
+
+    @property
+    def _parameters(self):
+        return self.release_version, self.target_assembly, list(self.taxonomies)
+
+    def _load(self, pg_conn):
+        query = f'SELECT {TRACKER_RETURNING_COLUMNS} FROM {self.tracking_table} AS tracker {self.where_clause}'
+        self._rows = {}
+        self._add_rows(fetch_all(pg_conn, query, self._parameters))
+
+    def _add_rows(self, rows):
+        for row in rows:
+            tracker_row = TrackerRow(*row)
+            self._rows[(tracker_row.origin_assembly_accession, tracker_row.taxonomy, tracker_row.source)] = tracker_row
+
+    def _fingerprint(self):
+        return len(self._rows), sum(row.row_version for row in self._rows.values())
+
+    def _is_current(self, pg_conn):
+        query = (f'SELECT count(*), COALESCE(sum(xmin::text::bigint), 0) FROM {self.tracking_table} '
+                 f'{self.where_clause}')
+        (nb_rows, sum_row_versions), = fetch_all(pg_conn, query, self._parameters)
+        return (nb_rows, sum_row_versions) == self._fingerprint()
+
+    def rows(self, taxonomies):
+        """Return the tracker rows of the taxonomies, reloading them if they were modified by another process."""
+        with self.metadata_session.connection() as pg_conn:
+            if self._rows is None or set(taxonomies) != set(self.taxonomies):
+                self.taxonomies = list(taxonomies)
+                self._load(pg_conn)
+            elif not self._is_current(pg_conn):
+                self.debug('Tracker rows modified by another process, reloading them')
+                self._load(pg_conn)
+        return list(self._rows.values())
+
+    def apply(self, rows):
+        """
+        Update the snapshot with the rows returned by a statement writing to the tracker, using
+        TRACKER_RETURNING_COLUMNS. Rows outside of the snapshot are ignored.
+        """
+        if self._rows is None:
+            return
+        self._add_rows(
+            row for row in rows
+            if row[TRACKER_COLUMNS.index('assembly_accession')] == self.target_assembly
+            and row[TRACKER_COLUMNS.index('taxonomy')] in self.taxonomies
+        )
+
+    def invalidate(self):
+        self._rows = None
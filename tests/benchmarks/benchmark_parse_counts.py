@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare grep | tail with the reverse log scanner to find the counts in a synthetic extraction log.
+
+    PYTHONPATH=. python tests/benchmarks/benchmark_parse_counts.py --size-mb 4096
+"""
+import os
+import subprocess
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from eva_assembly_ingestion.parse_counts import find_last_lines, parse_log_line
+
+STEP_NAMES = ['EXPORT_EVA_SUBMITTED_VARIANTS_STEP', 'EXPORT_DBSNP_SUBMITTED_VARIANTS_STEP']
+
+LOG_LINE = ('2022-10-06 14:22:20.512  INFO 2826374 --- [           main] u.a.e.e.a.c.b.l.GenericProgressListener  : '
+            '{step}: Items read = {count}, items written = {count}\n')
+
+NOISE_LINE = ('2022-10-06 14:22:20.512 DEBUG 2826374 --- [           main] o.s.data.mongodb.core.MongoTemplate      : '
+              'find using query: { "seq" : "GCA_000003055.3", "contig" : "CM000177.1" } '
+              'in collection: dbsnpSubmittedVariantEntity\n')
+
+
+def write_synthetic_log(log_path, size_mb):
+    """Write the progress of the EVA step, then of the dbSNP step, with debug lines in between."""
+    noise_block = NOISE_LINE * 1000
+    count = 0
+    with open(log_path, 'w') as open_file:
+        for step in STEP_NAMES:
+            while open_file.tell() < size_mb * 1024 * 1024 * (STEP_NAMES.index(step) + 1) / len(STEP_NAMES):
+                count += 1000
+                open_file.write(noise_block)
+                open_file.write(LOG_LINE.format(step=step, count=count))
+
+
+def grep_tail(log_path):
+    counts = []
+    for step in STEP_NAMES:
+        output = subprocess.run(f'grep "{step}" {log_path} | tail -1', shell=True, check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True).stdout
+        counts.append(parse_log_line(output))
+    return counts
+
+
+def reverse_scan(log_path):
+    last_lines = find_last_lines(log_path, STEP_NAMES)
+    return [parse_log_line(last_lines[step] or '') for step in STEP_NAMES]
+
+
+def time_function(function, log_path):
+    start = time.perf_counter()
+    result = function(log_path)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark finding the last counts of each step in an extraction log')
+    parser.add_argument('--size-mb', type=int, default=2048, help='Approximate size of the synthetic log in MB')
+    parser.add_argument('--directory', default=None, help='Directory where the temporary log is written')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as tmp_dir:
+        log_path = os.path.join(tmp_dir, 'vcf_extractor.log')
+        write_synthetic_log(log_path, args.size_mb)
+        size_mb = os.path.getsize(log_path) / 1024 / 1024
+        grep_time, grep_counts = time_function(grep_tail, log_path)
+        scan_time, scan_counts = time_function(reverse_scan, log_path)
+
+    # The last EVA line is in the middle of the log, so the scanner reads half of it
+    print(f'Log size: {size_mb:.0f} MB')
+    print(f'grep | tail:  {grep_time:.2f}s')
+    print(f'reverse scan: {scan_time:.2f}s')
+    print(f'Speedup: {grep_time / scan_time:.1f}x, identical counts: {grep_counts == scan_counts} {scan_counts}')
+
+
+if __name__ == '__main__':
+    main()
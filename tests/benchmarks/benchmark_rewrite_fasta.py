@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the line by line and the block copy modes of CustomAssembly.rewrite_changing_names on a synthetic genome.
+
+    PYTHONPATH=. python tests/benchmarks/benchmark_rewrite_fasta.py --size-mb 2048 --contigs 50
+"""
+import filecmp
+import os
+import random
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from eva_assembly_ingestion.custom_assembly import CustomAssembly
+
+
+def write_synthetic_fasta(fasta_path, size_mb, nb_contigs, line_width=60):
+    sequence_line = ''.join(random.choice('ACGTN') for _ in range(line_width)) + '\n'
+    block = (sequence_line * (1024 * 1024 // len(sequence_line))).encode()
+    blocks_per_contig = max(1, size_mb // nb_contigs)
+    with open(fasta_path, 'wb') as open_file:
+        for i in range(nb_contigs):
+            open_file.write(f'>chr{i} synthetic contig {i}\n'.encode())
+            for _ in range(blocks_per_contig):
+                open_file.write(block)
+    return {f'chr{i}': f'CM{i:06d}.1' for i in range(0, nb_contigs, 2)}
+
+
+def time_rewrite(input_fasta, output_fasta, contig_to_rename, block_copy):
+    start = time.perf_counter()
+    CustomAssembly.rewrite_changing_names(input_fasta, output_fasta, contig_to_rename, block_copy=block_copy)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark the fasta header rewrite modes')
+    parser.add_argument('--size-mb', type=int, default=512, help='Approximate size of the synthetic genome in MB')
+    parser.add_argument('--contigs', type=int, default=30, help='Number of contigs in the synthetic genome')
+    parser.add_argument('--directory', default=None, help='Directory where the temporary genomes are written')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as tmp_dir:
+        input_fasta = os.path.join(tmp_dir, 'genome.fa')
+        line_fasta = os.path.join(tmp_dir, 'genome_line.fa')
+        block_fasta = os.path.join(tmp_dir, 'genome_block.fa')
+        contig_to_rename = write_synthetic_fasta(input_fasta, args.size_mb, args.contigs)
+        size_mb = os.path.getsize(input_fasta) / 1024 / 1024
+
+        line_time = time_rewrite(input_fasta, line_fasta, contig_to_rename, block_copy=False)
+        block_time = time_rewrite(input_fasta, block_fasta, contig_to_rename, block_copy=True)
+        identical = filecmp.cmp(line_fasta, block_fasta, shallow=False)
+
+    print(f'Genome size: {size_mb:.0f} MB, {args.contigs} contigs, {len(contig_to_rename)} renamed')
+    print(f'Line by line: {line_time:.2f}s ({size_mb / line_time:.0f} MB/s)')
+    print(f'Block copy:   {block_time:.2f}s ({size_mb / block_time:.0f} MB/s)')
+    print(f'Speedup: {line_time / block_time:.1f}x, identical output: {identical}')
+
+
+if __name__ == '__main__':
+    main()
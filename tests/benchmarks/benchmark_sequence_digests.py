@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the single process and the parallel computation of the sequence digests on a synthetic genome.
+
+    PYTHONPATH=. python tests/benchmarks/benchmark_sequence_digests.py --size-mb 2048 --contigs 50 --processes 8
+"""
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from benchmark_rewrite_fasta import write_synthetic_fasta
+from eva_assembly_ingestion.fasta_utils import find_header_offsets
+from eva_assembly_ingestion.sequence_digests import compute_sequence_digests
+
+
+def time_digests(fasta_path, header_offsets, nb_processes):
+    start = time.perf_counter()
+    digests = compute_sequence_digests(fasta_path, header_offsets, nb_processes)
+    return time.perf_counter() - start, digests
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark the computation of the sequence digests')
+    parser.add_argument('--size-mb', type=int, default=512, help='Approximate size of the synthetic genome in MB')
+    parser.add_argument('--contigs', type=int, default=30, help='Number of contigs in the synthetic genome')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Number of processes to compare with')
+    parser.add_argument('--directory', default=None, help='Directory where the temporary genome is written')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as tmp_dir:
+        fasta_path = os.path.join(tmp_dir, 'genome.fa')
+        write_synthetic_fasta(fasta_path, args.size_mb, args.contigs)
+        size_mb = os.path.getsize(fasta_path) / 1024 / 1024
+        header_offsets = find_header_offsets(fasta_path)
+
+        single_time, single_digests = time_digests(fasta_path, header_offsets, 1)
+        parallel_time, parallel_digests = time_digests(fasta_path, header_offsets, args.processes)
+
+    print(f'Genome size: {size_mb:.0f} MB, {args.contigs} contigs')
+    print(f'1 process:    {single_time:.2f}s ({size_mb / single_time:.0f} MB/s)')
+    print(f'{args.processes} processes: {parallel_time:.2f}s ({size_mb / parallel_time:.0f} MB/s)')
+    print(f'Speedup: {single_time / parallel_time:.1f}x, identical digests: {single_digests == parallel_digests}')
+
+
+if __name__ == '__main__':
+    main()
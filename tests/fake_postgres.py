@@ -0,0 +1,79 @@
+from psycopg2.extensions import adapt, TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+
+class FakeCursor:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = -1
+        self.results = []
+
+    def execute(self, query, vars=None):
+        if isinstance(query, bytes):
+            query = query.decode()
+        self.connection.statements.append((query, vars))
+        self.connection.in_transaction = True
+        self.results = self.connection.results.pop(0) if self.connection.results else []
+        self.rowcount = len(self.results)
+
+    def mogrify(self, query, vars):
+        if isinstance(query, bytes):
+            query = query.decode()
+        return (query % tuple(adapt(value).getquoted().decode() for value in vars)).encode()
+
+    def fetchall(self):
+        return self.results
+
+    def fetchone(self):
+        return self.results[0] if self.results else None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FakeConnection:
+    """
+    Stand-in for a psycopg2 connection to the metadata database. It records the statements with their parameters,
+    returns the results queued in results, one list of rows per statement, and tracks the transactions.
+    """
+    encoding = 'UTF8'
+
+    def __init__(self, results=None):
+        self.statements = []
+        self.results = list(results or [])
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = 0
+        self.in_transaction = False
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return TRANSACTION_STATUS_INTRANS if self.in_transaction else TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        self.commits += 1
+        self.in_transaction = False
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
@@ -8,10 +8,20 @@ def touch(f):
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument("-a", "--assembly-accession", required=True)
-    parser.add_argument("-f", "--fasta-file", required=True)
-    parser.add_argument("-r", "--report-file", required=True)
+    parser.add_argument("-a", "--assembly-accession")
+    parser.add_argument("-f", "--fasta-file")
+    parser.add_argument("-r", "--report-file")
+    parser.add_argument("--required-contigs-file")
+    parser.add_argument("--write-required-contigs", action='store_true')
+    parser.add_argument("--assembly-accessions", nargs='+')
+    parser.add_argument("--processes")
     parser.add_argument("--no-rename", action='store_true')
+    parser.add_argument("--incremental", action='store_true')
+    parser.add_argument("--bgzip-output", action='store_true')
+    parser.add_argument("--validate", action='store_true')
     args = parser.parse_args()
-    touch(args.fasta_file.replace('.fa', '_custom.fa'))
-    touch(args.report_file.replace('.txt', '_custom.txt'))
+    if args.write_required_contigs:
+        touch(args.required_contigs_file)
+    else:
+        touch(args.fasta_file.replace('.fa', '_custom.fa'))
+        touch(args.report_file.replace('.txt', '_custom.txt'))
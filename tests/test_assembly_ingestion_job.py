@@ -1,37 +1,462 @@
 import datetime
+import glob
+import json
 import os
+import shutil
+import subprocess
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+import urllib.request
+from unittest.mock import Mock, patch
+
+import yaml
+from ebi_eva_common_pyutils.config import cfg
 
 from eva_assembly_ingestion.config import load_config
 from eva_assembly_ingestion.assembly_ingestion_job import AssemblyIngestionJob
+from eva_assembly_ingestion.metadata_writer import MetadataWriter
+from eva_assembly_ingestion.taxonomy_cache import TaxonomyNameCache
+from fake_postgres import FakeConnection
 
 
-class TestAddToClusteredVariantUpdate(unittest.TestCase):
+class TestUpdateDbs(unittest.TestCase):
     resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
 
     def setUp(self):
         config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
         load_config(config_file)
         self.remapping_job = AssemblyIngestionJob(taxonomy=9913, target_assembly='GCA_000003055.3', release_version=5)
+        self.connection = FakeConnection()
+        self.patch_connect = patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle',
+                                   return_value=self.connection)
+        self.patch_connect.start()
+
+    def tearDown(self):
+        self.remapping_job.close()
+        self.patch_connect.stop()
+
+    tracker_rows = [
+        ('EVA', 9913, 'Cattle', 'GCA_000000001.1', 'GCA_000003055.3', 1, 'Completed'),
+        ('DBSNP', 9913, 'Cattle', 'GCA_000000001.1', 'GCA_000003055.3', 1, 'Completed'),
+        ('EVA', 9940, 'Cattle', 'GCA_000000002.1', 'GCA_000003055.3', 1, 'Completed'),
+    ]
 
     def test_inserts_one_row_per_taxonomy_per_source_assembly(self):
-        # Two tracker rows with two origin assemblies, each with two taxonomies → 4 inserts
-        tracker_rows = [
-            ('EVA', 9913, 'Cattle', 'GCA_000000001.1', 'GCA_000003055.3', 1, 'Completed'),
-            ('DBSNP', 9913, 'Cattle', 'GCA_000000001.1', 'GCA_000003055.3', 1, 'Completed'),
-            ('EVA', 9940, 'Cattle', 'GCA_000000002.1', 'GCA_000003055.3', 1, 'Completed'),
-        ]
-        mocked_now = datetime.datetime.now()
-        with patch('eva_assembly_ingestion.assembly_ingestion_job.get_metadata_connection_handle'), \
-                patch('eva_assembly_ingestion.assembly_ingestion_job.execute_query') as mock_execute_query, \
-                patch.object(self.remapping_job, 'get_job_information_from_tracker', return_value=tracker_rows), \
+        # Three tracker rows with two distinct taxonomy and origin assembly pairs → 2 rows in a single insert
+        mocked_now = datetime.datetime(2026, 10, 1, 12, 30)
+        with patch.object(self.remapping_job, 'get_job_information_from_tracker', return_value=self.tracker_rows), \
                 patch('eva_assembly_ingestion.assembly_ingestion_job.datetime') as mock_datetime:
             mock_datetime.datetime.now.return_value = mocked_now
-            self.remapping_job.add_to_clustered_variant_update()
-        captured_queries = [c[1][1] for c in mock_execute_query.mock_calls]
-        expected_queries = [
-            f"INSERT INTO evapro.clustered_variant_update (taxonomy_id, assembly_accession, source, ingestion_time) VALUES (9913, 'GCA_000003055.3', 'GCA_000000001.1', '{mocked_now.strftime('%Y-%m-%d %H:%M:%S.%f')}')",
-            f"INSERT INTO evapro.clustered_variant_update (taxonomy_id, assembly_accession, source, ingestion_time) VALUES (9940, 'GCA_000003055.3', 'GCA_000000002.1', '{mocked_now.strftime('%Y-%m-%d %H:%M:%S.%f')}')",
+            with self.remapping_job.metadata_session.connection() as pg_conn:
+                self.remapping_job.add_to_clustered_variant_update(
+                    MetadataWriter(pg_conn), self.remapping_job.get_taxonomies_and_source_assemblies()
+                )
+        assert self.connection.statements == [(
+            "INSERT INTO evapro.clustered_variant_update (taxonomy_id, assembly_accession, source, ingestion_time) "
+            "VALUES (9913,'GCA_000003055.3','GCA_000000001.1','2026-10-01T12:30:00'::timestamp),"
+            "(9940,'GCA_000003055.3','GCA_000000002.1','2026-10-01T12:30:00'::timestamp)",
+            None
+        )]
+        assert self.connection.commits == 1
+
+    def test_update_dbs_in_one_transaction(self):
+        self.connection.results = [
+            [],  # no current supported assembly
+            [],  # deprecate the previous assemblies
+            [],  # insert the supported assemblies
+            [('GCA_000003055.3', 9913), ('GCA_000003055.3', 9940)],  # assembly already in EVAPRO
+            [],  # accessioning status
+            [],  # insert in clustered_variant_update
+        ]
+        with patch.object(AssemblyIngestionJob, 'taxonomies', new=[9913, 9940]), \
+                patch.object(self.remapping_job, 'get_incomplete_assemblies_and_taxonomies', return_value=[]), \
+                patch.object(self.remapping_job, 'get_job_information_from_tracker', return_value=self.tracker_rows), \
+                patch.object(self.remapping_job, 'add_to_contig_alias') as mock_add_to_contig_alias:
+            self.remapping_job.update_dbs('Ensembl')
+        mock_add_to_contig_alias.assert_called_once()
+        assert len(self.connection.statements) == 6
+        assert self.connection.commits == 1
+        assert self.remapping_job.metadata_session.round_trips == 7
+        assert self.connection.statements[2][0].startswith(
+            "INSERT INTO evapro.supported_assembly_tracker (taxonomy_id, source, assembly_id, current, start_date) "
+            "VALUES (9913,'Ensembl','GCA_000003055.3',true,"
+        )
+
+    def test_update_dbs_rolled_back_on_failure(self):
+        with patch.object(AssemblyIngestionJob, 'taxonomies', new=[9913]), \
+                patch.object(self.remapping_job, 'get_incomplete_assemblies_and_taxonomies', return_value=[]), \
+                patch.object(self.remapping_job, 'get_job_information_from_tracker', return_value=self.tracker_rows), \
+                patch('eva_assembly_ingestion.metadata_writer.MetadataWriter.insert_new_assemblies_and_taxonomies',
+                      side_effect=ValueError('NCBI unavailable')), \
+                patch.object(self.remapping_job, 'add_to_contig_alias') as mock_add_to_contig_alias:
+            with self.assertRaises(ValueError):
+                self.remapping_job.update_dbs('Ensembl')
+        mock_add_to_contig_alias.assert_not_called()
+        assert self.connection.commits == 0
+        assert self.connection.rollbacks == 1
+
+
+class TestMetadataSessionInJob(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self):
+        config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
+        load_config(config_file)
+        self.remapping_job = AssemblyIngestionJob(taxonomy=9913, target_assembly='GCA_000003055.3', release_version=5)
+
+    def test_connection_shared_across_steps(self):
+        connection = FakeConnection(results=[
+            [(9913,), (9940,)],
+            [('EVA', 9913, 'Cattle', 'GCA_000000001.1', 'GCA_000003055.3', 1, 'Pending', None, None, None, 1000)]
+        ])
+        with patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle',
+                   return_value=connection) as mock_connect:
+            source_assemblies_and_taxonomies = self.remapping_job.get_incomplete_assemblies_and_taxonomies()
+            self.remapping_job.set_status_start(source_assemblies_and_taxonomies)
+            self.remapping_job.set_counts('GCA_000000001.1', 9913, 'EVA', nb_variant_extracted=10,
+                                          nb_variant_remapped=9)
+            self.remapping_job.close()
+        mock_connect.assert_called_once()
+        assert connection.closed
+        assert source_assemblies_and_taxonomies == [('GCA_000000001.1', [9913])]
+        # Values are sent as parameters, except for the bulk updates where execute_values renders them
+        for query, parameters in connection.statements:
+            if 'FROM (VALUES' in query:
+                continue
+            assert "'" not in query.replace("'DBSNP'", '')
+            assert parameters
+        assert connection.statements[1][1] == (5, 'GCA_000003055.3', [9913, 9940])
+        assert "(5, 'GCA_000000001.1', 9913, 'EVA', 10::bigint, 9::bigint, NULL::bigint)" in \
+            connection.statements[-1][0]
+        assert 'remapping_breakdown' not in connection.statements[-1][0]
+
+
+class TestSetStatus(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self):
+        config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
+        load_config(config_file)
+        self.remapping_job = AssemblyIngestionJob(taxonomy=9913, target_assembly='GCA_000003055.3', release_version=5)
+        self.connection = FakeConnection()
+        self.patch_connect = patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle',
+                                   return_value=self.connection)
+        self.patch_connect.start()
+        self.source_assemblies_and_taxonomies = [
+            (f'GCA_00000000{i}.1', [9913, 9940]) for i in range(1, 4)
+        ]
+
+    def tearDown(self):
+        self.remapping_job.close()
+        self.patch_connect.stop()
+
+    def test_set_status_in_one_statement(self):
+        start_time = datetime.datetime(2026, 10, 1, 12, 30)
+        with patch('eva_assembly_ingestion.assembly_ingestion_job.datetime') as mock_datetime:
+            mock_datetime.datetime.now.return_value = start_time
+            self.remapping_job.set_status_start(self.source_assemblies_and_taxonomies)
+        # One UPDATE and one commit for the six rows
+        assert len(self.connection.statements) == 1
+        assert self.connection.commits == 1
+        assert self.remapping_job.metadata_session.round_trips == 2
+        query = self.connection.statements[0][0]
+        assert query.startswith('UPDATE eva_progress_tracker.remapping_tracker AS tracker')
+        assert "(5, 'GCA_000000001.1', 9913, 'Started', '2026-10-01T12:30:00'::timestamp, NULL::timestamp)" in query
+        assert '::timestamp::timestamp' not in query
+        assert query.count("'Started'") == 6
+
+    def test_set_status_failed_keeps_times(self):
+        self.remapping_job.set_status_failed(self.source_assemblies_and_taxonomies)
+        query = self.connection.statements[0][0]
+        assert 'remapping_start=COALESCE(new.remapping_start, tracker.remapping_start)' in query
+        assert "(5, 'GCA_000000003.1', 9940, 'Failed', NULL::timestamp, NULL::timestamp)" in query
+
+    def test_write_metrics(self):
+        metrics_directory = tempfile.mkdtemp()
+        cfg.content['metrics'] = {'output_directory': metrics_directory}
+        try:
+            job = AssemblyIngestionJob(taxonomy=9913, target_assembly='GCA_000003055.3', release_version=5)
+            job.set_status_start(self.source_assemblies_and_taxonomies)
+            job.close()
+            job.write_metrics()
+            with open(os.path.join(metrics_directory, '9913_GCA_000003055.3_metrics.json')) as open_file:
+                metrics = json.load(open_file)
+            assert os.path.exists(os.path.join(metrics_directory, '9913_GCA_000003055.3_metrics.prom'))
+        finally:
+            del cfg.content['metrics']
+            shutil.rmtree(metrics_directory)
+        assert metrics['spans']['db_transaction']['calls'] == 1
+        assert metrics['counters'] == {'db_round_trips': 2}
+
+    def test_no_metrics_by_default(self):
+        assert not self.remapping_job.instrumentation.enabled
+        self.remapping_job.write_metrics()
+
+    def test_save_task_profile(self):
+        output_directory = tempfile.mkdtemp()
+        profile_file = os.path.join(output_directory, 'remapping_task_profile.json')
+        trace_file = os.path.join(self.resources_folder, 'nextflow', 'remapping_trace.txt')
+        self.remapping_job.save_task_profile(trace_file, profile_file)
+        with open(profile_file) as open_file:
+            assert len(json.load(open_file)) == 4
+        shutil.rmtree(output_directory)
+        # One UPDATE for the two taxonomies of the source assembly
+        assert len(self.connection.statements) == 1
+        query = self.connection.statements[0][0]
+        assert query.startswith('UPDATE eva_progress_tracker.remapping_tracker AS tracker SET task_profile=')
+        assert "(5, 'GCA_000000001.1', 9913, '[" in query
+        assert "(5, 'GCA_000000001.1', 9940, '[" in query
+        assert 'cluster_unclustered_variants' not in query
+
+    def test_save_task_profile_without_trace(self):
+        self.remapping_job.save_task_profile('/path/to/missing_trace.txt', '/path/to/profile.json')
+        assert self.connection.statements == []
+
+    def test_set_status_nothing_to_update(self):
+        self.remapping_job.set_status_end([])
+        assert self.connection.statements == []
+
+
+class TestCountVariantsFromLogs(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self):
+        config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
+        load_config(config_file)
+        self.remapping_job = AssemblyIngestionJob(taxonomy=9913, target_assembly='GCA_000003055.3', release_version=5)
+        self.output_directory = tempfile.mkdtemp()
+        for directory in ('logs', 'eva', 'dbsnp'):
+            os.makedirs(os.path.join(self.output_directory, directory))
+        for taxonomy in (9913, 9940):
+            prefix = f'GCA_000000001.1_{taxonomy}'
+            for resource, output_file in (
+                    ('vcf_extractor.log', os.path.join('logs', f'{prefix}_vcf_extractor.log')),
+                    ('remapped_counts.yml', os.path.join('eva', f'{prefix}_eva_remapped_counts.yml')),
+                    ('remapped_counts.yml', os.path.join('dbsnp', f'{prefix}_dbsnp_remapped_counts.yml')),
+                    ('vcf_ingestion.log', os.path.join('logs', f'{prefix}_eva_remapped.vcf_ingestion.log')),
+                    ('vcf_ingestion.log', os.path.join('logs', f'{prefix}_dbsnp_remapped.vcf_ingestion.log'))):
+                shutil.copy(os.path.join(self.resources_folder, resource),
+                            os.path.join(self.output_directory, output_file))
+
+    def tearDown(self):
+        shutil.rmtree(self.output_directory)
+
+    def test_counts_written_in_one_round_trip(self):
+        connection = FakeConnection()
+        with patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle', return_value=connection):
+            self.remapping_job.count_variants_from_logs(self.output_directory, 'GCA_000000001.1', [9913, 9940])
+            # One UPDATE and one commit for the four records
+            assert self.remapping_job.metadata_session.round_trips == 2
+            self.remapping_job.close()
+        assert len(connection.statements) == 1
+        query = connection.statements[0][0]
+        for taxonomy in (9913, 9940):
+            for source, nb_extracted in (('EVA', 7147), ('DBSNP', 0)):
+                assert f"(5, 'GCA_000000001.1', {taxonomy}, '{source}', {nb_extracted}::bigint, 7002::bigint, " \
+                       f"7002::bigint, '{{" in query
+        assert query.count('"Too many alignments": 2170') == 4
+
+    def test_counts_of_all_source_assemblies_written_at_once(self):
+        for file_path in glob.glob(os.path.join(self.output_directory, '*', 'GCA_000000001.1_9940_*')):
+            shutil.copy(file_path, file_path.replace('GCA_000000001.1_9940_', 'GCA_000000002.1_9940_'))
+        connection = FakeConnection()
+        with patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle', return_value=connection):
+            self.remapping_job.count_all_variants_from_logs(
+                self.output_directory, [('GCA_000000001.1', [9913, 9940]), ('GCA_000000002.1', [9940])]
+            )
+            self.remapping_job.close()
+        assert len(connection.statements) == 1
+        query = connection.statements[0][0]
+        assert query.count("'EVA', 7147::bigint") == 3
+        assert "(5, 'GCA_000000002.1', 9940, 'DBSNP', 0::bigint" in query
+
+
+class TestLoadTracker(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self):
+        config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
+        load_config(config_file)
+        self.remapping_job = AssemblyIngestionJob(taxonomy=9913, target_assembly='GCA_000003055.3', release_version=5)
+        self.cache_directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+
+    def test_scientific_names_prefetched(self):
+        lookup = Mock(side_effect={9913: 'Bos taurus', 9940: 'Ovis aries'}.get)
+        self.remapping_job.taxonomy_name_cache = TaxonomyNameCache(
+            os.path.join(self.cache_directory, 'taxonomy_names.json'), lookup=lookup
+        )
+        connection = FakeConnection(results=[
+            [('GCA_000000001.1', 9913, 'DBSNP', 25000)],  # variant counts from previous remappings
+        ])
+        with patch.object(AssemblyIngestionJob, 'taxonomies', new=[9913, 9940]), \
+                patch.object(self.remapping_job, 'get_job_information_from_tracker', return_value=[]), \
+                patch.object(self.remapping_job, 'get_source_assemblies_and_projects', return_value=[
+                    ('GCA_000000001.1', 9913, ['PRJEB1']), ('GCA_000000002.1', 9940, ['PRJEB2', 'PRJEB3'])
+                ]), \
+                patch.object(self.remapping_job, 'get_source_assemblies_and_num_studies_dbsnp', return_value=[
+                    ('GCA_000000001.1', 9913, 4)
+                ]), \
+                patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle', return_value=connection):
+            self.remapping_job.load_tracker()
+            self.remapping_job.close()
+        assert sorted(call.args[0] for call in lookup.call_args_list) == [9913, 9940]
+        insert_query = connection.statements[1][0]
+        assert "('EVA',9940,'Ovis aries','GCA_000000002.1','GCA_000003055.3',1,5,2,1,NULL,'Pending')" in insert_query
+        assert "('DBSNP',9913,'Bos taurus','GCA_000000001.1','GCA_000003055.3',1,5,4,25000,NULL,'Pending')" in \
+            insert_query
+        assert insert_query.count("'Bos taurus'") == 2
+
+
+class TestTrackerSnapshotInJob(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self):
+        config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
+        load_config(config_file)
+        self.remapping_job = AssemblyIngestionJob(taxonomy=9913, target_assembly='GCA_000003055.3', release_version=5)
+
+    def test_tracker_queried_once(self):
+        pending_rows = [
+            ('EVA', 9913, 'Cattle', 'GCA_000000001.1', 'GCA_000003055.3', 1, 'Pending', None, None, None, 1000),
+            ('DBSNP', 9913, 'Cattle', 'GCA_000000001.1', 'GCA_000003055.3', 1, 'Pending', None, None, None, 1000),
+        ]
+        completed_rows = [row[:6] + ('Completed', None, None, None, 1010) for row in pending_rows]
+        connection = FakeConnection(results=[
+            [(9913,)],  # taxonomies
+            pending_rows,  # tracker rows
+            completed_rows,  # status update
+            [(2, 2020)],  # fingerprint
+        ])
+        with patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle', return_value=connection):
+            source_assemblies_and_taxonomies = self.remapping_job.get_incomplete_assemblies_and_taxonomies()
+            self.remapping_job.set_status_end(source_assemblies_and_taxonomies)
+            assert self.remapping_job.get_incomplete_assemblies_and_taxonomies() == []
+            self.remapping_job.close()
+        assert source_assemblies_and_taxonomies == [('GCA_000000001.1', [9913])]
+        assert 'RETURNING tracker.source' in connection.statements[2][0]
+        assert len(connection.statements) == 4
+
+
+class TestProcessAllAssemblies(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self):
+        config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
+        load_config(config_file)
+        self.base_directory = tempfile.mkdtemp()
+        cfg.content['remapping'] = {'base_directory': self.base_directory}
+        cfg.content['genome_downloader'] = {'output_directory': self.base_directory}
+        for part in ['executable', 'nextflow', 'jar']:
+            cfg.content[part] = {}
+        cfg.content['executable']['nextflow'] = 'nextflow'
+        self.remapping_job = AssemblyIngestionJob(taxonomy=9913, target_assembly='GCA_000003055.3', release_version=5)
+
+    def tearDown(self):
+        shutil.rmtree(self.base_directory)
+
+    def test_nextflow_runs_in_taxonomy_directory(self):
+        current_directory = os.getcwd()
+        source_assemblies_and_taxonomies = [('GCA_000000001.1', [9913])]
+        with patch.object(self.remapping_job, 'set_status'), \
+                patch.object(self.remapping_job, 'scientific_name', return_value='Bos taurus'), \
+                patch.object(self.remapping_job, 'properties_generator') as mock_properties_generator, \
+                patch('eva_assembly_ingestion.assembly_ingestion_job.run_command_with_output') as mock_run:
+            for method in ('get_remapping_extraction_properties', 'get_remapping_ingestion_properties',
+                           'get_clustering_properties'):
+                getattr(mock_properties_generator, method).return_value = ''
+            self.remapping_job.process_all_assemblies(source_assemblies_and_taxonomies, resume=False)
+        taxonomy_directory = os.path.join(self.base_directory, '9913')
+        command = mock_run.call_args[0][1]
+        assert command.startswith(f'cd {taxonomy_directory} && nextflow ')
+        assert f"-c {os.path.join(taxonomy_directory, 'remapping_trace.config')}" in command
+        assert os.getcwd() == current_directory
+        with open(os.path.join(taxonomy_directory, 'remap_cluster_config.yaml')) as open_file:
+            remap_cluster_config = yaml.safe_load(open_file)
+        assert remap_cluster_config['mongo_ingestion_lock'] == os.path.join(self.base_directory, 'mongo_ingestion.lock')
+
+    def test_status_updated_from_nextflow_events(self):
+        source_assemblies_and_taxonomies = [('GCA_000000001.1', [9913]), ('GCA_000000002.1', [9913, 9940])]
+
+        def run_nextflow(name, command):
+            weblog_url = command.split('-with-weblog ')[1].split()[0]
+            for process, tag, status in [
+                ('backpropagate_clusters', 'GCA_000000001.1 9913', 'COMPLETED'),
+                ('ingest_vcf_into_mongo', 'GCA_000000002.1 9940', 'FAILED'),
+            ]:
+                event = {'event': 'process_completed', 'trace': {'process': process, 'tag': tag, 'status': status}}
+                urllib.request.urlopen(weblog_url, data=json.dumps(event).encode()).read()
+            raise subprocess.CalledProcessError(1, command)
+
+        with patch.object(self.remapping_job, 'set_status') as mock_set_status, \
+                patch.object(self.remapping_job, 'scientific_name', return_value='Bos taurus'), \
+                patch.object(self.remapping_job, 'properties_generator') as mock_properties_generator, \
+                patch('eva_assembly_ingestion.assembly_ingestion_job.run_command_with_output',
+                      side_effect=run_nextflow):
+            for method in ('get_remapping_extraction_properties', 'get_remapping_ingestion_properties',
+                           'get_clustering_properties'):
+                getattr(mock_properties_generator, method).return_value = ''
+            with self.assertRaises(subprocess.CalledProcessError):
+                self.remapping_job.process_all_assemblies(source_assemblies_and_taxonomies, resume=False)
+        statuses = [(call[0][0], call[0][1]) for call in mock_set_status.call_args_list]
+        assert statuses == [
+            (source_assemblies_and_taxonomies, 'Started'),
+            ([('GCA_000000001.1', [9913])], 'Completed'),
+            ([('GCA_000000002.1', [9940])], 'Failed'),
+            # The source assembly completed before the failure is not marked as failed
+            ([('GCA_000000002.1', [9913, 9940])], 'Failed'),
         ]
-        assert sorted(captured_queries) == sorted(expected_queries)
+
+    def _process_all_assemblies_without_profile(self, run_nextflow):
+        with patch.object(self.remapping_job, 'set_status') as mock_set_status, \
+                patch.object(self.remapping_job, 'scientific_name', return_value='Bos taurus'), \
+                patch.object(self.remapping_job, 'properties_generator') as mock_properties_generator, \
+                patch.object(self.remapping_job, 'save_task_profile',
+                             side_effect=ValueError('column "task_profile" does not exist')), \
+                patch.object(self.remapping_job, 'save_step_metrics',
+                             side_effect=PermissionError('Permission denied')), \
+                patch('eva_assembly_ingestion.assembly_ingestion_job.run_command_with_output',
+                      side_effect=run_nextflow):
+            for method in ('get_remapping_extraction_properties', 'get_remapping_ingestion_properties',
+                           'get_clustering_properties'):
+                getattr(mock_properties_generator, method).return_value = ''
+            self.remapping_job.process_all_assemblies([('GCA_000000001.1', [9913])], resume=False)
+        return [call[0][1] for call in mock_set_status.call_args_list]
+
+    def test_profile_failure_does_not_stop_completion(self):
+        statuses = self._process_all_assemblies_without_profile(lambda name, command: None)
+        assert statuses == ['Started', 'Completed']
+
+    def test_profile_failure_does_not_hide_pipeline_failure(self):
+        def run_nextflow(name, command):
+            raise subprocess.CalledProcessError(1, command)
+        with self.assertRaises(subprocess.CalledProcessError):
+            self._process_all_assemblies_without_profile(run_nextflow)
+
+    def test_source_assemblies_run_longest_first(self):
+        self.remapping_job.cost_planner = Mock()
+        plan = self.remapping_job.cost_planner.plan.return_value
+        plan.source_assemblies_and_taxonomies = [('GCA_000000002.1', [9913]), ('GCA_000000001.1', [9913])]
+        plan.report_lines.return_value = ['Expected critical path: 1.00 hours, total: 3.00 core hours']
+        with patch.object(self.remapping_job, 'get_incomplete_assemblies_and_taxonomies',
+                          return_value=[('GCA_000000001.1', [9913]), ('GCA_000000002.1', [9913])]), \
+                patch.object(self.remapping_job, 'process_all_assemblies') as mock_process_all_assemblies:
+            self.remapping_job.run_remapping_and_clustering(resume=False)
+        plan.report_lines.assert_called_once_with()
+        plan.report.assert_not_called()
+        mock_process_all_assemblies.assert_called_once_with(
+            [('GCA_000000002.1', [9913]), ('GCA_000000001.1', [9913])], False
+        )
+
+    def test_source_assemblies_run_in_tracker_order_without_plan(self):
+        self.remapping_job.cost_planner = Mock()
+        self.remapping_job.cost_planner.plan.side_effect = ValueError('column "task_profile" does not exist')
+        with patch.object(self.remapping_job, 'get_incomplete_assemblies_and_taxonomies',
+                          return_value=[('GCA_000000001.1', [9913]), ('GCA_000000002.1', [9913])]), \
+                patch.object(self.remapping_job, 'process_all_assemblies') as mock_process_all_assemblies:
+            self.remapping_job.run_remapping_and_clustering(resume=False)
+        mock_process_all_assemblies.assert_called_once_with(
+            [('GCA_000000001.1', [9913]), ('GCA_000000002.1', [9913])], False
+        )
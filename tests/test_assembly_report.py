@@ -0,0 +1,70 @@
+import filecmp
+import os
+import tempfile
+import unittest
+from csv import DictReader, DictWriter, excel_tab
+
+from eva_assembly_ingestion.assembly_report import AssemblyReport
+
+
+def read_with_dict_reader(assembly_report_path):
+    headers = None
+    with open(assembly_report_path) as open_file:
+        for line in open_file:
+            if line.lower().startswith("# sequence-name") and "sequence-role" in line.lower():
+                headers = line.strip().split('\t')
+                break
+        return headers, list(DictReader(open_file, fieldnames=headers, dialect=excel_tab))
+
+
+class TestAssemblyReport(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        self.assembly_report_path = os.path.join(self.resources_folder, 'GCA_000003055.3_assembly_report.txt')
+        self.report = AssemblyReport.parse(self.assembly_report_path)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_rows_match_dict_reader(self):
+        headers, rows = read_with_dict_reader(self.assembly_report_path)
+        assert self.report.headers == headers
+        assert len(self.report) == len(rows)
+        assert list(self.report) == rows
+        assert self.report[-1] == rows[-1]
+
+    def test_short_rows_match_dict_reader(self):
+        short_report_path = os.path.join(self.tmp_dir.name, 'short_report.txt')
+        with open(short_report_path, 'w') as open_file:
+            open_file.write('# Sequence-Name\tSequence-Role\tGenBank-Accn\nchr1\tassembled-molecule\n\nchr2\n')
+        headers, rows = read_with_dict_reader(short_report_path)
+        assert list(AssemblyReport.parse(short_report_path)) == rows
+
+    def test_indexes(self):
+        assert self.report.get_row_by('GenBank-Accn', 'GK000030.2')['# Sequence-Name'] == 'ChrX'
+        assert self.report.get_row_by('RefSeq-Accn', 'AC_000158.1')['GenBank-Accn'] == 'GK000001.2'
+        assert self.report.get_row_by('# Sequence-Name', 'Unknown') is None
+        assert 'GK000001.2' in self.report.genbank_accessions
+
+    def test_extend(self):
+        extended_report = self.report.extend([{'# Sequence-Name': 'AY526085.1', 'GenBank-Accn': 'AY526085.1'}])
+        assert len(extended_report) == len(self.report) + 1
+        assert extended_report[-1] == {'# Sequence-Name': 'AY526085.1', 'GenBank-Accn': 'AY526085.1'}
+        assert 'AY526085.1' in extended_report.genbank_accessions
+        assert 'AY526085.1' not in self.report.genbank_accessions
+
+    def test_write_identical_to_dict_writer(self):
+        additional_rows = [{'# Sequence-Name': 'AY526085.1', 'Sequence-Role': 'scaffold',
+                            'GenBank-Accn': 'AY526085.1', 'Relationship': '<>'}]
+        expected_output = os.path.join(self.tmp_dir.name, 'expected.txt')
+        headers, rows = read_with_dict_reader(self.assembly_report_path)
+        with open(expected_output, 'w') as open_output:
+            writer = DictWriter(open_output, fieldnames=headers, dialect=excel_tab, restval='na')
+            writer.writeheader()
+            for row in rows + additional_rows:
+                writer.writerow(row)
+        output = os.path.join(self.tmp_dir.name, 'output.txt')
+        self.report.extend(additional_rows).write(output)
+        assert filecmp.cmp(expected_output, output, shallow=False)
@@ -0,0 +1,75 @@
+import gzip
+import os
+import struct
+import tempfile
+import unittest
+
+from eva_assembly_ingestion.bgzf import BgzfWriter, BGZF_BLOCK_SIZE, BGZF_EOF, is_bgzf, is_gzipped, open_binary, \
+    read_block_offsets, write_gzi
+
+
+class TestBgzf(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.bgzf_path = os.path.join(self.tmp_dir.name, 'output.fa.gz')
+        self.content = b''.join(b'>chr%d\n' % i + b'ACGTN' * 20000 + b'\n' for i in range(3))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write_bgzf(self, chunks):
+        with open(self.bgzf_path, 'wb') as open_file, BgzfWriter(open_file) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+        return writer
+
+    def test_write_bgzf(self):
+        writer = self._write_bgzf([self.content[:10], self.content[10:150000], self.content[150000:]])
+        assert is_gzipped(self.bgzf_path)
+        assert is_bgzf(self.bgzf_path)
+        with gzip.open(self.bgzf_path, 'rb') as open_file:
+            assert open_file.read() == self.content
+        with open(self.bgzf_path, 'rb') as open_file:
+            assert open_file.read().endswith(BGZF_EOF)
+        # All the blocks but the last are full
+        nb_blocks = -(-len(self.content) // BGZF_BLOCK_SIZE)
+        assert len(writer.block_offsets) == nb_blocks - 1
+        assert [uncompressed for _, uncompressed in writer.block_offsets] == \
+            [BGZF_BLOCK_SIZE * i for i in range(1, nb_blocks)]
+
+    def test_read_block_offsets(self):
+        writer = self._write_bgzf([self.content])
+        assert read_block_offsets(self.bgzf_path) == writer.block_offsets
+
+    def test_block_offsets_point_to_blocks(self):
+        writer = self._write_bgzf([self.content])
+        with open(self.bgzf_path, 'rb') as open_file:
+            compressed = open_file.read()
+        for compressed_offset, uncompressed_offset in writer.block_offsets:
+            block = gzip.decompress(compressed[compressed_offset:])
+            assert block == self.content[uncompressed_offset:]
+
+    def test_write_gzi(self):
+        gzi_path = self.bgzf_path + '.gzi'
+        write_gzi([(100, 65280), (200, 130560)], gzi_path)
+        with open(gzi_path, 'rb') as open_file:
+            assert struct.unpack('<5Q', open_file.read()) == (2, 100, 65280, 200, 130560)
+
+    def test_plain_file(self):
+        plain_path = os.path.join(self.tmp_dir.name, 'plain.fa')
+        with open(plain_path, 'wb') as open_file:
+            open_file.write(self.content)
+        assert not is_gzipped(plain_path)
+        assert not is_bgzf(plain_path)
+        with open_binary(plain_path) as open_file:
+            assert open_file.read() == self.content
+
+    def test_plain_gzip_is_not_bgzf(self):
+        gzip_path = os.path.join(self.tmp_dir.name, 'plain.fa.gz')
+        with gzip.open(gzip_path, 'wb') as open_file:
+            open_file.write(self.content)
+        assert is_gzipped(gzip_path)
+        assert not is_bgzf(gzip_path)
+        with open_binary(gzip_path) as open_file:
+            assert open_file.read() == self.content
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import time
+import unittest
+
+from eva_assembly_ingestion.contig_cache import ContigSequenceCache
+
+
+class TestContigSequenceCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ContigSequenceCache(self.tmp_dir.name, max_size=100)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_put_and_get(self):
+        self.cache.put('AY526085.1', '>AY526085.1\nACGT\n')
+        assert self.cache.get('AY526085.1') == '>AY526085.1\nACGT\n'
+        assert self.cache.get('AY526086.1') is None
+        assert self.cache.get_many(['AY526085.1', 'AY526086.1']) == {'AY526085.1': '>AY526085.1\nACGT\n'}
+
+    def test_unversioned_accessions_not_cached(self):
+        self.cache.put('AY526085', '>AY526085\nACGT\n')
+        assert os.listdir(self.tmp_dir.name) == []
+        assert self.cache.get('AY526085') is None
+
+    def test_corrupted_entry_is_removed(self):
+        self.cache.put('AY526085.1', '>AY526085.1\nACGT\n')
+        with open(os.path.join(self.tmp_dir.name, 'AY526085.1.fa'), 'a') as open_file:
+            open_file.write('TT\n')
+        assert self.cache.get('AY526085.1') is None
+        assert not os.path.exists(os.path.join(self.tmp_dir.name, 'AY526085.1.fa'))
+
+    def test_evict_least_recently_used(self):
+        sequences = {f'AY00000{i}.1': f'>AY00000{i}.1\n' + 'A' * 30 + '\n' for i in range(3)}
+        for i, (accession, sequence) in enumerate(sequences.items()):
+            self.cache.put(accession, sequence)
+            # Make the access times distinct
+            past_time = time.time() - 100 + i
+            os.utime(os.path.join(self.tmp_dir.name, accession + '.fa'), (past_time, past_time))
+        # Reading the oldest entry makes it the most recently used
+        assert self.cache.get('AY000000.1')
+        self.cache.put('AY000003.1', '>AY000003.1\n' + 'A' * 30 + '\n')
+        self.cache.evict()
+        assert self.cache.get('AY000001.1') is None
+        assert self.cache.get('AY000002.1') is None
+        assert self.cache.get('AY000000.1') is not None
+        assert self.cache.get('AY000003.1') is not None
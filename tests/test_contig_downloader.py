@@ -0,0 +1,96 @@
+import threading
+import time
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+from eva_assembly_ingestion.contig_downloader import ContigDownloadError, NCBIContigDownloader, TokenBucket, \
+    split_fasta_records
+
+
+class FakeEutilsHandler(BaseHTTPRequestHandler):
+    """Serve efetch requests from the sequences and failures configured on the server."""
+
+    def do_POST(self):
+        parameters = urllib.parse.parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+        accessions = parameters['id'][0].split(',')
+        self.server.requests.append(accessions)
+        if self.server.failures.get(accessions[0], 0) > 0:
+            self.server.failures[accessions[0]] -= 1
+            self.send_response(500)
+            self.end_headers()
+            return
+        response = ''.join(f'>{accession} sequence {accession}\nACGT\nAC\n\n' for accession in accessions
+                           if accession not in self.server.missing)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(response.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestNCBIContigDownloader(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.server = HTTPServer(('127.0.0.1', 0), FakeEutilsHandler)
+        self.server.requests = []
+        self.server.failures = {}
+        self.server.missing = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.patch_url = patch.object(NCBIContigDownloader, 'eutils_url',
+                                      f'http://127.0.0.1:{self.server.server_port}/')
+        self.patch_url.start()
+        self.downloader = NCBIContigDownloader(api_key='key', batch_size=2, retry_delay=0)
+
+    def tearDown(self) -> None:
+        self.patch_url.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_download_contigs_in_batches(self):
+        accessions = ['AY000001.1', 'AY000002.1', 'AY000003.1']
+        sequences = self.downloader.download_contigs(accessions)
+        assert sorted(self.server.requests) == [['AY000001.1', 'AY000002.1'], ['AY000003.1']]
+        assert sequences['AY000003.1'] == '>AY000003.1 sequence AY000003.1\nACGT\nAC\n'
+        assert sorted(sequences) == accessions
+
+    def test_retry_only_failed_batches(self):
+        self.server.failures['AY000003.1'] = 2
+        sequences = self.downloader.download_contigs(['AY000001.1', 'AY000002.1', 'AY000003.1'])
+        assert len(sequences) == 3
+        assert self.server.requests.count(['AY000001.1', 'AY000002.1']) == 1
+        assert self.server.requests.count(['AY000003.1']) == 3
+
+    def test_missing_sequence_fails(self):
+        self.server.missing.add('AY000002.1')
+        with self.assertRaises(ContigDownloadError) as context:
+            self.downloader.download_contigs(['AY000001.1', 'AY000002.1', 'AY000003.1'])
+        # The failed batch is split, so that only the missing accession is retried until the last attempt
+        assert context.exception.failed_accessions == ['AY000002.1']
+        assert 'AY000002.1' in str(context.exception)
+        assert sorted(context.exception.sequences) == ['AY000001.1', 'AY000003.1']
+        assert self.server.requests.count(['AY000001.1', 'AY000002.1']) == 1
+        assert self.server.requests.count(['AY000001.1']) == 1
+        assert self.server.requests.count(['AY000002.1']) == self.downloader.max_attempts - 1
+
+
+def test_download_contig_from_ncbi():
+    sequences = NCBIContigDownloader().download_contigs(['AY526085.1'])
+    assert list(sequences) == ['AY526085.1']
+    assert sequences['AY526085.1'].startswith('>AY526085.1 ')
+
+
+def test_split_fasta_records():
+    records = split_fasta_records('>A.1 desc\nAC\n\nGT\n>B.1\nTT')
+    assert records == {'A.1': '>A.1 desc\nAC\nGT\n', 'B.1': '>B.1\nTT\n'}
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # The first token is available immediately and the next four need 1/20s each
+    assert time.monotonic() - start >= 0.19
@@ -0,0 +1,98 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from eva_assembly_ingestion.cost_planner import CostModel, CostPlanner, RemappingPlan, SourceAssemblyCost, \
+    DEFAULT_NB_VARIANTS
+from eva_assembly_ingestion.db_session import MetadataSession
+from fake_postgres import FakeConnection
+
+task_profile = [
+    {'process': 'retrieve_source_genome', 'realtime_ms': 100000, 'cpu_percent': 100},
+    {'process': 'extract_vcf_from_mongo', 'realtime_ms': 400000, 'cpu_percent': 200},
+    {'process': 'remap_variants', 'realtime_ms': 300000, 'cpu_percent': 100},
+    {'process': 'ingest_vcf_into_mongo', 'realtime_ms': 300000, 'cpu_percent': None},
+]
+
+
+def cost(source_assembly, taxonomy, wall_seconds, ingestion_seconds=0, core_seconds=0):
+    return SourceAssemblyCost(source_assembly, taxonomy, 1000, True, wall_seconds, ingestion_seconds, core_seconds)
+
+
+def test_cost_model_from_task_profiles():
+    cost_model = CostModel.from_task_profiles([(1000000, task_profile), (0, task_profile)])
+    assert cost_model.fixed_seconds == 100
+    assert cost_model.seconds_per_variant == pytest.approx(1e-3)
+    assert cost_model.ingestion_seconds_per_variant == pytest.approx(3e-4)
+    assert cost_model.core_seconds_per_variant == pytest.approx(1.4e-3)
+    assert cost_model.estimate('GCA_000000001.1', 9913, 2000000) == (
+        'GCA_000000001.1', 9913, 2000000, True, pytest.approx(2100), pytest.approx(600), pytest.approx(2900)
+    )
+
+
+def test_cost_model_without_profiles():
+    assert vars(CostModel.from_task_profiles([])) == vars(CostModel())
+
+
+def test_plan_longest_first():
+    plan = RemappingPlan([
+        cost('GCA_000000001.1', 9913, 100), cost('GCA_000000002.1', 9913, 300),
+        cost('GCA_000000001.1', 9940, 250), cost('GCA_000000003.1', 9913, 100),
+    ])
+    assert plan.source_assemblies_and_taxonomies == [
+        ('GCA_000000001.1', [9940, 9913]), ('GCA_000000002.1', [9913]), ('GCA_000000003.1', [9913])
+    ]
+
+
+def test_plan_critical_path_and_core_hours():
+    plan = RemappingPlan([
+        cost('GCA_000000001.1', 9913, 3600, ingestion_seconds=3000, core_seconds=7200),
+        cost('GCA_000000002.1', 9913, 1800, ingestion_seconds=1200, core_seconds=3600),
+    ])
+    # Ingestions run one at a time
+    assert plan.critical_path_seconds == 4200
+    assert plan.total_core_hours == 3
+    assert RemappingPlan([]).critical_path_seconds == 0
+
+
+def test_plan_report_lines():
+    plan = RemappingPlan([
+        cost('GCA_000000001.1', 9913, 3600, core_seconds=7200),
+        SourceAssemblyCost('GCA_000000002.1', 9913, DEFAULT_NB_VARIANTS, False, 1800, 0, 3600),
+    ])
+    assert plan.report_lines() == [
+        '| Source Assembly | Taxonomy | Variants | Expected Hours | Core Hours |',
+        '| GCA_000000001.1 |     9913 |     1000 |            1.0 |        2.0 |',
+        '| GCA_000000002.1 |     9913 | ~1000000 |            0.5 |        1.0 |',
+        'Expected critical path: 1.00 hours, total: 3.00 core hours',
+    ]
+
+
+def test_planner_uses_variant_counts():
+    connection = FakeConnection(results=[
+        [('GCA_000000001.1', 9913, 'EVA', 1000), ('GCA_000000001.1', 9913, 'DBSNP', 9000)],  # variant counts
+        [('GCA_000000009.1', 9913, 4, 1000000, task_profile)],  # task profiles
+    ])
+    with patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle', return_value=connection):
+        metadata_session = MetadataSession('development', 'settings.xml')
+        planner = CostPlanner(metadata_session, 'eva_progress_tracker.remapping_tracker', 'GCA_000003055.3')
+        plan = planner.plan([('GCA_000000001.1', [9913]), ('GCA_000000002.1', [9913]),
+                             ('GCA_000003055.3', [9913])])
+        metadata_session.close()
+    costs = {(c.source_assembly, c.taxonomy): c for c in plan.costs}
+    assert costs[('GCA_000000001.1', 9913)].nb_variants == 10000
+    assert costs[('GCA_000000002.1', 9913)].nb_variants == DEFAULT_NB_VARIANTS
+    assert not costs[('GCA_000000002.1', 9913)].variants_known
+    assert costs[('GCA_000003055.3', 9913)].wall_seconds == 0
+    # The source assembly never remapped is assumed to be the largest
+    assert [source_assembly for source_assembly, _ in plan.source_assemblies_and_taxonomies] == [
+        'GCA_000000002.1', 'GCA_000000001.1', 'GCA_000003055.3'
+    ]
+    assert connection.statements[0][1] == (['GCA_000000001.1', 'GCA_000000002.1', 'GCA_000003055.3'], [9913])
+
+
+def test_default_cost_model_without_task_profiles():
+    metadata_session = Mock()
+    metadata_session.connection.side_effect = ValueError('column "task_profile" does not exist')
+    planner = CostPlanner(metadata_session, 'eva_progress_tracker.remapping_tracker', 'GCA_000003055.3')
+    assert vars(planner.load_cost_model()) == vars(CostModel())
@@ -0,0 +1,53 @@
+import os
+
+from eva_assembly_ingestion.counts_collector import CountsCollector
+from eva_assembly_ingestion.parse_counts import load_remapping_counts
+from fake_postgres import FakeConnection
+
+
+def test_add_merges_records():
+    counts_collector = CountsCollector('eva_progress_tracker.remapping_tracker', 5)
+    counts_collector.add('GCA_000000001.1', 9913, 'EVA', nb_variant_extracted=10)
+    counts_collector.add('GCA_000000001.1', 9913, 'EVA', nb_variant_remapped=9)
+    counts_collector.add('GCA_000000001.1', 9913, 'DBSNP', nb_variant_extracted=3)
+    assert len(counts_collector) == 2
+    assert counts_collector.records[('GCA_000000001.1', 9913, 'EVA')] == {
+        'num_ss_extracted': 10, 'num_ss_remapped': 9, 'num_ss_ingested': None, 'remapping_breakdown': None
+    }
+
+
+def test_write_in_one_statement():
+    breakdown = load_remapping_counts(os.path.join(os.path.dirname(__file__), 'resources', 'remapped_counts.yml'))
+    counts_collector = CountsCollector('eva_progress_tracker.remapping_tracker', 5)
+    for taxonomy in (9913, 9940):
+        for source in ('EVA', 'DBSNP'):
+            counts_collector.add('GCA_000000001.1', taxonomy, source, nb_variant_extracted=7147,
+                                 nb_variant_remapped=7002, remapping_breakdown=breakdown)
+    connection = FakeConnection(results=[[('EVA', 9913)] * 4])
+    assert len(counts_collector.write(connection)) == 4
+    assert len(connection.statements) == 1
+    query, parameters = connection.statements[0]
+    assert parameters is None
+    assert query.startswith('UPDATE eva_progress_tracker.remapping_tracker AS tracker SET '
+                            'num_ss_extracted=COALESCE(new.num_ss_extracted, tracker.num_ss_extracted)')
+    assert "(5, 'GCA_000000001.1', 9940, 'DBSNP', 7147::bigint, 7002::bigint, NULL::bigint, '{" in query
+    assert '"Flank_2000": {"Flank unmapped": 3' in query
+    assert query.count('::jsonb') == 4
+
+
+def test_write_without_breakdown():
+    counts_collector = CountsCollector('eva_progress_tracker.remapping_tracker', 5)
+    counts_collector.add('GCA_000000001.1', 9913, 'EVA', nb_variant_extracted=10, nb_variant_remapped=9)
+    connection = FakeConnection(results=[[('EVA', 9913)]])
+    counts_collector.write(connection)
+    query, _ = connection.statements[0]
+    # The trackers without the remapping_breakdown column can still be updated
+    assert 'remapping_breakdown' not in query
+    assert '::jsonb' not in query
+    assert "(5, 'GCA_000000001.1', 9913, 'EVA', 10::bigint, 9::bigint, NULL::bigint)" in query
+
+
+def test_write_nothing():
+    connection = FakeConnection()
+    assert CountsCollector('eva_progress_tracker.remapping_tracker', 5).write(connection) == []
+    assert connection.statements == []
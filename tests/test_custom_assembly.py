@@ -1,9 +1,23 @@
+import fcntl
+import filecmp
+import gzip
 import os
+import shutil
+import struct
+import tempfile
+import threading
 import unittest
 from unittest.mock import patch, PropertyMock
 
+from eva_assembly_ingestion.bgzf import BgzfWriter, is_bgzf, read_block_offsets
 from eva_assembly_ingestion.config import load_config
-from eva_assembly_ingestion.custom_assembly import CustomAssembly, CustomAssemblyFromDatabase
+from eva_assembly_ingestion.contig_cache import ContigSequenceCache
+from eva_assembly_ingestion.contig_downloader import ContigDownloadError, NCBIContigDownloader
+from eva_assembly_ingestion.custom_assembly import CustomAssembly, CustomAssemblyFromDatabase, \
+    CustomAssemblyFromRequiredContigs, generate_custom_assemblies, read_custom_assembly_manifest, \
+    read_required_contigs, write_required_contigs
+from eva_assembly_ingestion.fasta_utils import FastaHeaderIndex
+from eva_assembly_ingestion.sequence_digests import read_sequence_digests
 
 
 class TestCustomAssembly(unittest.TestCase):
@@ -29,7 +43,7 @@ class TestCustomAssembly(unittest.TestCase):
 
     def tearDown(self) -> None:
         for f in [self.assembly.output_assembly_report_path, self.assembly.output_assembly_fasta_path,
-                  os.path.join(self.resources_folder, 'AY526085.1.fa')]:
+                  FastaHeaderIndex.index_path_for(self.assembly.assembly_fasta_path)]:
             if os.path.exists(f):
                 os.remove(f)
 
@@ -42,12 +56,6 @@ class TestCustomAssembly(unittest.TestCase):
         }
         assert self.assembly.assembly_report_rows[0] == first_row
 
-    def test_download_contig_from_ncbi(self):
-        self.assembly.download_contig_from_ncbi('AY526085.1')
-        contig_file = os.path.join(self.resources_folder, 'AY526085.1.fa')
-        assert os.path.exists(contig_file)
-        assert CustomAssembly._get_contig_accessions_in_fasta(contig_file) == ['AY526085.1']
-
     def test_extended_report_rows(self):
         last_row = {'# Sequence-Name': 'AY526085.1', 'Sequence-Role': 'scaffold', 'GenBank-Accn': 'AY526085.1',
                     'Relationship': '=', 'RefSeq-Accn': 'RefSeq'}
@@ -84,6 +92,66 @@ class TestCustomAssembly(unittest.TestCase):
         # original file contains 30 sequences
         assert len(contigs) == 31
 
+    def test_construct_fasta_appends_downloaded_contigs(self):
+        with self.patch_required_contigs, \
+                patch.object(CustomAssembly, 'download_contigs_from_ncbi',
+                             return_value={'AY526085.1': '>AY526085.1 description\nACGT\n'}) as mock_download:
+            self.assembly.generate_fasta()
+        mock_download.assert_called_once_with(['AY526085.1'])
+        contigs = CustomAssembly._get_contig_accessions_in_fasta(self.assembly.output_assembly_fasta_path)
+        assert contigs[-1] == 'AY526085.1'
+        assert len(contigs) == 31
+
+    def test_construct_fasta_no_rename_copies_and_appends(self):
+        self.assembly.no_rename = True
+        with self.patch_required_contigs, \
+                patch.object(CustomAssembly, 'download_contigs_from_ncbi',
+                             return_value={'AY526085.1': '>AY526085.1 description\nACGT\n'}):
+            self.assembly.generate_fasta()
+        with open(self.assembly.assembly_fasta_path) as open_input:
+            expected_content = open_input.read() + '>AY526085.1 description\nACGT\n'
+        with open(self.assembly.output_assembly_fasta_path) as open_output:
+            assert open_output.read() == expected_content
+
+    def test_construct_fasta_no_rename_nothing_to_append(self):
+        self.assembly.no_rename = True
+        with self.patch_required_contigs_none:
+            self.assembly.generate_fasta()
+        assert os.path.islink(self.assembly.output_assembly_fasta_path)
+
+    def test_construct_fasta_interrupted(self):
+        with self.patch_required_contigs, \
+                patch.object(CustomAssembly, 'download_contigs_from_ncbi',
+                             return_value={'AY526085.1': '>AY526085.1 description\nACGT\n'}), \
+                patch('eva_assembly_ingestion.custom_assembly.write_all', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.assembly.generate_fasta()
+        # Neither the output nor the temporary file are left behind
+        assert not os.path.exists(self.assembly.output_assembly_fasta_path)
+        assert not [f for f in os.listdir(self.resources_folder) if f.endswith('.tmp')]
+
+    def test_download_contigs_uses_contig_cache(self):
+        with tempfile.TemporaryDirectory() as cache_directory:
+            cache = ContigSequenceCache(cache_directory)
+            cache.put('AY526085.1', '>AY526085.1\nACGT\n')
+            with patch.object(CustomAssembly, 'contig_cache', new_callable=PropertyMock(return_value=cache)), \
+                    patch.object(NCBIContigDownloader, 'download_contigs',
+                                 return_value={'AY526086.1': '>AY526086.1\nTT\n'}) as mock_download:
+                sequences = self.assembly.download_contigs_from_ncbi(['AY526085.1', 'AY526086.1'])
+            mock_download.assert_called_once_with(['AY526086.1'])
+            assert sequences == {'AY526085.1': '>AY526085.1\nACGT\n', 'AY526086.1': '>AY526086.1\nTT\n'}
+            assert cache.get('AY526086.1') == '>AY526086.1\nTT\n'
+
+    def test_download_contigs_caches_partial_download(self):
+        with tempfile.TemporaryDirectory() as cache_directory:
+            cache = ContigSequenceCache(cache_directory)
+            error = ContigDownloadError(['AY526086.1'], {'AY526085.1': '>AY526085.1\nACGT\n'})
+            with patch.object(CustomAssembly, 'contig_cache', new_callable=PropertyMock(return_value=cache)), \
+                    patch.object(NCBIContigDownloader, 'download_contigs', side_effect=error):
+                with self.assertRaises(ContigDownloadError):
+                    self.assembly.download_contigs_from_ncbi(['AY526085.1', 'AY526086.1'])
+            assert cache.get('AY526085.1') == '>AY526085.1\nACGT\n'
+
     def test_construct_fasta_from_report_only_rename(self):
         assert not os.path.exists(self.assembly.output_assembly_fasta_path)
         with self.patch_required_contigs_none:
@@ -108,6 +176,232 @@ class TestCustomAssembly(unittest.TestCase):
                     last_contig_name = line.strip().strip('>')
             assert last_contig_name == 'GK000030.2'
 
+    def test_rewrite_changing_names_block_copy_identical(self):
+        line_by_line_fasta = self.assembly.output_assembly_fasta_path + '.line'
+        try:
+            for contig_to_rename in [{'ChrX': 'GK000030.2'}, {'GK000001.2': 'Chr1', 'ChrX': 'GK000030.2'}, {}]:
+                CustomAssembly.rewrite_changing_names(self.assembly.assembly_fasta_path, line_by_line_fasta,
+                                                      contig_to_rename, block_copy=False)
+                CustomAssembly.rewrite_changing_names(self.assembly.assembly_fasta_path,
+                                                      self.assembly.output_assembly_fasta_path, contig_to_rename)
+                assert filecmp.cmp(line_by_line_fasta, self.assembly.output_assembly_fasta_path, shallow=False)
+        finally:
+            os.remove(line_by_line_fasta)
+
+
+class TestIncrementalCustomAssembly(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
+        load_config(config_file)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.genome_dir = os.path.join(self.tmp_dir.name, 'genome')
+        self.work_dir = os.path.join(self.tmp_dir.name, 'work')
+        os.makedirs(self.genome_dir)
+        os.makedirs(self.work_dir)
+        for file_name in ['GCA_000003055.3.fa', 'GCA_000003055.3_assembly_report.txt']:
+            shutil.copy(os.path.join(self.resources_folder, file_name), self.genome_dir)
+            os.symlink(os.path.join(self.genome_dir, file_name), os.path.join(self.work_dir, file_name))
+        self.required_contigs = [{'genbank': 'AY526085.1', 'refseq': 'RefSeq'}]
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _generate(self, required_contigs):
+        assembly = CustomAssemblyFromRequiredContigs(
+            'GCA_000003055.3', os.path.join(self.work_dir, 'GCA_000003055.3.fa'),
+            os.path.join(self.work_dir, 'GCA_000003055.3_assembly_report.txt'), required_contigs, incremental=True
+        )
+        with patch.object(CustomAssembly, 'download_contigs_from_ncbi',
+                          return_value={'AY526085.1': '>AY526085.1 description\nACGT\n'}), \
+                patch.object(CustomAssembly, 'generate_fasta', autospec=True,
+                             side_effect=CustomAssembly.generate_fasta) as mock_generate_fasta:
+            assembly.generate()
+        return assembly, mock_generate_fasta.called
+
+    def test_generate_builds_next_to_genome_and_links(self):
+        assembly, built = self._generate(self.required_contigs)
+        assert built
+        assert assembly.output_assembly_fasta_path == os.path.join(self.genome_dir, 'GCA_000003055.3_custom.fa')
+        assert os.path.isfile(assembly.build_manifest_path)
+        linked_fasta = os.path.join(self.work_dir, 'GCA_000003055.3_custom.fa')
+        linked_report = os.path.join(self.work_dir, 'GCA_000003055.3_assembly_report_custom.txt')
+        assert os.readlink(linked_fasta) == assembly.output_assembly_fasta_path
+        assert os.readlink(linked_report) == assembly.output_assembly_report_path
+        assert CustomAssembly._get_contig_accessions_in_fasta(linked_fasta)[-1] == 'AY526085.1'
+
+    def test_generate_skips_when_unchanged(self):
+        self._generate(self.required_contigs)
+        assembly, built = self._generate(self.required_contigs)
+        assert not built
+        assert assembly.is_up_to_date()
+
+    def test_generate_rebuilds_when_inputs_change(self):
+        self._generate(self.required_contigs)
+        # Different required contigs
+        _, built = self._generate([])
+        assert built
+        # Same required contigs but a modified report
+        self._generate([])
+        with open(os.path.join(self.genome_dir, 'GCA_000003055.3_assembly_report.txt'), 'a') as open_file:
+            open_file.write('\n')
+        _, built = self._generate([])
+        assert built
+
+    def test_generate_waits_for_concurrent_build(self):
+        lock_path = os.path.join(self.genome_dir, 'GCA_000003055.3_custom.fa.lock')
+        with open(lock_path, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            build = threading.Thread(target=self._generate, args=(self.required_contigs,))
+            build.start()
+            build.join(0.2)
+            # The build waits for the lock held by the other run
+            assert build.is_alive()
+            assert not os.path.exists(os.path.join(self.genome_dir, 'GCA_000003055.3_custom.fa.manifest.json'))
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        build.join()
+        assert os.path.exists(os.path.join(self.genome_dir, 'GCA_000003055.3_custom.fa.manifest.json'))
+        assert os.path.islink(os.path.join(self.work_dir, 'GCA_000003055.3_custom.fa'))
+
+    def test_generate_rebuilds_when_output_changed(self):
+        assembly, _ = self._generate(self.required_contigs)
+        with open(assembly.output_assembly_fasta_path, 'a') as open_file:
+            open_file.write('>extra\nACGT\n')
+        _, built = self._generate(self.required_contigs)
+        assert built
+
+
+class TestCompressedCustomAssembly(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
+        load_config(config_file)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.plain_fasta = os.path.join(self.tmp_dir.name, 'GCA_000003055.3.fa')
+        self.compressed_fasta = os.path.join(self.tmp_dir.name, 'compressed', 'GCA_000003055.3.fa.gz')
+        self.report = os.path.join(self.tmp_dir.name, 'GCA_000003055.3_assembly_report.txt')
+        os.makedirs(os.path.dirname(self.compressed_fasta))
+        shutil.copy(os.path.join(self.resources_folder, 'GCA_000003055.3.fa'), self.plain_fasta)
+        shutil.copy(os.path.join(self.resources_folder, 'GCA_000003055.3_assembly_report.txt'), self.report)
+        with open(self.plain_fasta, 'rb') as open_input, open(self.compressed_fasta, 'wb') as open_output, \
+                BgzfWriter(open_output) as writer:
+            writer.write(open_input.read())
+        self.patch_required_contigs = patch.object(
+            CustomAssembly, 'required_contigs',
+            new_callable=PropertyMock(return_value=[{'genbank': 'AY526085.1', 'refseq': 'RefSeq'}])
+        )
+        self.patch_required_contigs_none = patch.object(
+            CustomAssembly, 'required_contigs', new_callable=PropertyMock(return_value=[])
+        )
+        self.patch_download = patch.object(CustomAssembly, 'download_contigs_from_ncbi',
+                                           return_value={'AY526085.1': '>AY526085.1 description\nACGT\n'})
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _assert_indexes_match(self, compressed_path):
+        uncompressed_path = os.path.join(self.tmp_dir.name, 'uncompressed.fa')
+        with gzip.open(compressed_path, 'rb') as open_input, open(uncompressed_path, 'wb') as open_output:
+            open_output.write(open_input.read())
+        with open(compressed_path + '.fai') as open_file:
+            fai_lines = open_file.readlines()
+        records = FastaHeaderIndex.build(uncompressed_path).records
+        assert fai_lines == [f'{r.name}\t{r.length}\t{r.sequence_offset}\t{r.line_bases}\t{r.line_width}\n'
+                             for r in records]
+        with open(compressed_path + '.gzi', 'rb') as open_file:
+            nb_blocks = struct.unpack('<Q', open_file.read(8))[0]
+            assert nb_blocks == len(read_block_offsets(compressed_path))
+
+    def test_output_assembly_fasta_path(self):
+        assembly = CustomAssembly('GCA_000003055.3', self.compressed_fasta, self.report)
+        assert assembly.output_assembly_fasta_path == self.compressed_fasta.replace('.fa.gz', '_custom.fa.gz')
+        assembly = CustomAssembly('GCA_000003055.3', self.plain_fasta, self.report)
+        assert assembly.output_assembly_fasta_path == self.plain_fasta.replace('.fa', '_custom.fa')
+        assembly = CustomAssembly('GCA_000003055.3', self.plain_fasta, self.report, bgzip_output=True)
+        assert assembly.output_assembly_fasta_path == self.plain_fasta.replace('.fa', '_custom.fa.gz')
+
+    def test_construct_compressed_fasta(self):
+        plain_assembly = CustomAssembly('GCA_000003055.3', self.plain_fasta, self.report)
+        compressed_assembly = CustomAssembly('GCA_000003055.3', self.compressed_fasta, self.report)
+        with self.patch_required_contigs, self.patch_download:
+            plain_assembly.generate_fasta()
+            compressed_assembly.generate_fasta()
+        assert is_bgzf(compressed_assembly.output_assembly_fasta_path)
+        with open(plain_assembly.output_assembly_fasta_path, 'rb') as open_plain, \
+                gzip.open(compressed_assembly.output_assembly_fasta_path, 'rb') as open_compressed:
+            assert open_plain.read() == open_compressed.read()
+        self._assert_indexes_match(compressed_assembly.output_assembly_fasta_path)
+
+    def test_construct_compressed_fasta_from_plain_fasta(self):
+        assembly = CustomAssembly('GCA_000003055.3', self.plain_fasta, self.report, no_rename=True,
+                                  bgzip_output=True)
+        with self.patch_required_contigs_none:
+            assembly.generate_fasta()
+        assert not os.path.islink(assembly.output_assembly_fasta_path)
+        with open(self.plain_fasta, 'rb') as open_plain, \
+                gzip.open(assembly.output_assembly_fasta_path, 'rb') as open_compressed:
+            assert open_plain.read() == open_compressed.read()
+        self._assert_indexes_match(assembly.output_assembly_fasta_path)
+
+    def test_construct_compressed_fasta_nothing_to_change(self):
+        assembly = CustomAssembly('GCA_000003055.3', self.compressed_fasta, self.report, no_rename=True)
+        with self.patch_required_contigs_none:
+            assembly.generate_fasta()
+        assert os.path.islink(assembly.output_assembly_fasta_path)
+        self._assert_indexes_match(assembly.output_assembly_fasta_path)
+
+
+class TestCustomAssemblyValidation(unittest.TestCase):
+    report_header = '# Sequence-Name\tSequence-Role\tAssigned-Molecule\tAssigned-Molecule-Location/Type\t' \
+                    'GenBank-Accn\tRelationship\tRefSeq-Accn\tAssembly-Unit\tSequence-Length\tUCSC-style-name\n'
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fasta = os.path.join(self.tmp_dir.name, 'GCA_000000001.1.fa')
+        self.report = os.path.join(self.tmp_dir.name, 'GCA_000000001.1_assembly_report.txt')
+        with open(self.fasta, 'w') as open_file:
+            open_file.write('>chr1\nACGT\nAC\n>chr2\nAC\n')
+        self.patch_required_contigs = patch.object(
+            CustomAssembly, 'required_contigs', new_callable=PropertyMock(return_value=[{'genbank': 'AY000001.1'}])
+        )
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write_report(self, chr2_length):
+        with open(self.report, 'w') as open_file:
+            open_file.write('# Assembly name:  test\n' + self.report_header)
+            open_file.write('chr1\tassembled-molecule\t1\tChromosome\tCM000001.1\t=\tNC_000001.1\tPrimary\t6\tna\n')
+            open_file.write(f'chr2\tassembled-molecule\t2\tChromosome\tCM000002.1\t=\tNC_000002.1\tPrimary\t'
+                            f'{chr2_length}\tna\n')
+
+    def _generate(self, downloaded_sequences, nb_processes=1):
+        assembly = CustomAssembly('GCA_000000001.1', self.fasta, self.report)
+        with self.patch_required_contigs, \
+                patch.object(CustomAssembly, 'download_contigs_from_ncbi', return_value=downloaded_sequences):
+            assembly.generate(validate=True, nb_processes=nb_processes)
+        return assembly
+
+    def test_validate(self):
+        self._write_report(2)
+        assembly = self._generate({'AY000001.1': '>AY000001.1\nACGTA\n'}, nb_processes=2)
+        digests = read_sequence_digests(assembly.output_digests_path)
+        assert [(digest.name, digest.length) for digest in digests] == \
+            [('CM000001.1', 6), ('CM000002.1', 2), ('AY000001.1', 5)]
+
+    def test_validate_length_mismatch(self):
+        self._write_report(3)
+        with self.assertRaises(ValueError):
+            self._generate({'AY000001.1': '>AY000001.1\nACGTA\n'})
+        assert not os.path.exists(self.fasta.replace('.fa', '_custom.fa.digests.tsv'))
+
+    def test_validate_missing_added_contig(self):
+        self._write_report(2)
+        with self.assertRaises(ValueError):
+            self._generate({'AY000001.1': '>AY000002.1\nACGTA\n'})
+
 
 class TestCustomAssemblyFromDatabase(unittest.TestCase):
     resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
@@ -119,10 +413,72 @@ class TestCustomAssemblyFromDatabase(unittest.TestCase):
         assembly_report_path = os.path.join(self.resources_folder, 'GCA_000003055.3_assembly_report.txt')
         assembly_fasta_path = os.path.join(self.resources_folder, 'GCA_000003055.3.fa')
         self.assembly = CustomAssemblyFromDatabase(assembly_accession, assembly_fasta_path, assembly_report_path)
-        self.patch_get_results = patch('eva_assembly_ingestion.custom_assembly.get_all_results_for_query',
+        self.patch_get_results = patch('eva_assembly_ingestion.custom_assembly.fetch_all',
                                        return_value=[('AY526085.1', 'RefSeq')])
         self.patch_get_conn = patch('eva_assembly_ingestion.custom_assembly.get_metadata_connection_handle')
 
     def test_get_required_contig(self):
-        with self.patch_get_results, self.patch_get_conn:
+        with self.patch_get_results as mock_query, self.patch_get_conn:
             assert self.assembly.required_contigs == [{'genbank': 'AY526085.1', 'refseq': 'RefSeq'}]
+        assert mock_query.call_args[0][2] == (['GCA_000003055.3'],)
+
+
+class TestCustomAssembliesInBatch(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        config_file = os.path.join(self.resources_folder, 'remapping_config.yml')
+        load_config(config_file)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.manifest_entries = []
+        for assembly_accession in ['GCA_000000001.1', 'GCA_000000002.1']:
+            fasta_path = os.path.join(self.tmp_dir.name, assembly_accession + '.fa')
+            report_path = os.path.join(self.tmp_dir.name, assembly_accession + '_assembly_report.txt')
+            shutil.copy(os.path.join(self.resources_folder, 'GCA_000003055.3.fa'), fasta_path)
+            shutil.copy(os.path.join(self.resources_folder, 'GCA_000003055.3_assembly_report.txt'), report_path)
+            self.manifest_entries.append((assembly_accession, fasta_path, report_path))
+        self.manifest = os.path.join(self.tmp_dir.name, 'manifest.tsv')
+        with open(self.manifest, 'w') as open_file:
+            for entry in self.manifest_entries:
+                open_file.write('\t'.join(entry) + '\n')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_read_custom_assembly_manifest(self):
+        assert read_custom_assembly_manifest(self.manifest) == self.manifest_entries
+
+    def test_required_contigs_for_assemblies(self):
+        with patch('eva_assembly_ingestion.custom_assembly.get_metadata_connection_handle'), \
+                patch('eva_assembly_ingestion.custom_assembly.fetch_all',
+                      return_value=[('GCA_000000001.1', 'AY526085.1', 'RefSeq')]) as mock_query:
+            required_contigs = CustomAssemblyFromDatabase.required_contigs_for_assemblies(
+                ['GCA_000000001.1', 'GCA_000000002.1'])
+        mock_query.assert_called_once()
+        assert 'assembly_accession = ANY(%s)' in mock_query.call_args[0][1]
+        assert mock_query.call_args[0][2] == (['GCA_000000001.1', 'GCA_000000002.1'],)
+        assert required_contigs == {'GCA_000000001.1': [{'genbank': 'AY526085.1', 'refseq': 'RefSeq'}],
+                                    'GCA_000000002.1': []}
+
+    def test_write_and_read_required_contigs(self):
+        required_contigs_path = os.path.join(self.tmp_dir.name, 'required_contigs.json')
+        with patch.object(CustomAssemblyFromDatabase, 'required_contigs_for_assemblies',
+                          return_value={'GCA_000000001.1': [{'genbank': 'AY526085.1', 'refseq': 'RefSeq'}],
+                                        'GCA_000000002.1': []}) as mock_required_contigs:
+            write_required_contigs(['GCA_000000001.1', 'GCA_000000002.1'], required_contigs_path)
+        mock_required_contigs.assert_called_once_with(['GCA_000000001.1', 'GCA_000000002.1'])
+        assert read_required_contigs(required_contigs_path, 'GCA_000000001.1') == [
+            {'genbank': 'AY526085.1', 'refseq': 'RefSeq'}]
+        assert read_required_contigs(required_contigs_path, 'GCA_000000002.1') == []
+        with self.assertRaises(ValueError):
+            read_required_contigs(required_contigs_path, 'GCA_000000003.1')
+
+    def test_generate_custom_assemblies(self):
+        with patch.object(CustomAssemblyFromDatabase, 'required_contigs_for_assemblies',
+                          return_value={'GCA_000000001.1': [], 'GCA_000000002.1': []}):
+            outputs = generate_custom_assemblies(self.manifest_entries, nb_processes=2)
+        for assembly_accession, fasta_path, report_path in self.manifest_entries:
+            output_fasta, output_report = outputs[assembly_accession]
+            assert output_fasta == fasta_path.replace('.fa', '_custom.fa')
+            assert CustomAssembly._get_contig_accessions_in_fasta(output_fasta)[-1] == 'GK000030.2'
+            assert os.path.islink(output_report)
@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from eva_assembly_ingestion.db_session import MetadataSession, execute, fetch_all
+from fake_postgres import FakeConnection
+
+
+class TestMetadataSession(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.connections = []
+        self.patch_connect = patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle',
+                                   side_effect=self._connect)
+        self.patch_connect.start()
+        self.session = MetadataSession('development', 'settings.xml', max_connections=2)
+
+    def tearDown(self) -> None:
+        self.session.close()
+        self.patch_connect.stop()
+
+    def _connect(self, profile, settings_file):
+        connection = FakeConnection(results=[[(1,), (2,)]] * 10)
+        self.connections.append(connection)
+        return connection
+
+    def test_connection_reused(self):
+        for _ in range(3):
+            with self.session.connection() as pg_conn:
+                assert fetch_all(pg_conn, 'SELECT id FROM table WHERE name=%s', ('a',)) == [(1,), (2,)]
+        assert len(self.connections) == 1
+        assert self.connections[0].statements == [('SELECT id FROM table WHERE name=%s', ('a',))] * 3
+        # One statement and one commit per transaction
+        assert self.session.round_trips == 6
+
+    def test_rollback_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.session.connection() as pg_conn:
+                execute(pg_conn, 'UPDATE table SET name=%s', ('a',))
+                raise ValueError('failed')
+        assert self.connections[0].commits == 0
+        assert self.connections[0].rollbacks == 1
+        # The connection goes back to the pool
+        with self.session.connection():
+            pass
+        assert len(self.connections) == 1
+
+    def test_nested_connections(self):
+        with self.session.connection() as first_conn, self.session.connection() as second_conn:
+            assert first_conn is not second_conn
+        assert len(self.connections) == 2
+
+    def test_pool_size_is_bounded(self):
+        borrowed = threading.Event()
+        release = threading.Event()
+
+        def hold_connection():
+            with self.session.connection():
+                borrowed.set()
+                release.wait()
+
+        threads = [threading.Thread(target=hold_connection) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        borrowed.wait()
+        waiting_thread = threading.Thread(target=hold_connection)
+        waiting_thread.start()
+        release.set()
+        for thread in threads + [waiting_thread]:
+            thread.join()
+        assert len(self.connections) == 2
+
+    def test_closed_connection_replaced(self):
+        with self.session.connection() as pg_conn:
+            pass
+        pg_conn.close()
+        with self.session.connection() as new_pg_conn:
+            assert new_pg_conn is not pg_conn
+        assert len(self.connections) == 2
+
+    def test_idle_connection_replaced(self):
+        session = MetadataSession('development', 'settings.xml', max_idle_seconds=0.05)
+        with session.connection() as pg_conn:
+            fetch_all(pg_conn, 'SELECT 1')
+        with session.connection() as same_pg_conn:
+            assert same_pg_conn is pg_conn
+        time.sleep(0.1)
+        with session.connection() as new_pg_conn:
+            assert new_pg_conn is not pg_conn
+        assert self.connections[0].closed
+        assert not self.connections[1].closed
+        # The round trips of the closed connection are still counted
+        assert session.round_trips == 2
+        session.close()
+
+    def test_close(self):
+        with self.session.connection():
+            pass
+        self.session.close()
+        assert self.connections[0].closed
+        assert self.session.round_trips == 0
@@ -0,0 +1,142 @@
+import filecmp
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from eva_assembly_ingestion.custom_assembly import CustomAssembly
+from eva_assembly_ingestion.fasta_utils import find_header_offsets, rewrite_fasta_headers, copy_byte_range, \
+    FastaHeaderIndex, FastaIndexRecord, rewrite_fasta_headers_stream, FastaIndexingWriter, write_fai
+
+
+class TestFastaUtils(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_fasta = os.path.join(self.tmp_dir.name, 'input.fa')
+        self.block_fasta = os.path.join(self.tmp_dir.name, 'block.fa')
+        self.line_fasta = os.path.join(self.tmp_dir.name, 'line.fa')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write_input(self, content):
+        with open(self.input_fasta, 'wb') as open_file:
+            open_file.write(content)
+
+    def _assert_identical_rewrite(self, contig_to_rename):
+        rewrite_fasta_headers(self.input_fasta, self.block_fasta, contig_to_rename)
+        CustomAssembly.rewrite_changing_names(self.input_fasta, self.line_fasta, contig_to_rename, block_copy=False)
+        assert filecmp.cmp(self.block_fasta, self.line_fasta, shallow=False)
+
+    def test_find_header_offsets(self):
+        self._write_input(b'>chr1 description\nACGT\nAC\n>chr2\nGG\n>chr3')
+        assert find_header_offsets(self.input_fasta) == [(0, 18), (26, 32), (35, 40)]
+
+    def test_find_header_offsets_empty_file(self):
+        self._write_input(b'')
+        assert find_header_offsets(self.input_fasta) == []
+
+    def test_rewrite_fasta_headers(self):
+        self._write_input(b'>chr1 description\nACGT\nAC\n>chr2\nGG\n>chr3\n\nTT\n>chr4')
+        self._assert_identical_rewrite({'chr1': 'CM000001.1'})
+        self._assert_identical_rewrite({'chr2': 'CM000002.1', 'chr4': 'CM000004.1'})
+        with open(self.block_fasta, 'rb') as open_file:
+            assert open_file.read() == b'>chr1 description\nACGT\nAC\n>CM000002.1\nGG\n>chr3\n\nTT\n>CM000004.1\n'
+        self._assert_identical_rewrite({'unknown': 'CM000005.1'})
+
+    def test_rewrite_fasta_headers_leading_sequence(self):
+        self._write_input(b'ACGT\n>chr1\nACGT\n')
+        self._assert_identical_rewrite({'chr1': 'CM000001.1'})
+
+    def test_rewrite_fasta_headers_stream(self):
+        self._write_input(b'>chr1 description\nACGT\nAC\n>chr2\nGG\n>chr3\n\nTT\n>chr4')
+        contig_to_rename = {'chr2': 'CM000002.1', 'chr4': 'CM000004.1'}
+        rewrite_fasta_headers(self.input_fasta, self.block_fasta, contig_to_rename)
+        output = io.BytesIO()
+        with open(self.input_fasta, 'rb') as open_input:
+            rewrite_fasta_headers_stream(open_input, output, contig_to_rename, find_header_offsets(self.input_fasta))
+        with open(self.block_fasta, 'rb') as open_file:
+            assert output.getvalue() == open_file.read()
+
+    def test_fasta_indexing_writer(self):
+        content = b'>chr1 description\nACGT\nAC\n>chr2\nGGG\n'
+        output = io.BytesIO()
+        writer = FastaIndexingWriter(output)
+        # Split the header and the sequences across writes
+        for chunk in (content[:3], content[3:20], content[20:]):
+            writer.write(chunk)
+        records = writer.finish()
+        assert output.getvalue() == content
+        self._write_input(content)
+        assert records == FastaHeaderIndex.build(self.input_fasta).records
+        fai_path = os.path.join(self.tmp_dir.name, 'input.fa.fai')
+        write_fai(records, fai_path)
+        with open(fai_path) as open_file:
+            assert open_file.read() == 'chr1\t6\t18\t4\t5\nchr2\t3\t32\t3\t4\n'
+
+    def test_copy_byte_range(self):
+        self._write_input(b'0123456789')
+        with open(self.input_fasta, 'rb') as open_input, open(self.block_fasta, 'wb') as open_output:
+            copy_byte_range(open_input.fileno(), open_output.fileno(), 2, 5)
+            copy_byte_range(open_input.fileno(), open_output.fileno(), 0, 1)
+        with open(self.block_fasta, 'rb') as open_file:
+            assert open_file.read() == b'234560'
+
+
+class TestFastaHeaderIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fasta = os.path.join(self.tmp_dir.name, 'genome.fa')
+        with open(self.fasta, 'wb') as open_file:
+            open_file.write(b'>chr1 description\nACGT\nAC\n>chr2\r\nGG\r\n>chr3\nTTT')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_build(self):
+        index = FastaHeaderIndex.build(self.fasta)
+        assert index.records == [
+            FastaIndexRecord('chr1', 0, 18, 6, 4, 5),
+            FastaIndexRecord('chr2', 26, 33, 2, 2, 4),
+            FastaIndexRecord('chr3', 37, 43, 3, 3, 3)
+        ]
+        assert 'chr2' in index
+        assert list(index.names) == ['chr1', 'chr2', 'chr3']
+        assert index.header_offsets[:2] == find_header_offsets(self.fasta)[:2]
+
+    def test_build_in_small_chunks(self):
+        expected_records = FastaHeaderIndex.build(self.fasta).records
+        with patch('eva_assembly_ingestion.fasta_utils.SCAN_BUFFER_SIZE', 1):
+            assert FastaHeaderIndex.build(self.fasta).records == expected_records
+
+    def test_load_or_build_reuses_saved_index(self):
+        index = FastaHeaderIndex.load_or_build(self.fasta)
+        assert os.path.exists(self.fasta + FastaHeaderIndex.index_suffix)
+        with patch.object(FastaHeaderIndex, 'build') as mock_build:
+            reloaded_index = FastaHeaderIndex.load_or_build(self.fasta)
+        mock_build.assert_not_called()
+        assert reloaded_index.records == index.records
+
+    def test_load_or_build_rebuilds_modified_fasta(self):
+        FastaHeaderIndex.load_or_build(self.fasta)
+        with open(self.fasta, 'ab') as open_file:
+            open_file.write(b'\n>chr4\nA\n')
+        assert FastaHeaderIndex.load(self.fasta) is None
+        assert 'chr4' in FastaHeaderIndex.load_or_build(self.fasta)
+
+    def test_failed_save_leaves_no_file(self):
+        index = FastaHeaderIndex.build(self.fasta)
+        index.records.append(None)
+        with self.assertRaises(TypeError):
+            index.save()
+        assert os.listdir(self.tmp_dir.name) == ['genome.fa']
+
+    def test_index_stored_next_to_symlink_target(self):
+        link = os.path.join(self.tmp_dir.name, 'link.fa')
+        os.symlink(self.fasta, link)
+        FastaHeaderIndex.load_or_build(link)
+        assert os.path.exists(self.fasta + FastaHeaderIndex.index_suffix)
+        assert not os.path.exists(link + FastaHeaderIndex.index_suffix)
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+from eva_assembly_ingestion.file_utils import atomic_output, atomic_write
+
+
+class TestFileUtils(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmp_dir.name, 'output.txt')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_atomic_write(self):
+        atomic_write(self.output_path, b'content')
+        with open(self.output_path, 'rb') as open_file:
+            assert open_file.read() == b'content'
+        assert os.listdir(self.tmp_dir.name) == ['output.txt']
+
+    def test_atomic_output_keeps_previous_file_on_error(self):
+        atomic_write(self.output_path, b'previous')
+        with self.assertRaises(ValueError):
+            with atomic_output(self.output_path) as tmp_path:
+                with open(tmp_path, 'w') as open_file:
+                    open_file.write('partial')
+                raise ValueError
+        with open(self.output_path, 'rb') as open_file:
+            assert open_file.read() == b'previous'
+        assert os.listdir(self.tmp_dir.name) == ['output.txt']
+
+    def test_atomic_output_copies_mode(self):
+        mode_path = os.path.join(self.tmp_dir.name, 'mode.txt')
+        atomic_write(mode_path, b'')
+        os.chmod(mode_path, 0o640)
+        with atomic_output(self.output_path, mode_from=mode_path) as tmp_path:
+            with open(tmp_path, 'w') as open_file:
+                open_file.write('content')
+        assert os.stat(self.output_path).st_mode & 0o777 == 0o640
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+repo_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+bin_directory = os.path.join(repo_directory, 'bin')
+
+# Time budgets for the imports, on top of the ones done by the interpreter on startup, in milliseconds. They are well
+# above the current times, to catch dependencies imported at the top level again rather than small regressions.
+HELP_IMPORT_BUDGET_MS = 100
+MODULE_IMPORT_BUDGET_MS = 500
+
+# Dependencies that are only needed on some code paths: databases, web services, the Spring properties and the
+# process pools
+LAZY_MODULES = ('requests', 'ebi_eva_common_pyutils.contig_alias.contig_alias',
+                'ebi_eva_common_pyutils.taxonomy.taxonomy', 'ebi_eva_internal_pyutils.metadata_utils',
+                'ebi_eva_internal_pyutils.spring_properties', 'concurrent.futures.process', 'multiprocessing')
+
+
+def import_times(*args):
+    """
+    Run python -X importtime with the arguments and return the self and cumulative import time of every module in
+    microseconds. The command is run twice so that the modules are already compiled when they are timed.
+    """
+    command = [sys.executable, '-X', 'importtime', *args]
+    env = dict(os.environ, PYTHONPATH=repo_directory)
+    for _ in range(2):
+        process = subprocess.run(command, env=env, cwd=repo_directory, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, universal_newlines=True)
+    assert process.returncode == 0, process.stderr
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, module = line[len('import time:'):].split('|')
+        times[module.strip()] = (int(self_time), int(cumulative_time))
+    return times
+
+
+@pytest.fixture(scope='module')
+def startup_modules():
+    return set(import_times('-c', 'pass'))
+
+
+def added_import_time_ms(times, startup_modules):
+    return sum(self_time for module, (self_time, _) in times.items() if module not in startup_modules) / 1000
+
+
+@pytest.mark.parametrize('script', ['add_target_assembly.py', 'count_variants_from_logs.py', 'get_custom_assembly.py',
+                                    'extract_log_metrics.py'])
+def test_help_does_not_import_dependencies(script, startup_modules):
+    times = import_times(os.path.join(bin_directory, script), '--help')
+    dependencies = [module for module in times
+                    if module.split('.')[0] in ('requests', 'psycopg2', 'yaml', 'ebi_eva_common_pyutils',
+                                                'ebi_eva_internal_pyutils')]
+    assert dependencies == []
+    assert added_import_time_ms(times, startup_modules) < HELP_IMPORT_BUDGET_MS
+
+
+@pytest.mark.parametrize('module', ['eva_assembly_ingestion.assembly_ingestion_job',
+                                    'eva_assembly_ingestion.custom_assembly'])
+def test_module_does_not_import_lazy_dependencies(module, startup_modules):
+    times = import_times('-c', f'import {module}')
+    assert [lazy_module for lazy_module in LAZY_MODULES if lazy_module in times] == []
+    assert added_import_time_ms(times, startup_modules) < MODULE_IMPORT_BUDGET_MS
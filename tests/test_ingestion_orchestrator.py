@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+
+from eva_assembly_ingestion.ingestion_orchestrator import IngestionOrchestrator, read_ingestion_jobs
+
+
+class FakeIngestionJob:
+    all_tasks = ['load_tracker', 'remap_cluster', 'update_dbs']
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    closed = []
+    # Taxonomies sharing their current assembly with the taxonomy of the job
+    shared_taxonomies = {}
+
+    def __init__(self, taxonomy, target_assembly, release_version):
+        self.taxonomy = taxonomy
+        self.target_assembly = target_assembly
+
+    @property
+    def taxonomies(self):
+        return self.shared_taxonomies.get(self.taxonomy, [self.taxonomy])
+
+    def run_all(self, tasks, source_of_assembly, resume):
+        with self.lock:
+            FakeIngestionJob.running += 1
+            FakeIngestionJob.max_running = max(FakeIngestionJob.max_running, FakeIngestionJob.running)
+        time.sleep(0.05)
+        with self.lock:
+            FakeIngestionJob.running -= 1
+        if self.taxonomy == 9940:
+            raise ValueError('Nextflow remapping pipeline failed')
+
+    def get_job_information_from_tracker(self):
+        return [
+            ('EVA', self.taxonomy, 'Species', 'GCA_000000001.1', self.target_assembly, 1, 'Completed'),
+            ('DBSNP', self.taxonomy, 'Species', 'GCA_000000001.1', self.target_assembly, 1,
+             'Failed' if self.taxonomy == 9940 else 'Completed'),
+        ]
+
+    def close(self):
+        self.closed.append(self.taxonomy)
+
+
+class TestIngestionOrchestrator(TestCase):
+
+    def setUp(self):
+        FakeIngestionJob.running = FakeIngestionJob.max_running = 0
+        FakeIngestionJob.closed = []
+        FakeIngestionJob.shared_taxonomies = {}
+        self.patch_job = patch('eva_assembly_ingestion.ingestion_orchestrator.AssemblyIngestionJob', FakeIngestionJob)
+        self.patch_job.start()
+
+    def tearDown(self):
+        self.patch_job.stop()
+
+    def test_run_with_concurrency_limit(self):
+        jobs = [(9913, 'GCA_002263795.2'), (9940, 'GCA_016772045.1'), (9823, 'GCA_000003025.6'),
+                (9031, 'GCA_016699485.1'), (9796, 'GCA_002863925.1')]
+        orchestrator = IngestionOrchestrator(jobs, release_version=5, max_concurrent_jobs=2)
+        summaries = orchestrator.run()
+        assert FakeIngestionJob.max_running == 2
+        # Each job is closed once its taxonomies are resolved and again once it has run
+        assert sorted(FakeIngestionJob.closed) == sorted(taxonomy for taxonomy, _ in jobs for _ in range(2))
+        assert [(summary['taxonomy'], summary['status']) for summary in summaries] == [
+            (9913, 'Completed'), (9940, 'Failed'), (9823, 'Completed'), (9031, 'Completed'), (9796, 'Completed')
+        ]
+        assert summaries[1]['error'] == "ValueError('Nextflow remapping pipeline failed')"
+        assert summaries[1]['source_assemblies'][1] == {
+            'source': 'DBSNP', 'taxonomy': 9940, 'source_assembly': 'GCA_000000001.1', 'status': 'Failed'
+        }
+        assert orchestrator.statuses[(9940, 'GCA_016772045.1')] == 'Failed'
+
+    def test_duplicated_taxonomies(self):
+        with pytest.raises(ValueError):
+            IngestionOrchestrator([(9913, 'GCA_002263795.2'), (9913, 'GCA_002263795.3')], release_version=5)
+
+    def test_overlapping_taxonomies(self):
+        FakeIngestionJob.shared_taxonomies = {9940: [9913, 9940]}
+        orchestrator = IngestionOrchestrator([(9913, 'GCA_002263795.2'), (9940, 'GCA_002263795.2')], release_version=5)
+        with pytest.raises(ValueError, match=r"\(9913, 'GCA_002263795.2'\) and \(9940, 'GCA_002263795.2'\) share "
+                                             r"taxonomies \[9913\]"):
+            orchestrator.run()
+        assert FakeIngestionJob.max_running == 0
+        assert orchestrator.statuses == {(9913, 'GCA_002263795.2'): 'Pending', (9940, 'GCA_002263795.2'): 'Pending'}
+
+    def test_write_summary_report(self):
+        summaries = IngestionOrchestrator([(9913, 'GCA_002263795.2')], release_version=5).run()
+        report_path = os.path.join(os.path.dirname(__file__), 'summary_report.json')
+        try:
+            IngestionOrchestrator.write_summary_report(summaries, report_path)
+            with open(report_path) as open_file:
+                assert json.load(open_file) == summaries
+        finally:
+            os.remove(report_path)
+
+
+def test_read_ingestion_jobs(tmpdir):
+    jobs_path = tmpdir.join('jobs.tsv')
+    jobs_path.write('# taxonomy\ttarget assembly\n9913\tGCA_002263795.2\n\n9940\tGCA_016772045.1\n')
+    assert read_ingestion_jobs(str(jobs_path)) == [(9913, 'GCA_002263795.2'), (9940, 'GCA_016772045.1')]
@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from eva_assembly_ingestion.instrumentation import Instrumentation, NO_INSTRUMENTATION
+
+
+def test_span_records_calls_and_time():
+    instrumentation = Instrumentation(labels={'taxonomy': 9913})
+    for _ in range(3):
+        with instrumentation.span('load_tracker'):
+            pass
+    with pytest.raises(ValueError):
+        with instrumentation.span('update_dbs'):
+            raise ValueError('Update failed')
+    metrics = instrumentation.metrics()
+    assert metrics['labels'] == {'taxonomy': 9913}
+    assert metrics['spans']['load_tracker']['calls'] == 3
+    assert metrics['spans']['load_tracker']['failures'] == 0
+    assert metrics['spans']['load_tracker']['total_seconds'] >= metrics['spans']['load_tracker']['max_seconds']
+    assert metrics['spans']['update_dbs']['failures'] == 1
+    assert metrics['peak_rss_bytes'] > 0
+
+
+def test_instrument_function():
+    instrumentation = Instrumentation()
+    lookup = instrumentation.instrument('taxonomy_lookup', {9913: 'Bos taurus'}.get)
+    assert lookup(9913) == 'Bos taurus'
+    assert instrumentation.metrics()['spans']['taxonomy_lookup']['calls'] == 1
+
+
+def test_disabled_instrumentation_records_nothing(tmpdir):
+    lookup = {9913: 'Bos taurus'}.get
+    assert NO_INSTRUMENTATION.instrument('taxonomy_lookup', lookup) is lookup
+    with NO_INSTRUMENTATION.span('load_tracker'):
+        pass
+    NO_INSTRUMENTATION.count('db_round_trips', 3)
+    NO_INSTRUMENTATION.write(str(tmpdir.join('metrics.json')), str(tmpdir.join('metrics.prom')))
+    assert NO_INSTRUMENTATION.metrics()['spans'] == {}
+    assert NO_INSTRUMENTATION.metrics()['counters'] == {}
+    assert tmpdir.listdir() == []
+
+
+def test_write_json_and_prometheus(tmpdir):
+    instrumentation = Instrumentation(labels={'taxonomy': 9913, 'target_assembly': 'GCA_000003055.3'})
+    instrumentation.record('remap_cluster.nextflow', 12.5)
+    instrumentation.count('db_round_trips', 4)
+    json_path = str(tmpdir.join('metrics.json'))
+    prometheus_path = str(tmpdir.join('metrics.prom'))
+    instrumentation.write(json_path, prometheus_path)
+    with open(json_path) as open_file:
+        assert json.load(open_file)['spans']['remap_cluster.nextflow']['total_seconds'] == 12.5
+    with open(prometheus_path) as open_file:
+        lines = open_file.read().splitlines()
+    assert '# TYPE eva_assembly_ingestion_span_seconds_total counter' in lines
+    assert ('eva_assembly_ingestion_span_seconds_total{span="remap_cluster.nextflow",'
+            'target_assembly="GCA_000003055.3",taxonomy="9913"} 12.5') in lines
+    assert 'eva_assembly_ingestion_db_round_trips_total{target_assembly="GCA_000003055.3",taxonomy="9913"} 4' in lines
+    assert sorted(os.listdir(str(tmpdir))) == ['metrics.json', 'metrics.prom']
+
+
+def test_prometheus_label_escaping():
+    instrumentation = Instrumentation(labels={'name': 'Bos "taurus"\\'})
+    instrumentation.record('load_tracker', 1)
+    assert 'name="Bos \\"taurus\\"\\\\"' in instrumentation.prometheus_text()
@@ -0,0 +1,91 @@
+import csv
+import datetime
+import json
+import os
+import shutil
+
+import pytest
+
+from eva_assembly_ingestion.log_metrics import parse_log_metrics, parse_log_directory_metrics, parse_duration, \
+    write_log_metrics_json, write_log_metrics_csv, EXPORTED_FIELDS
+
+resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+
+@pytest.mark.parametrize('duration, seconds', [
+    ('263ms', 0.263), ('4s263ms', 4.263), ('1m2s', 62), ('1h2m3s45ms', 3723.045)
+])
+def test_parse_duration(duration, seconds):
+    assert parse_duration(duration) == pytest.approx(seconds)
+
+
+def test_parse_extraction_log():
+    log_file = os.path.join(resources_folder, 'vcf_extractor.log')
+    eva_step, dbsnp_step = parse_log_metrics(log_file)
+    assert eva_step.job == 'EXPORT_SUBMITTED_VARIANTS_JOB'
+    assert eva_step.job_status == 'COMPLETED'
+    assert (eva_step.step, eva_step.read, eva_step.written) == ('EXPORT_EVA_SUBMITTED_VARIANTS_STEP', 7147, 7147)
+    assert eva_step.start_time == datetime.datetime(2022, 10, 6, 14, 22, 16, 853000)
+    # Ends when the next step starts
+    assert eva_step.duration_seconds == pytest.approx(4.081)
+    assert dbsnp_step.step == 'EXPORT_DBSNP_SUBMITTED_VARIANTS_STEP'
+    assert dbsnp_step.duration_seconds == pytest.approx(0.071)
+
+
+def test_parse_ingestion_log():
+    log_file = os.path.join(resources_folder, 'vcf_ingestion.log')
+    metadata_step, ingestion_step = parse_log_metrics(log_file)
+    assert metadata_step.step == 'STORE_REMAPPING_METADATA_STEP'
+    assert metadata_step.read is None
+    assert (ingestion_step.read, ingestion_step.written, ingestion_step.skipped) == (7002, 7002, 0)
+    assert ingestion_step.duration_seconds == pytest.approx(15.362)
+
+
+def test_parse_clustering_log():
+    log_file = os.path.join(resources_folder, 'clustering.log')
+    clustering_step, clear_step, backpropagation_step = parse_log_metrics(log_file)
+    assert (clustering_step.read, clustering_step.written, clustering_step.skipped, clustering_step.commits) == \
+        (2000, 1990, 10, 20)
+    # The duration reported by Spring Batch is used when present
+    assert clustering_step.duration_seconds == pytest.approx(10.2)
+    assert clear_step.job_status == 'COMPLETED'
+    assert clear_step.duration_seconds == pytest.approx(2)
+    # The backpropagation job did not complete
+    assert backpropagation_step.job == 'BACK_PROPAGATE_NEW_RS_JOB'
+    assert backpropagation_step.job_status is None
+    assert backpropagation_step.read == 300
+    assert backpropagation_step.duration_seconds is None
+
+
+@pytest.mark.parametrize('nb_processes', [1, 2])
+def test_parse_log_directory(tmpdir, nb_processes):
+    log_directory = str(tmpdir.mkdir('logs'))
+    os.makedirs(os.path.join(log_directory, 'ingestion'))
+    shutil.copy(os.path.join(resources_folder, 'vcf_extractor.log'), log_directory)
+    shutil.copy(os.path.join(resources_folder, 'vcf_ingestion.log'), os.path.join(log_directory, 'ingestion'))
+    shutil.copy(os.path.join(resources_folder, 'remapped_counts.yml'), log_directory)
+    step_metrics = parse_log_directory_metrics(log_directory, nb_processes)
+    assert [(os.path.basename(metrics.log_file), metrics.step) for metrics in step_metrics] == [
+        ('vcf_ingestion.log', 'STORE_REMAPPING_METADATA_STEP'),
+        ('vcf_ingestion.log', 'INGEST_REMAPPED_VARIANTS_FROM_VCF_STEP'),
+        ('vcf_extractor.log', 'EXPORT_EVA_SUBMITTED_VARIANTS_STEP'),
+        ('vcf_extractor.log', 'EXPORT_DBSNP_SUBMITTED_VARIANTS_STEP'),
+    ]
+
+
+def test_write_json_and_csv(tmpdir):
+    step_metrics = parse_log_metrics(os.path.join(resources_folder, 'clustering.log'))
+    json_path = str(tmpdir.join('step_metrics.json'))
+    csv_path = str(tmpdir.join('step_metrics.csv'))
+    write_log_metrics_json(step_metrics, json_path)
+    write_log_metrics_csv(step_metrics, csv_path)
+    with open(json_path) as open_file:
+        json_records = json.load(open_file)
+    with open(csv_path) as open_file:
+        csv_records = list(csv.DictReader(open_file))
+    assert json_records[0]['items_per_second'] == pytest.approx(196.1)
+    assert json_records[0]['start_time'] == '2022-10-07T10:00:00.100000'
+    assert json_records[2]['items_per_second'] is None
+    assert list(csv_records[0]) == list(EXPORTED_FIELDS)
+    assert csv_records[0]['items_per_second'] == '196.1'
+    assert len(csv_records) == 3
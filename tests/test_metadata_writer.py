@@ -0,0 +1,69 @@
+import datetime
+from unittest.mock import patch
+
+from eva_assembly_ingestion.metadata_writer import MetadataWriter
+from fake_postgres import FakeConnection
+
+
+def test_add_to_supported_assemblies():
+    connection = FakeConnection(results=[[(9940, 'GCA_000003055.3'), (10116, 'GCA_000001895.4')]])
+    MetadataWriter(connection).add_to_supported_assemblies('Ensembl', 'GCA_000003055.3', [9913, 9940, 10116])
+    today = datetime.date.today()
+    assert len(connection.statements) == 3
+    # 9940 already has the target assembly as current assembly
+    assert connection.statements[1] == (
+        'UPDATE evapro.supported_assembly_tracker SET current=false, end_date=%s '
+        'WHERE taxonomy_id = ANY(%s) AND current=true',
+        (today, [9913, 10116])
+    )
+    assert connection.statements[2][0] == (
+        'INSERT INTO evapro.supported_assembly_tracker (taxonomy_id, source, assembly_id, current, start_date) '
+        f"VALUES (9913,'Ensembl','GCA_000003055.3',true,'{today.isoformat()}'::date),"
+        f"(10116,'Ensembl','GCA_000003055.3',true,'{today.isoformat()}'::date)"
+    )
+    assert connection.commits == 0
+
+
+def test_add_to_supported_assemblies_already_current():
+    connection = FakeConnection(results=[[(9913, 'GCA_000003055.3')]])
+    MetadataWriter(connection).add_to_supported_assemblies('Ensembl', 'GCA_000003055.3', [9913])
+    assert len(connection.statements) == 1
+
+
+@patch('eva_assembly_ingestion.metadata_writer.get_assembly_code', return_value='arsucd12')
+@patch('eva_assembly_ingestion.metadata_writer.get_ncbi_assembly_name_from_term', return_value='ARS-UCD1.2')
+@patch('eva_assembly_ingestion.metadata_writer.get_scientific_name_and_common_name',
+       return_value=('Bos indicus', 'zebu'))
+def test_insert_new_assemblies_and_taxonomies(mock_taxonomy_names, mock_assembly_name, mock_assembly_code):
+    connection = FakeConnection(results=[
+        [('GCA_002263795.2', 9913)],  # existing assembly and taxonomy
+        [(9913,)],  # existing taxonomies
+        [],  # insert taxonomy
+        [(42,), (43,)],  # assembly_set ids
+        [],  # insert accessioned assemblies
+        [],  # accessioning status
+    ])
+    MetadataWriter(connection).insert_new_assemblies_and_taxonomies([
+        ('GCA_002263795.2', 9913), ('GCA_002263795.2', 9915), ('GCA_000003055.3', 9913), ('GCA_002263795.2', 9915)
+    ])
+    mock_taxonomy_names.assert_called_once_with(9915)
+    assert mock_assembly_name.call_count == 2
+    queries = [query for query, _ in connection.statements]
+    assert len(queries) == 6
+    assert queries[2] == ("INSERT INTO evapro.taxonomy(taxonomy_id, common_name, scientific_name, taxonomy_code, "
+                          "eva_name) VALUES (9915,'zebu','Bos indicus','bindicus','zebu')")
+    assert queries[3] == ("INSERT INTO evapro.assembly_set(taxonomy_id, assembly_name, assembly_code) VALUES "
+                          "(9915,'ARS-UCD1.2','arsucd12'),(9913,'ARS-UCD1.2','arsucd12') "
+                          "RETURNING assembly_set_id")
+    assert queries[4] == ("INSERT INTO evapro.accessioned_assembly(assembly_set_id, assembly_accession, "
+                          "assembly_chain, assembly_version) VALUES (42,'GCA_002263795.2','GCA_002263795','2'),"
+                          "(43,'GCA_000003055.3','GCA_000003055','3')")
+    assert "VALUES ('GCA_002263795.2'::text, true::boolean),('GCA_000003055.3'::text, true::boolean))" in queries[5]
+    assert connection.commits == 0
+
+
+def test_insert_existing_assemblies_and_taxonomies():
+    connection = FakeConnection(results=[[('GCA_000003055.3', 9913)]])
+    MetadataWriter(connection).insert_new_assemblies_and_taxonomies([('GCA_000003055.3', 9913)])
+    # Only the lookup and the accessioning status
+    assert len(connection.statements) == 2
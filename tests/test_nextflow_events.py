@@ -0,0 +1,76 @@
+import json
+import unittest
+import urllib.request
+
+from eva_assembly_ingestion.nextflow_events import NextflowEventListener, SourceAssemblyProgress, \
+    parse_source_assembly_tag
+
+
+def process_completed(process, tag, status='COMPLETED'):
+    return {'event': 'process_completed', 'trace': {'process': process, 'tag': tag, 'status': status}}
+
+
+class TestParseSourceAssemblyTag(unittest.TestCase):
+
+    def test_parse_source_assembly_tag(self):
+        assert parse_source_assembly_tag('GCA_000000001.1 9913') == ('GCA_000000001.1', [9913])
+        assert parse_source_assembly_tag('GCA_000000001.1 9913,9940') == ('GCA_000000001.1', [9913, 9940])
+
+    def test_parse_invalid_tag(self):
+        assert parse_source_assembly_tag(None) is None
+        assert parse_source_assembly_tag('GCA_000000001.1') is None
+        assert parse_source_assembly_tag('GCA_000000001.1 cattle') is None
+
+
+class TestSourceAssemblyProgress(unittest.TestCase):
+
+    def setUp(self):
+        self.progress = SourceAssemblyProgress()
+
+    def test_completed_after_backpropagation(self):
+        assert self.progress.status_change(process_completed('ingest_vcf_into_mongo', 'GCA_1.1 9913')) is None
+        assert self.progress.status_change(process_completed('backpropagate_clusters', 'GCA_1.1 9913,9940')) == \
+            ('GCA_1.1', [9913, 9940], 'Completed')
+        assert self.progress.source_assemblies_with_status('Completed') == {('GCA_1.1', 9913), ('GCA_1.1', 9940)}
+
+    def test_failed_task(self):
+        assert self.progress.status_change(process_completed('remap_variants', 'GCA_1.1 9913', 'FAILED')) == \
+            ('GCA_1.1', [9913], 'Failed')
+        # Already failed
+        assert self.progress.status_change(process_completed('extract_vcf_from_mongo', 'GCA_1.1 9913', 'FAILED')) \
+            is None
+        assert self.progress.source_assemblies_with_status('Failed') == {('GCA_1.1', 9913)}
+
+    def test_retried_task(self):
+        self.progress.status_change(process_completed('remap_variants', 'GCA_1.1 9913', 'FAILED'))
+        assert self.progress.status_change(process_completed('remap_variants', 'GCA_1.1 9913')) == \
+            ('GCA_1.1', [9913], 'Started')
+
+    def test_ignored_events(self):
+        assert self.progress.status_change({'event': 'started'}) is None
+        assert self.progress.status_change(process_completed('qc_clustering', None, 'FAILED')) is None
+        assert self.progress.status_change(process_completed('remap_variants', 'remap', 'FAILED')) is None
+
+
+class TestNextflowEventListener(unittest.TestCase):
+
+    def test_receive_events(self):
+        events = []
+        with NextflowEventListener(events.append) as listener:
+            assert listener.url.startswith('http://127.0.0.1:')
+            for event in ({'event': 'started'}, process_completed('remap_variants', 'GCA_1.1 9913')):
+                urllib.request.urlopen(listener.url, data=json.dumps(event).encode()).read()
+        assert events == [{'event': 'started'}, process_completed('remap_variants', 'GCA_1.1 9913')]
+
+    def test_callback_error_does_not_stop_listener(self):
+        events = []
+
+        def callback(event):
+            if event['event'] == 'error':
+                raise ValueError('Cannot handle event')
+            events.append(event)
+
+        with NextflowEventListener(callback) as listener:
+            for event in ({'event': 'error'}, {'event': 'completed'}):
+                urllib.request.urlopen(listener.url, data=json.dumps(event).encode()).read()
+        assert events == [{'event': 'completed'}]
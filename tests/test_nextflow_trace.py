@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from eva_assembly_ingestion.nextflow_trace import parse_trace, group_by_source_assembly, write_trace_config
+
+
+class TestNextflowTrace(unittest.TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+    trace_file = os.path.join(resources_folder, 'nextflow', 'remapping_trace.txt')
+
+    def setUp(self):
+        self.output_directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_directory)
+
+    def test_write_trace_config(self):
+        config_file = write_trace_config(os.path.join(self.output_directory, 'trace.config'), '/path/to/trace.txt')
+        with open(config_file) as open_file:
+            config = open_file.read()
+        assert "file = '/path/to/trace.txt'" in config
+        assert 'raw = true' in config
+        assert "fields = 'task_id,hash,process,tag,status,exit,realtime,%cpu,peak_rss,rchar,wchar'" in config
+
+    def test_parse_trace(self):
+        records = parse_trace(self.trace_file)
+        assert len(records) == 4
+        assert records[1] == {
+            'task_id': 2, 'hash': 'cd/789012', 'process': 'extract_vcf_from_mongo',
+            'source_assembly': 'GCA_000000001.1', 'taxonomies': [9913], 'status': 'COMPLETED', 'exit_code': 0,
+            'realtime_ms': 60000, 'cpu_percent': 180.2, 'peak_rss_bytes': 2147483648, 'read_bytes': 4096,
+            'write_bytes': 1048576
+        }
+        assert records[2]['write_bytes'] is None
+        assert records[3]['source_assembly'] is None
+        assert records[3]['taxonomies'] == []
+
+    def test_group_by_source_assembly(self):
+        records_per_source_assembly = group_by_source_assembly(parse_trace(self.trace_file))
+        assert sorted(records_per_source_assembly) == [('GCA_000000001.1', 9913), ('GCA_000000001.1', 9940)]
+        assert [record['process'] for record in records_per_source_assembly[('GCA_000000001.1', 9913)]] == [
+            'retrieve_source_genome', 'extract_vcf_from_mongo', 'remap_variants'
+        ]
+        assert [record['task_id'] for record in records_per_source_assembly[('GCA_000000001.1', 9940)]] == [1]
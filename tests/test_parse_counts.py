@@ -1,6 +1,10 @@
 import os
+import subprocess
 
-from eva_assembly_ingestion.parse_counts import count_variants_extracted, count_variants_ingested, count_variants_remapped
+import pytest
+
+from eva_assembly_ingestion.parse_counts import count_variants_extracted, count_variants_ingested, \
+    count_variants_remapped, find_last_lines, LOG_BLOCK_SIZE
 
 
 def test_count_variants_remapped():
@@ -16,3 +20,39 @@ def test_count_variants_extracted():
 def test_count_variants_ingested():
     log_file = os.path.abspath(os.path.join(os.path.dirname(__file__), 'resources', 'vcf_ingestion.log'))
     assert count_variants_ingested(log_file) == (7002, 7002, 0)
+
+
+def grep_tail(log_file, pattern):
+    output = subprocess.run(f'grep "{pattern}" {log_file} | tail -1', shell=True, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, universal_newlines=True).stdout.rstrip()
+    return output or None
+
+
+@pytest.mark.parametrize('block_size', [7, 64, 1000, LOG_BLOCK_SIZE])
+def test_find_last_lines_same_as_grep(block_size):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+    patterns = ['EXPORT_EVA_SUBMITTED_VARIANTS_STEP', 'EXPORT_DBSNP_SUBMITTED_VARIANTS_STEP',
+                'INGEST_REMAPPED_VARIANTS_FROM_VCF_STEP', 'Executing step', 'NOT_IN_THE_LOGS']
+    for log_name in ('vcf_extractor.log', 'vcf_ingestion.log'):
+        log_file = os.path.join(resources_folder, log_name)
+        assert find_last_lines(log_file, patterns, block_size=block_size) == {
+            pattern: grep_tail(log_file, pattern) for pattern in patterns
+        }
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 16])
+def test_find_last_lines_boundaries(tmpdir, block_size):
+    log_file = str(tmpdir.join('steps.log'))
+    with open(log_file, 'w') as open_file:
+        open_file.write('STEP_A: 1\nSTEP_B: 1\nSTEP_A: 2\n\nSTEP_B: 2 is the last line without newline')
+    assert find_last_lines(log_file, ['STEP_A', 'STEP_B', 'STEP_C'], block_size=block_size) == {
+        'STEP_A': 'STEP_A: 2', 'STEP_B': 'STEP_B: 2 is the last line without newline', 'STEP_C': None
+    }
+
+
+def test_find_last_lines_missing_or_empty_file(tmpdir):
+    assert find_last_lines(str(tmpdir.join('missing.log')), ['STEP_A']) == {'STEP_A': None}
+    empty_log = tmpdir.join('empty.log')
+    empty_log.write('')
+    assert find_last_lines(str(empty_log), ['STEP_A']) == {'STEP_A': None}
+    assert count_variants_ingested(str(empty_log)) == (None, None, None)
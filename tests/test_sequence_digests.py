@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from eva_assembly_ingestion.bgzf import BgzfWriter, read_block_offsets
+from eva_assembly_ingestion.fasta_utils import find_header_offsets, FastaHeaderIndex
+from eva_assembly_ingestion.sequence_digests import compute_sequence_digests, split_contigs, SequenceDigest, \
+    write_sequence_digests, read_sequence_digests
+
+
+class TestSequenceDigests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fasta = os.path.join(self.tmp_dir.name, 'input.fa')
+        self.compressed_fasta = os.path.join(self.tmp_dir.name, 'input.fa.gz')
+        content = b'>chr1 description\nAC\ngt\n>chr2\r\nAAAA\r\nCC\r\n'
+        # Large enough sequences to span several BGZF blocks
+        content += b''.join(b'>scaffold%d\n' % i + b'ACGTN\n' * (5000 * i) for i in range(1, 30))
+        with open(self.fasta, 'wb') as open_file:
+            open_file.write(content)
+        with open(self.compressed_fasta, 'wb') as open_file, BgzfWriter(open_file) as writer:
+            writer.write(content)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_compute_sequence_digests(self):
+        digests = compute_sequence_digests(self.fasta, find_header_offsets(self.fasta))
+        assert digests[0] == SequenceDigest('chr1', 4, 'f1f8f4bf413b16ad135722aa4591043e',
+                                            'aKF498dAxcJAqme6QYQ7EZ07-fiw8Kw2')
+        assert (digests[1].name, digests[1].length) == ('chr2', 6)
+        assert [digest.length for digest in digests[2:]] == [25000 * i for i in range(1, 30)]
+
+    def test_compute_sequence_digests_in_parallel(self):
+        header_offsets = find_header_offsets(self.fasta)
+        assert compute_sequence_digests(self.fasta, header_offsets, nb_processes=3) == \
+            compute_sequence_digests(self.fasta, header_offsets)
+
+    def test_compute_sequence_digests_compressed(self):
+        header_offsets = FastaHeaderIndex.build(self.compressed_fasta).header_offsets
+        block_offsets = read_block_offsets(self.compressed_fasta)
+        assert len(block_offsets) > 1
+        assert compute_sequence_digests(self.compressed_fasta, header_offsets, 3, block_offsets) == \
+            compute_sequence_digests(self.fasta, find_header_offsets(self.fasta))
+
+    def test_split_contigs(self):
+        header_offsets = [(0, 10), (600, 610), (620, 630), (1000, 1010)]
+        pieces = split_contigs(header_offsets, 2)
+        assert pieces == [[(0, 10, 600)], [(600, 610, 620), (620, 630, 1000), (1000, 1010, None)]]
+        assert len(split_contigs(header_offsets, 10)) == 3
+        assert split_contigs([], 2) == []
+
+    def test_write_and_read_sequence_digests(self):
+        digests = compute_sequence_digests(self.fasta, find_header_offsets(self.fasta))
+        digests_path = os.path.join(self.tmp_dir.name, 'digests.tsv')
+        write_sequence_digests(digests, digests_path)
+        assert read_sequence_digests(digests_path) == digests
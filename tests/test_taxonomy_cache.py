@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from eva_assembly_ingestion.taxonomy_cache import TaxonomyNameCache
+
+names = {9913: 'Bos taurus', 9940: 'Ovis aries', 10116: 'Rattus norvegicus'}
+
+
+def test_get_many_looks_up_missing_names_once(tmpdir):
+    cache_file = str(tmpdir.join('taxonomy_names.json'))
+    lookup = Mock(side_effect=names.get)
+    cache = TaxonomyNameCache(cache_file, lookup=lookup)
+    assert cache.get_many([9913, 9940, 9913]) == {9913: 'Bos taurus', 9940: 'Ovis aries'}
+    assert cache.get(9913) == 'Bos taurus'
+    assert lookup.call_count == 2
+
+    # Another process reads the names from the file
+    other_lookup = Mock(side_effect=names.get)
+    other_cache = TaxonomyNameCache(cache_file, lookup=other_lookup)
+    assert other_cache.get_many([9913, 9940, 10116]) == names
+    other_lookup.assert_called_once_with(10116)
+    with open(cache_file) as open_file:
+        assert set(json.load(open_file)['scientific_name']) == {'9913', '9940', '10116'}
+
+
+def test_expired_names_are_looked_up_again(tmpdir):
+    cache_file = str(tmpdir.join('taxonomy_names.json'))
+    TaxonomyNameCache(cache_file, lookup=names.get).get(9913)
+    with open(cache_file) as open_file:
+        cache_content = json.load(open_file)
+    cache_content['scientific_name']['9913'][1] = time.time() - 7200
+    with open(cache_file, 'w') as open_file:
+        json.dump(cache_content, open_file)
+
+    lookup = Mock(return_value='Bos taurus taurus')
+    assert TaxonomyNameCache(cache_file, ttl=3600, lookup=lookup).get(9913) == 'Bos taurus taurus'
+    lookup.assert_called_once_with(9913)
+    assert TaxonomyNameCache(cache_file, ttl=3 * 3600, lookup=lookup).get(9913) == 'Bos taurus taurus'
+    assert lookup.call_count == 1
+
+
+def test_failed_lookups_are_not_cached(tmpdir):
+    cache_file = str(tmpdir.join('taxonomy_names.json'))
+    lookup = Mock(side_effect=[Exception('Service unavailable'), None])
+    cache = TaxonomyNameCache(cache_file, lookup=lookup)
+    assert cache.get_many([9913]) == {}
+    assert cache.get_many([9913]) == {}
+    assert lookup.call_count == 2
+    assert not os.path.exists(cache_file)
+
+
+def test_get_raises_when_name_not_found(tmpdir):
+    cache_file = str(tmpdir.join('taxonomy_names.json'))
+    lookup = Mock(side_effect=[ConnectionError('Service unavailable'), None, 'Bos taurus'])
+    cache = TaxonomyNameCache(cache_file, lookup=lookup)
+    with pytest.raises(ConnectionError):
+        cache.get(9913)
+    with pytest.raises(ValueError):
+        cache.get(9913)
+    assert cache.get(9913) == 'Bos taurus'
+    assert TaxonomyNameCache(cache_file, lookup=lookup).get(9913) == 'Bos taurus'
+    assert lookup.call_count == 3
+
+
+def test_sections_and_corrupted_file(tmpdir):
+    cache_file = str(tmpdir.join('taxonomy_names.json'))
+    with open(cache_file, 'w') as open_file:
+        open_file.write('{not json')
+    TaxonomyNameCache(cache_file, lookup=names.get).get(9913)
+    lookup = Mock(return_value='Bos taurus ensembl')
+    assert TaxonomyNameCache(cache_file, lookup=lookup, section='ensembl').get(9913) == 'Bos taurus ensembl'
+    lookup.assert_called_once_with(9913)
+    assert TaxonomyNameCache(cache_file, lookup=lookup).get(9913) == 'Bos taurus'
+
+
+def test_lookups_are_concurrent(tmpdir):
+    # Each lookup waits for the others: this only completes if they run at the same time
+    barrier = threading.Barrier(3, timeout=5)
+
+    def lookup(taxonomy):
+        barrier.wait()
+        return names[taxonomy]
+
+    cache = TaxonomyNameCache(str(tmpdir.join('taxonomy_names.json')), lookup=lookup)
+    assert cache.get_many(names) == names
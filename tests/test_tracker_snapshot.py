@@ -0,0 +1,78 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from eva_assembly_ingestion.db_session import MetadataSession
+from eva_assembly_ingestion.tracker_snapshot import TrackerSnapshot, TrackerRow
+from fake_postgres import FakeConnection
+
+
+def tracker_row(source, taxonomy, origin_assembly, status, row_version, target_assembly='GCA_000003055.3'):
+    return (source, taxonomy, 'Bos taurus', origin_assembly, target_assembly, 1, status, None, None, None, row_version)
+
+
+class TestTrackerSnapshot(TestCase):
+
+    def setUp(self):
+        self.rows = [
+            tracker_row('EVA', 9913, 'GCA_000000001.1', 'Pending', 1000),
+            tracker_row('DBSNP', 9913, 'GCA_000000001.1', 'Pending', 1000),
+            tracker_row('EVA', 9940, 'GCA_000000002.1', 'Completed', 990),
+        ]
+        self.connection = FakeConnection()
+        self.patch_connect = patch('eva_assembly_ingestion.db_session.get_metadata_connection_handle',
+                                   return_value=self.connection)
+        self.patch_connect.start()
+        self.metadata_session = MetadataSession('development', 'settings.xml')
+        self.snapshot = TrackerSnapshot(self.metadata_session, 'eva_progress_tracker.remapping_tracker', 5,
+                                        'GCA_000003055.3')
+
+    def tearDown(self):
+        self.metadata_session.close()
+        self.patch_connect.stop()
+
+    def test_rows_loaded_once(self):
+        self.connection.results = [self.rows, [(3, 2990)], [(3, 2990)]]
+        assert self.snapshot.rows([9913, 9940]) == [TrackerRow(*row) for row in self.rows]
+        assert self.snapshot.rows([9940, 9913]) == [TrackerRow(*row) for row in self.rows]
+        assert self.snapshot.rows([9913, 9940]) == [TrackerRow(*row) for row in self.rows]
+        load_query, fingerprint_query, _ = [query for query, _ in self.connection.statements]
+        assert load_query.startswith('SELECT tracker.source, tracker.taxonomy, ')
+        assert load_query.endswith('tracker.xmin::text::bigint FROM eva_progress_tracker.remapping_tracker AS tracker '
+                                   'WHERE release_version=%s AND assembly_accession=%s AND taxonomy = ANY(%s)')
+        assert fingerprint_query.startswith('SELECT count(*), COALESCE(sum(xmin::text::bigint), 0)')
+
+    def test_rows_reloaded_after_external_write(self):
+        updated_row = tracker_row('EVA', 9940, 'GCA_000000002.1', 'Failed', 1010)
+        self.connection.results = [self.rows, [(3, 3010)], self.rows[:2] + [updated_row]]
+        self.snapshot.rows([9913, 9940])
+        rows = self.snapshot.rows([9913, 9940])
+        assert len(self.connection.statements) == 3
+        assert TrackerRow(*updated_row) in rows
+
+    def test_rows_reloaded_for_other_taxonomies(self):
+        self.connection.results = [self.rows, self.rows[:2]]
+        self.snapshot.rows([9913, 9940])
+        assert len(self.snapshot.rows([9913])) == 2
+        assert self.connection.statements[1][1] == (5, 'GCA_000003055.3', [9913])
+
+    def test_apply_own_writes(self):
+        self.connection.results = [self.rows, [(3, 3010)]]
+        self.snapshot.rows([9913, 9940])
+        self.snapshot.apply([
+            tracker_row('EVA', 9913, 'GCA_000000001.1', 'Started', 1010),
+            tracker_row('DBSNP', 9913, 'GCA_000000001.1', 'Started', 1010),
+            # Outside of the snapshot
+            tracker_row('EVA', 9913, 'GCA_000000001.1', 'Started', 1010, target_assembly='GCA_002263795.2'),
+            tracker_row('EVA', 9615, 'GCA_000000003.1', 'Started', 1010),
+        ])
+        rows = self.snapshot.rows([9913, 9940])
+        # Only the fingerprint is checked
+        assert len(self.connection.statements) == 2
+        assert [row.remapping_status for row in rows] == ['Started', 'Started', 'Completed']
+
+    def test_apply_before_loading(self):
+        self.snapshot.apply([tracker_row('EVA', 9913, 'GCA_000000001.1', 'Started', 1010)])
+        self.connection.results = [self.rows]
+        assert [row.remapping_status for row in self.snapshot.rows([9913, 9940])] == [
+            'Pending', 'Pending', 'Completed'
+        ]